@@ -0,0 +1,100 @@
+# Run from the repository root with: python -m benchmarks.allocations
+# Runs tight INTEGER, REAL and BOOLEAN loops and reports, for each, the time taken, the peak memory traced while it ran,
+# and how many INTEGER, REAL and BOOLEAN values were made. Values that come from the shared small integers and booleans
+# in the data file are not counted, as they are not made again.
+import argparse
+import contextlib
+import io
+import time
+import tracemalloc
+
+from pseudocoder import data
+from pseudocoder.interpreter import parse_program
+from pseudocoder.namespaces import GlobalNameSpace
+from pseudocoder.resolver import resolve_program
+from pseudocoder.runner import BACKENDS
+
+PROGRAMS = {
+    'integer': '''DECLARE i : INTEGER
+DECLARE j : INTEGER
+DECLARE total : INTEGER
+total <- 0
+FOR i <- 1 TO {n}
+  FOR j <- 1 TO 100
+    total <- total + i * j - j
+  ENDFOR
+ENDFOR
+OUTPUT total
+''',
+    'real': '''DECLARE i : INTEGER
+DECLARE x : REAL
+x <- 0.0
+FOR i <- 1 TO {n}00
+  x <- x + 0.5 * 2.0
+ENDFOR
+OUTPUT x
+''',
+    'boolean': '''DECLARE i : INTEGER
+DECLARE b : BOOLEAN
+FOR i <- 1 TO {n}00
+  b <- i < 50 AND i > 10 OR i = 3
+ENDFOR
+OUTPUT b
+''',
+}
+
+
+@contextlib.contextmanager
+def count_values():
+    counts = {cls.__name__: 0 for cls in (data.Integer, data.Real, data.Boolean)}
+    originals = {}
+    for cls in (data.Integer, data.Real, data.Boolean):
+        original = originals[cls] = cls.__init__
+
+        def counted(self, value, _original=original, _name=cls.__name__):
+            counts[_name] += 1
+            _original(self, value)
+        cls.__init__ = counted
+    try:
+        yield counts
+    finally:
+        for cls, original in originals.items():
+            cls.__init__ = original
+
+
+def run(program: list, backend: str) -> float:
+    namespace = GlobalNameSpace(resolve_program(program))
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        BACKENDS[backend](program, namespace)
+    return time.perf_counter() - start
+
+
+# timed on its own first, as tracing and counting slow the run down
+def measure(source: str, backend: str) -> tuple[float, int, dict[str, int]]:
+    program = parse_program(source)
+    seconds = run(program, backend)
+    with count_values() as counts:
+        tracemalloc.start()
+        run(program, backend)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return seconds, peak, counts
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument('--programs', nargs='+', choices=list(PROGRAMS), default=list(PROGRAMS))
+    parser.add_argument('--backends', nargs='+', choices=sorted(BACKENDS), default=['tree', 'closure'])
+    parser.add_argument('--size', type=int, default=300, help='Number of times round the outer loop')
+
+    args = parser.parse_args()
+
+    print(f'{"program":>8} {"backend":>8} {"seconds":>8} {"peak KiB":>9} {"INTEGER":>8} {"REAL":>8} {"BOOLEAN":>8}')
+    for name in args.programs:
+        for backend in args.backends:
+            seconds, peak, counts = measure(PROGRAMS[name].format(n=args.size), backend)
+            print(f'{name:>8} {backend:>8} {seconds:>8.3f} {peak / 1024:>9.1f} {counts["Integer"]:>8} '
+                  f'{counts["Real"]:>8} {counts["Boolean"]:>8}')
@@ -0,0 +1,71 @@
+# Run from the repository root with: python -m benchmarks.backends
+# Times each backend on loops in the style of code.pseudo, with the output kept in memory. Each program is parsed once,
+# and run in a fresh namespace for each repeat; the best time is reported, with its speedup over the tree walker.
+import argparse
+import time
+
+from pseudocoder.interpreter import parse_program
+from pseudocoder.namespaces import GlobalNameSpace
+from pseudocoder.output import MemorySink
+from pseudocoder.resolver import resolve_program
+from pseudocoder.runner import BACKENDS
+
+PROGRAMS = {
+    'counting': '''DECLARE stuff : INTEGER
+DECLARE i : INTEGER
+stuff <- 5
+FOR i <- 1 TO {n}00
+    stuff <- stuff + i
+    OUTPUT stuff
+    OUTPUT i
+ENDFOR
+''',
+    'nested': '''DECLARE i : INTEGER
+DECLARE j : INTEGER
+DECLARE total : INTEGER
+DECLARE x : REAL
+total <- 0
+x <- 0.5
+FOR i <- 1 TO {n}
+    FOR j <- 1 TO 100
+        total <- total + i * j - (j - 1)
+        IF total > 1000 THEN
+            total <- total - 1000
+        ENDIF
+        x <- x + 1.5 / 3
+    ENDFOR
+ENDFOR
+OUTPUT total
+OUTPUT x
+''',
+}
+
+
+def time_backend(program: list, backend: str, repeats: int) -> float:
+    best = float('inf')
+    for _ in range(repeats):
+        namespace = GlobalNameSpace(resolve_program(program), MemorySink())
+        start = time.perf_counter()
+        BACKENDS[backend](program, namespace)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument('--programs', nargs='+', choices=list(PROGRAMS), default=list(PROGRAMS))
+    parser.add_argument('--backends', nargs='+', choices=sorted(BACKENDS), default=['tree', 'vm'])
+    parser.add_argument('--size', type=int, default=300, help='Number of times round the outer loop')
+    parser.add_argument('--repeats', type=int, default=3)
+
+    args = parser.parse_args()
+
+    print(f'{"program":>10} {"backend":>8} {"seconds":>8} {"speedup":>8}')
+    for name in args.programs:
+        program = parse_program(PROGRAMS[name].format(n=args.size))
+        baseline = time_backend(program, 'tree', args.repeats)
+        for backend in args.backends:
+            seconds = baseline if backend == 'tree' else time_backend(program, backend, args.repeats)
+            print(f'{name:>10} {backend:>8} {seconds:>8.3f} {baseline / seconds:>7.2f}x')
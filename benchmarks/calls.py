@@ -0,0 +1,87 @@
+# Run from the repository root with: python -m benchmarks.calls
+# Times calls to pseudocode functions with the tree walker. The grammar cannot declare functions yet, so they are built
+# from the ast classes here: a recursive fibonacci, and a function that returns from inside a FOR loop in an IF.
+# --memoize runs them with a Memoizer, and reports its hits and misses.
+import argparse
+import time
+from typing import Optional
+
+from pseudocoder.instructions import FunctionReturn, IfElse, ForLoop, Output
+from pseudocoder.interfaces import Function
+from pseudocoder.memo import Memoizer
+from pseudocoder.namespaces import GlobalNameSpace, Parameters
+from pseudocoder.operations import Identifier, IntegerLiteral, FunctionEvaluate, Addition, Subtraction, LessThan
+from pseudocoder.operations import GreaterThan
+from pseudocoder.output import MemorySink
+
+
+def declare_function(namespace: GlobalNameSpace, name: str, parameters: list[str], body: tuple) -> None:
+    params = Parameters()
+    for parameter in parameters:
+        params.add_parameter(parameter, 'INTEGER', namespace, False)
+    integer = namespace.lookup('INTEGER')
+    # there is no type for functions to declare them with, so they are put in the namespace's constants directly
+    namespace._constants[name] = Function(params, integer, body, namespace)
+
+
+def fibonacci(namespace: GlobalNameSpace) -> None:
+    n = Identifier('n')
+    declare_function(namespace, 'fib', ['n'], (
+        IfElse(LessThan(n, IntegerLiteral(2)), (FunctionReturn(n),), ()),
+        FunctionReturn(Addition(
+            FunctionEvaluate('fib', Subtraction(n, IntegerLiteral(1))),
+            FunctionEvaluate('fib', Subtraction(n, IntegerLiteral(2))),
+        )),
+    ))
+
+
+def first_over(namespace: GlobalNameSpace) -> None:
+    i, limit = Identifier('i'), Identifier('limit')
+    declare_function(namespace, 'first_over', ['limit', 'i'], (
+        ForLoop(i, IntegerLiteral(1), IntegerLiteral(1000), IntegerLiteral(1), (
+            IfElse(GreaterThan(Addition(i, i), limit), (FunctionReturn(i),), ()),
+        )),
+        FunctionReturn(IntegerLiteral(-1)),
+    ))
+
+
+def time_call(declare, call, size: int, repeats: int, memoize: bool = False) -> tuple[float, Optional[Memoizer]]:
+    best = float('inf')
+    memoizer = None
+    for _ in range(repeats):
+        # a fresh memoizer for each repeat, so that none of them is answered entirely from the cache
+        memoizer = Memoizer() if memoize else None
+        namespace = GlobalNameSpace(output=MemorySink(), memoizer=memoizer)
+        declare(namespace)
+        start = time.perf_counter()
+        Output(call(size)).execute(namespace, namespace)
+        best = min(best, time.perf_counter() - start)
+    return best, memoizer
+
+
+CALLS = {
+    'fibonacci': (fibonacci, lambda size: FunctionEvaluate('fib', IntegerLiteral(size))),
+    'early_return': (first_over, lambda size: Addition(*(
+        FunctionEvaluate('first_over', IntegerLiteral(size * 100 + k), IntegerLiteral(0)) for k in range(2)
+    ))),
+}
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument('--calls', nargs='+', choices=list(CALLS), default=list(CALLS))
+    parser.add_argument('--size', type=int, default=20)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--memoize', action='store_true')
+
+    args = parser.parse_args()
+
+    print(f'{"call":>12} {"seconds":>8}')
+    for name in args.calls:
+        declare, call = CALLS[name]
+        seconds, memoizer = time_call(declare, call, args.size, args.repeats, args.memoize)
+        print(f'{name:>12} {seconds:>8.3f}')
+        if memoizer is not None:
+            print(memoizer.describe())
@@ -0,0 +1,40 @@
+# Run from the repository root with: python -m benchmarks.expression_parse
+# Times parse_program on single OUTPUT statements of growing length. With the precedence parser the time per term
+# should stay flat as the expression grows, i.e. parsing is linear in the length of the expression.
+import argparse
+import time
+
+from pseudocoder.interpreter import parse_program
+
+
+def expression_source(terms: int) -> str:
+    operators = ('+', '*', '-', '/', '+', '<', '+', 'AND')
+    parts = ['1']
+    for i in range(1, terms):
+        parts.append(operators[i % len(operators)])
+        parts.append(f'({i} + 2)' if i % 5 == 0 else str(i))
+    return 'OUTPUT ' + ' '.join(parts) + '\n'
+
+
+def time_parse(source: str, repeats: int) -> float:
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        parse_program(source)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument('--sizes', type=int, nargs='+', default=[50, 100, 200, 400, 800, 1600])
+    parser.add_argument('--repeats', type=int, default=3)
+
+    args = parser.parse_args()
+
+    print(f'{"terms":>8} {"seconds":>10} {"us/term":>10}')
+    for size in args.sizes:
+        seconds = time_parse(expression_source(size), args.repeats)
+        print(f'{size:>8} {seconds:>10.4f} {seconds / size * 1e6:>10.1f}')
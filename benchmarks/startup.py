@@ -0,0 +1,67 @@
+# Run from the repository root with: python -m benchmarks.startup
+# Counts how many small programs a second can be run each in a process of its own: started cold with
+# `python -m pseudocoder`, either parsing the program or loading it from a parse cache, or forked from a fork server that has already imported and warmed up the interpreter, which
+# either parses the program in every child or loads it from a parse cache in a temporary directory.
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Optional
+
+from pseudocoder.batch import BatchOptions
+from pseudocoder.cache import ParseCache
+from pseudocoder.forkserver import ForkServer
+
+PROGRAM = '''DECLARE i : INTEGER
+DECLARE total : INTEGER
+total <- 0
+FOR i <- 1 TO 10
+    total <- total + i
+ENDFOR
+OUTPUT total
+'''
+
+
+def time_cold(path: str, runs: int, cache_dir: Optional[str] = None) -> float:
+    command = [sys.executable, '-m', 'pseudocoder', path]
+    if cache_dir is not None:
+        command += ['--cache', '--cache-dir', cache_dir]
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL)  # so that every timed run finds it cached
+    start = time.perf_counter()
+    for _ in range(runs):
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def time_forked(path: str, runs: int, cache: Optional[ParseCache] = None) -> float:
+    server = ForkServer(BatchOptions(), cache)
+    server.start()
+    start = time.perf_counter()
+    for _ in range(runs):
+        result = server.run(path, PROGRAM)
+        assert result['status'] == 'ok', result['error']
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument('--runs', type=int, default=50)
+
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'program.pseudo')
+        with open(path, 'w') as fh:
+            fh.write(PROGRAM)
+        cold = time_cold(path, args.runs)
+        cold_cached = time_cold(path, args.runs, os.path.join(directory, 'cold-cache'))
+        forked = time_forked(path, args.runs)
+        cached = time_forked(path, args.runs, ParseCache(os.path.join(directory, 'cache')))
+
+    print(f'{"mode":>14} {"runs/s":>8} {"ms/run":>8} {"speedup":>8}')
+    for name, seconds in (('cold', cold), ('cold+cache', cold_cached), ('forked', forked), ('forked+cache', cached)):
+        print(f'{name:>14} {args.runs / seconds:>8.1f} {seconds / args.runs * 1000:>8.2f} {cold / seconds:>7.2f}x')
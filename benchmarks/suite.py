@@ -0,0 +1,222 @@
+# Run from the repository root with: python -m benchmarks.suite
+# Runs a set of workloads in the style of the programs students write, and measures the time parse_program takes, the
+# time the program takes to run, the peak memory traced while it runs, and how many INTEGER, REAL and BOOLEAN values it
+# makes, each on its own so that measuring one does not slow down another. The grammar cannot declare functions, so
+# the recursive workload builds its function from the ast classes, as the calls benchmark does.
+#
+# --save writes the results as JSON, such as to keep as a baseline. --baseline compares the results with a saved file,
+# and lists every measurement that has grown by more than --threshold, with an exit status of 1 if there are any. Peak
+# memory and allocations do not change from run to run, so any growth in them beyond the threshold is real, whereas
+# the times are best compared with the same machine idle. baseline.json beside this file was saved with the defaults,
+# and its times are only a guide on any other machine: save a baseline of your own before making a change.
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Callable, Optional
+
+from benchmarks.allocations import count_values
+from benchmarks.calls import fibonacci
+from pseudocoder.instructions import Output
+from pseudocoder.interpreter import parse_program
+from pseudocoder.namespaces import GlobalNameSpace
+from pseudocoder.operations import FunctionEvaluate, IntegerLiteral
+from pseudocoder.output import MemorySink
+from pseudocoder.resolver import resolve_program
+from pseudocoder.runner import BACKENDS
+
+DEFAULT_THRESHOLD = 0.25  # times vary this much from run to run on a busy machine
+MIN_SECONDS = 0.01  # and a time must grow by at least this much, as the shortest vary by more
+METRICS = ('parse_seconds', 'run_seconds', 'peak_memory_kb', 'allocations')
+
+
+class Workload:
+    def __init__(
+            self,
+            source: Callable[[int], str],
+            declare: Optional[Callable[[GlobalNameSpace], None]] = None,
+            extra: Optional[Callable[[int], list]] = None
+    ) -> None:
+        self.source = source  # the program for a size
+        self.declare = declare  # puts any functions the program calls in its namespace
+        self.extra = extra  # instructions that cannot be written in the source, to run after it
+
+
+# a REAL expression of the given number of terms, that only does arithmetic so that it can run as well as parse
+def arithmetic_source(terms: int) -> str:
+    operators = ('+', '*', '-', '/')
+    parts = ['i']
+    for k in range(1, terms):
+        parts.append(operators[k % len(operators)])
+        parts.append(f'(i + {k}.5)' if k % 5 == 0 else str(k))
+    return ' '.join(parts)
+
+
+def large_source(size: int) -> str:
+    lines = ['DECLARE total : INTEGER', 'DECLARE x : REAL', 'total <- 0', 'x <- 0.0']
+    for i in range(size):
+        lines.append(f'DECLARE v{i} : INTEGER')
+        lines.append(f'v{i} <- {i} * 3 + total - {i % 7}')
+        lines.append(f'IF v{i} > {i} THEN')
+        lines.append(f'    total <- total + v{i} - {i}')
+        lines.append('ELSE')
+        lines.append(f'    x <- x + {i}.5 / 2')
+        lines.append('ENDIF')
+    lines.append('OUTPUT total')
+    lines.append('OUTPUT x')
+    return '\n'.join(lines) + '\n'
+
+
+WORKLOADS = {
+    'tight_for': Workload(lambda size: f'''DECLARE i : INTEGER
+DECLARE j : INTEGER
+DECLARE total : INTEGER
+total <- 0
+FOR i <- 1 TO {size}
+    FOR j <- 1 TO 100
+        total <- total + i * j - j
+    ENDFOR
+ENDFOR
+OUTPUT total
+'''),
+    'if_chain': Workload(lambda size: f'''DECLARE i : INTEGER
+DECLARE small : INTEGER
+DECLARE middle : INTEGER
+DECLARE large : INTEGER
+small <- 0
+middle <- 0
+large <- 0
+FOR i <- 1 TO {size}00
+    IF i < 1000 THEN
+        small <- small + 1
+    ELSE
+        IF i < 5000 THEN
+            middle <- middle + 1
+        ELSE
+            IF i < 10000 AND i <> 7777 THEN
+                large <- large + 1
+            ELSE
+                large <- large - 1
+            ENDIF
+        ENDIF
+    ENDIF
+ENDFOR
+OUTPUT small
+OUTPUT middle
+OUTPUT large
+'''),
+    'long_expression': Workload(lambda size: f'''DECLARE i : INTEGER
+DECLARE x : REAL
+FOR i <- 1 TO {size}
+    x <- {arithmetic_source(200)}
+ENDFOR
+OUTPUT x
+'''),
+    'recursive': Workload(lambda size: '', fibonacci,
+                          lambda size: [Output(FunctionEvaluate('fib', IntegerLiteral(12 + size // 50)))]),
+    'output_volume': Workload(lambda size: f'''DECLARE i : INTEGER
+FOR i <- 1 TO {size}00
+    OUTPUT i
+    OUTPUT i * 2 + 0.5
+ENDFOR
+'''),
+    'large_source': Workload(large_source),
+}
+
+
+def measure(workload: Workload, size: int, backend: str, repeats: int) -> dict:
+    source = workload.source(size)
+    parse_seconds = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        program = parse_program(source)
+        parse_seconds = min(parse_seconds, time.perf_counter() - start)
+    if workload.extra is not None:
+        program = program + workload.extra(size)
+
+    def fresh() -> Callable[[], None]:
+        namespace = GlobalNameSpace(resolve_program(program), MemorySink())
+        if workload.declare is not None:
+            workload.declare(namespace)
+        return lambda: BACKENDS[backend](program, namespace)
+
+    run_seconds = float('inf')
+    for _ in range(repeats):
+        run = fresh()
+        start = time.perf_counter()
+        run()
+        run_seconds = min(run_seconds, time.perf_counter() - start)
+    # traced and counted apart from the timing, as tracing and counting slow the run down
+    run = fresh()
+    with count_values() as counts:
+        tracemalloc.start()
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {
+        'parse_seconds': parse_seconds,
+        'run_seconds': run_seconds,
+        'peak_memory_kb': peak // 1024,
+        'allocations': sum(counts.values()),
+    }
+
+
+def find_regressions(results: dict, baseline: dict, threshold: float) -> list[str]:
+    regressions = []
+    for name, measured in results['workloads'].items():
+        saved = baseline['workloads'].get(name)
+        if saved is None:
+            continue
+        for metric in METRICS:
+            before, after = saved.get(metric), measured[metric]
+            if metric.endswith('_seconds') and after - before < MIN_SECONDS:
+                continue
+            if before and after > before * (1 + threshold):
+                regressions.append(f'{name} {metric}: {before:g} -> {after:g} ({after / before - 1:+.1%})')
+    return regressions
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument('--workloads', nargs='+', choices=list(WORKLOADS), default=list(WORKLOADS))
+    parser.add_argument('--backend', choices=sorted(BACKENDS), default='tree')
+    parser.add_argument('--size', type=int, default=300, help='How big each workload is made')
+    parser.add_argument('--repeats', type=int, default=3, help='Times to parse and run each, keeping the best')
+    parser.add_argument('--save', default=None, metavar='FILE', help='Write the results to FILE as JSON')
+    parser.add_argument('--baseline', default=None, metavar='FILE', help='Compare the results with those in FILE')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Fraction by which a measurement may grow before it is a regression')
+
+    args = parser.parse_args()
+
+    results = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'backend': args.backend,
+        'size': args.size,
+        'workloads': {},
+    }
+    print(f'{"workload":>16} {"parse s":>8} {"run s":>8} {"peak KiB":>9} {"allocations":>12}')
+    for name in args.workloads:
+        measured = results['workloads'][name] = measure(WORKLOADS[name], args.size, args.backend, args.repeats)
+        print(f'{name:>16} {measured["parse_seconds"]:>8.3f} {measured["run_seconds"]:>8.3f} '
+              f'{measured["peak_memory_kb"]:>9} {measured["allocations"]:>12}')
+
+    if args.save is not None:
+        with open(args.save, 'w') as fh:
+            json.dump(results, fh, indent=2)
+    if args.baseline is not None:
+        with open(args.baseline, 'r') as fh:
+            baseline = json.load(fh)
+        if (baseline.get('backend'), baseline.get('size')) != (args.backend, args.size):
+            print(f'The baseline was made with --backend {baseline.get("backend")} --size {baseline.get("size")}, '
+                  f'so the results cannot be compared', file=sys.stderr)
+            sys.exit(2)
+        regressions = find_regressions(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f'REGRESSION {regression}', file=sys.stderr)
+        sys.exit(1 if regressions else 0)
@@ -1,13 +1,183 @@
+import time
+STARTED = time.perf_counter()  # before anything else is imported, for --startup-timings
 
-from pseudocoder.runner import run
+# only what every run needs; the rest is imported where it is used, so that it costs nothing to start up without it
+from pseudocoder.limits import Limits, LimitExceeded, EXIT_LIMIT_EXCEEDED
+from pseudocoder.memo import Memoizer, DEFAULT_MEMO_SIZE
+from pseudocoder.optimizer import Optimizer, PASSES, DEFAULT_PIPELINE
+from pseudocoder.output import StreamSink, FileSink, FLUSH_POLICIES
+from pseudocoder.runner import run, run_program, load_program, BACKENDS
+from pseudocoder.startup import StartupTimings
+from pseudocoder.typechecker import TypeCheckError
 import argparse
+import sys
 
 if __name__ == '__main__':
 
+    startup = StartupTimings(STARTED)
+    startup.mark('imports')
+
+    if sys.argv[1:2] == ['batch']:
+        from pseudocoder.batch import main
+        sys.exit(main(sys.argv[2:]))
+    if sys.argv[1:2] == ['serve']:
+        from pseudocoder.server import main
+        sys.exit(main(sys.argv[2:]))
+    if sys.argv[1:2] == ['forkserver']:
+        from pseudocoder.forkserver import main
+        sys.exit(main(sys.argv[2:]))
+
     parser = argparse.ArgumentParser()
 
-    parser.add_argument('code_file', help='Pseudocode file to run')
+    parser.add_argument('code_file', nargs='?', help='Pseudocode file to run')
+    parser.add_argument('--backend', choices=sorted(BACKENDS), default='tree',
+                        help='How the program is executed: by walking the ast, as compiled closures, translated to python, '
+                             'compiled to bytecode for the vm, or run with an explicit stack instead of python recursion')
+    parser.add_argument('--disassemble', action='store_true',
+                        help='Print the bytecode the program compiles to for the vm backend, instead of running it')
+    parser.add_argument('--debug-namespaces', action='store_true',
+                        help='Look every name up through the namespace chain instead of resolving it before running')
+    parser.add_argument('--optimize', action='store_true', help='Optimize the program before running it')
+    parser.add_argument('--passes', nargs='+', choices=list(PASSES), default=list(DEFAULT_PIPELINE),
+                        help='The optimizer passes to run, in order')
+    parser.add_argument('--dump-optimized', action='store_true',
+                        help='Optimize, and print the optimized program and what each pass did to stderr')
+    parser.add_argument('--typecheck', action='store_true',
+                        help='Check the types in the program before running it, and skip the checks while it runs')
+    parser.add_argument('--jit', action='store_true',
+                        help='Compile FOR loops to python once they have run enough times (tree backend only)')
+    parser.add_argument('--memoize', nargs='?', type=int, const=DEFAULT_MEMO_SIZE, default=None, metavar='SIZE',
+                        help='Cache the results of pure functions, keeping up to SIZE results for each')
+    parser.add_argument('--memo-stats', action='store_true',
+                        help='Print how often each memoized function was found in its cache to stderr')
+    parser.add_argument('--max-steps', type=int, default=None,
+                        help='Stop the program once it has taken this many steps (loop iterations count one for each '
+                             'instruction in the loop, and calls count one)')
+    parser.add_argument('--max-output', type=int, default=None,
+                        help='Stop the program once it has written this many bytes of output')
+    parser.add_argument('--max-memory', type=int, default=None,
+                        help='Stop the program once the interpreter has used this many kilobytes of memory')
+    parser.add_argument('--profile', action='store_true',
+                        help='Print the source with how often each line ran and how long it took to stderr '
+                             '(tree backend only)')
+    parser.add_argument('--profile-collapsed', default=None, metavar='FILE',
+                        help='Profile, and write the time taken as collapsed stacks for flame graph tools to FILE')
+    parser.add_argument('--metrics', action='store_true',
+                        help='Print counts of the statements run, calls made, loop iterations and lines written, and '
+                             'the time taken to parse and to run, to stderr as JSON')
+    parser.add_argument('--stream', action='store_true',
+                        help='Parse and run the program a chunk of statements at a time as it is read, so that memory '
+                             'stays flat however long it is; give - as the file to read it from stdin')
+    parser.add_argument('--stream-chunk', type=int, default=None, metavar='STATEMENTS',
+                        help='Top level statements to parse at once when streaming, 1000 by default')
+    parser.add_argument('--watch', action='store_true',
+                        help='Run the program again each time the file changes, parsing only the statements that '
+                             'changed, until interrupted')
+    parser.add_argument('--output', default=None, help='Write the lines from OUTPUT to this file instead of stdout')
+    parser.add_argument('--flush', choices=list(FLUSH_POLICIES), default=None,
+                        help='When OUTPUT lines are written out: each line, in blocks, or when the program ends. '
+                             'Defaults to each line on a terminal, and blocks otherwise')
+    parser.add_argument('--cache', action=argparse.BooleanOptionalAction, default=False,
+                        help='Reuse parsed programs stored on disk from previous runs')
+    parser.add_argument('--clear-cache', action='store_true', help='Empty the parse cache before running')
+    parser.add_argument('--cache-dir', default=None, help='Directory for the parse cache')
+    parser.add_argument('--cache-size', type=int, default=None,
+                        help='Size in bytes above which the least recently used cache entries are evicted, 64 MiB by '
+                             'default')
+    parser.add_argument('--startup-timings', action='store_true',
+                        help='Print how long each step of starting up, parsing and running the program took to stderr')
 
     args = parser.parse_args()
+    startup.mark('arguments')
+    if (args.profile or args.profile_collapsed) and args.backend != 'tree':
+        parser.error('--profile needs the tree backend')
+    if args.jit and args.backend != 'tree':
+        parser.error('--jit needs the tree backend')
+    if args.jit and (args.profile or args.profile_collapsed or args.metrics):
+        print('warning: --jit does nothing with --profile or --metrics, which watch every statement the tree walker '
+              'runs', file=sys.stderr)
+    if args.stream and (args.typecheck or args.optimize or args.dump_optimized or args.profile or args.profile_collapsed
+                        or args.cache or args.disassemble):
+        parser.error('--stream cannot be used with --typecheck, --optimize, --profile, --cache or --disassemble, '
+                     'which need the whole program')
+    if args.stream and args.backend == 'python':
+        parser.error('--stream cannot be used with the python backend')
+    if args.watch and (args.stream or args.profile or args.profile_collapsed or args.cache or args.disassemble
+                       or args.memoize is not None or args.code_file == '-'):
+        parser.error('--watch cannot be used with --stream, --profile, --cache, --disassemble or --memoize, '
+                     'or with the program read from stdin')
 
-    run(args.code_file)
\ No newline at end of file
+    cache = None
+    if args.cache or args.clear_cache:
+        from pseudocoder.cache import ParseCache
+        cache = ParseCache(args.cache_dir, args.cache_size)
+    if args.clear_cache:
+        cache.clear()
+    if args.code_file is None:
+        if not args.clear_cache:
+            parser.error('the following arguments are required: code_file')
+    elif args.disassemble:
+        from pseudocoder.bytecode import compile_program, disassemble
+        from pseudocoder.namespaces import GlobalNameSpace
+        with open(args.code_file, 'r') as fh:
+            print(disassemble(compile_program(load_program(fh.read(), args.code_file), GlobalNameSpace())))
+    else:
+        optimizer = None
+        if args.optimize or args.dump_optimized:
+            optimizer = Optimizer(args.passes, sys.stderr if args.dump_optimized else None)
+        flush = args.flush
+        if flush is None:
+            flush = 'line' if args.output is None and sys.stdout.isatty() else 'block'
+        if args.output is None:
+            output = StreamSink(buffer_lines=FLUSH_POLICIES[flush])
+        else:
+            output = FileSink(args.output, FLUSH_POLICIES[flush])
+        memoizer = Memoizer(args.memoize) if args.memoize is not None else None
+        profiler = None
+        if args.profile or args.profile_collapsed:
+            from pseudocoder.profiler import Profiler
+            profiler = Profiler()
+        counters = None
+        if args.metrics:
+            from pseudocoder.events import CountersListener
+            counters = CountersListener(args.backend == 'tree')
+        try:
+            with output:
+                limits = Limits(args.max_steps, args.max_output, args.max_memory)
+                if args.stream:
+                    from pseudocoder.stream import run_stream
+                    with (sys.stdin if args.code_file == '-' else open(args.code_file, 'r')) as fh:
+                        run_stream(fh, args.code_file, args.backend, not args.debug_namespaces, output, args.jit,
+                                   memoizer, limits, counters, args.stream_chunk)
+                elif args.watch:
+                    from pseudocoder.incremental import watch
+                    # the counters from --metrics add up over every run, and are printed when watching stops
+                    watch(args.code_file, lambda program: run_program(
+                        program, args.backend, not args.debug_namespaces, optimizer, args.typecheck, output, args.jit,
+                        None, limits, None, counters))
+                else:
+                    run(args.code_file, cache if args.cache else None, args.backend, not args.debug_namespaces,
+                        optimizer, args.typecheck, output, args.jit, memoizer, limits, profiler, counters,
+                        startup if args.startup_timings else None)
+        except TypeCheckError as e:
+            for error in e.errors:
+                print(f'{args.code_file}: {error}', file=sys.stderr)
+            sys.exit(1)
+        except LimitExceeded as e:
+            print(f'{args.code_file}: {e}', file=sys.stderr)
+            sys.exit(EXIT_LIMIT_EXCEEDED)
+        finally:
+            if memoizer is not None and args.memo_stats:
+                print(memoizer.describe(), file=sys.stderr)
+            if counters is not None:
+                print(counters.describe(), file=sys.stderr)
+            if args.startup_timings:
+                print(startup.describe(), file=sys.stderr)
+            if profiler is not None:
+                with open(args.code_file, 'r') as fh:
+                    source = fh.read()
+                if args.profile:
+                    print(profiler.annotate(source), file=sys.stderr)
+                if args.profile_collapsed:
+                    with open(args.profile_collapsed, 'w') as fh:
+                        profiler.write_collapsed(source, fh)
@@ -0,0 +1,257 @@
+# Runs many programs at once, as `python -m pseudocoder batch`, spread over a pool of worker processes. The programs are
+# every .pseudo file under a directory, or the files listed in a manifest, one path to a line. Each distinct source is
+# parsed once, by whichever worker gets to it first, and the pickled ast is handed to the run of every file that has
+# that source, each of which unpickles a copy of its own. A result is written as a line of JSON as soon as its program
+# finishes, so the results come out in the order the programs finish rather than the order they were given.
+#
+# Each program has a time limit, enforced inside the worker with a timer signal where the platform has one. The memory
+# reported is the peak resident size of the worker that ran the program, which is that program's own peak only with
+# --isolate, where every program gets a fresh worker. The limits file can instead stop a program after a number of
+# steps, or once it has written or used too much, which needs no signals and costs nothing when it is not asked for.
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import signal
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Optional, Sequence, TextIO, TYPE_CHECKING
+
+from pseudocoder.limits import Limits, LimitExceeded, EXIT_LIMIT_EXCEEDED, peak_memory_kb
+from pseudocoder.memo import Memoizer, DEFAULT_MEMO_SIZE
+from pseudocoder.optimizer import Optimizer, PASSES, DEFAULT_PIPELINE
+from pseudocoder.output import OutputSink, MemorySink
+from pseudocoder.runner import BACKENDS, run_program
+
+if TYPE_CHECKING:
+    from pseudocoder.interfaces import instruction
+
+DEFAULT_TIMEOUT = 10.0  # seconds
+
+EXIT_OK = 0
+EXIT_ERROR = 1
+EXIT_TIMEOUT = 124  # as the timeout command uses
+
+
+class ProgramTimeout(Exception):
+    pass
+
+
+# how every program in a batch is run; the arguments of the runner's run that make sense for a batch
+class BatchOptions:
+    def __init__(
+            self,
+            backend: str = 'tree',
+            typecheck: bool = False,
+            passes: Optional[Sequence[str]] = None,
+            jit: bool = False,
+            memoize: Optional[int] = None,
+            timeout: Optional[float] = DEFAULT_TIMEOUT,
+            limits: Optional[Limits] = None
+    ) -> None:
+        self.backend = backend
+        self.typecheck = typecheck
+        self.passes = tuple(passes) if passes is not None else None  # None to run without optimizing
+        self.jit = jit
+        self.memoize = memoize
+        self.timeout = timeout
+        self.limits = limits
+
+
+def find_programs(path: str) -> list[str]:
+    if os.path.isdir(path):
+        programs = []
+        for directory, _, names in os.walk(path):
+            programs.extend(os.path.join(directory, name) for name in names if name.endswith('.pseudo'))
+        return sorted(programs)
+    # a manifest, whose relative paths are relative to the manifest itself
+    base = os.path.dirname(os.path.abspath(path))
+    with open(path, 'r') as fh:
+        lines = [line.strip() for line in fh]
+    return [os.path.join(base, line) for line in lines if line and not line.startswith('#')]
+
+
+def describe_error(error: BaseException) -> str:
+    message = str(error)
+    return f'{type(error).__name__}: {message}' if message else type(error).__name__
+
+
+class TimeLimit:
+    def __init__(self, seconds: Optional[float]) -> None:
+        self.__seconds = seconds if seconds and hasattr(signal, 'setitimer') else None
+
+    def __enter__(self) -> None:
+        if self.__seconds is not None:
+            signal.signal(signal.SIGALRM, self.__expire)
+            signal.setitimer(signal.ITIMER_REAL, self.__seconds)
+
+    def __exit__(self, *exc_info) -> None:
+        if self.__seconds is not None:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+    def __expire(self, signum, frame) -> None:
+        raise ProgramTimeout(f'Stopped after {self.__seconds:g} seconds')
+
+
+# run in a worker: returns the pickled ast, or None and why the source could not be parsed
+def parse_source(code: str, timeout: Optional[float]) -> tuple[Optional[bytes], Optional[str]]:
+    from pseudocoder.interpreter import parse_program
+    try:
+        with TimeLimit(timeout):
+            program = parse_program(code)  # the source may be shared by several files, so none is named
+        return pickle.dumps(program, protocol=pickle.HIGHEST_PROTOCOL), None
+    except Exception as e:
+        return None, describe_error(e)
+
+
+# runs a parsed program as the options say, and returns its status, exit code, error and any limit it exceeded
+def run_parsed(
+        program: 'list[instruction]',
+        options: BatchOptions,
+        output: OutputSink
+) -> tuple[str, int, Optional[str], Optional[dict]]:
+    from pseudocoder.typechecker import TypeCheckError
+    optimizer = Optimizer(options.passes) if options.passes is not None else None
+    memoizer = None
+    if options.memoize is not None:
+        memoizer = Memoizer(options.memoize)
+    try:
+        with TimeLimit(options.timeout):
+            run_program(program, options.backend, True, optimizer, options.typecheck, output, options.jit, memoizer,
+                        options.limits)
+    except ProgramTimeout as e:
+        return 'timeout', EXIT_TIMEOUT, str(e), None
+    except LimitExceeded as e:
+        return 'limit-exceeded', EXIT_LIMIT_EXCEEDED, str(e), e.to_dict()
+    except TypeCheckError as e:
+        return 'error', EXIT_ERROR, '\n'.join(e.errors), None
+    except Exception as e:
+        return 'error', EXIT_ERROR, describe_error(e), None
+    return 'ok', EXIT_OK, None, None
+
+
+# run in a worker
+def run_source(path: str, pickled: bytes, options: BatchOptions) -> dict:
+    output = MemorySink()
+    start = time.perf_counter()
+    status, exit_code, error, limit = run_parsed(pickle.loads(pickled), options, output)
+    return make_result(path, status, exit_code, output.get_text(), error, time.perf_counter() - start, limit)
+
+
+def make_result(
+        path: str,
+        status: str,
+        exit_code: int,
+        stdout: str,
+        error: Optional[str],
+        seconds: float,
+        limit: Optional[dict] = None
+) -> dict:
+    return {
+        'file': path,
+        'status': status,
+        'exit_code': exit_code,
+        'stdout': stdout,
+        'error': error,
+        'limit': limit,  # which limit was exceeded, for status limit-exceeded
+        'seconds': round(seconds, 6),
+        'peak_memory_kb': peak_memory_kb(),
+    }
+
+
+def run_batch(
+        paths: Sequence[str],
+        options: BatchOptions,
+        results: TextIO,
+        workers: Optional[int] = None,
+        isolate: bool = False
+) -> dict[str, int]:
+    sources: dict[str, list[str]] = {}  # the hash of each distinct source, and the files that have it
+    codes: dict[str, str] = {}
+    counts: dict[str, int] = {}
+
+    def write(result: dict) -> None:
+        counts[result['status']] = counts.get(result['status'], 0) + 1
+        results.write(json.dumps(result) + '\n')
+        results.flush()
+
+    for path in paths:
+        try:
+            with open(path, 'r') as fh:
+                code = fh.read()
+        except (OSError, UnicodeDecodeError) as e:
+            write(make_result(path, 'error', EXIT_ERROR, '', describe_error(e), 0.0))
+            continue
+        digest = hashlib.sha256(code.encode()).hexdigest()
+        sources.setdefault(digest, []).append(path)
+        codes[digest] = code
+
+    pool_options = {}
+    if isolate:
+        # max_tasks_per_child only exists from python 3.11, so it is only passed when it is needed
+        if sys.version_info < (3, 11):
+            raise ValueError('isolate needs python 3.11 or later')
+        pool_options['max_tasks_per_child'] = 1
+    with ProcessPoolExecutor(workers, **pool_options) as pool:
+        # parses and runs are waited on together, so that a run that finishes is written while others still parse
+        parses: dict[Future, str] = {
+            pool.submit(parse_source, codes[digest], options.timeout): digest for digest in sources
+        }
+        pending = set(parses)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future not in parses:
+                    write(future.result())
+                    continue
+                digest = parses.pop(future)
+                pickled, error = future.result()
+                for path in sources[digest]:
+                    if pickled is None:
+                        write(make_result(path, 'parse-error', EXIT_ERROR, '', error, 0.0))
+                    else:
+                        pending.add(pool.submit(run_source, path, pickled, options))
+    return counts
+
+
+def main(argv: Sequence[str]) -> int:
+    parser = argparse.ArgumentParser(prog='pseudocoder batch')
+
+    parser.add_argument('programs', help='A directory to run every .pseudo file under, or a manifest of files to run')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes (default: one per CPU)')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT,
+                        help='Seconds each program may take to parse, and then to run; 0 for no limit')
+    parser.add_argument('--max-steps', type=int, default=None, help='Steps each program may take')
+    parser.add_argument('--max-output', type=int, default=None, help='Bytes of output each program may write')
+    parser.add_argument('--max-memory', type=int, default=None, help='Kilobytes of memory each worker may reach')
+    parser.add_argument('--results', default=None, help='Write the JSON Lines results to this file instead of stdout')
+    parser.add_argument('--isolate', action='store_true',
+                        help='Run every program in a fresh worker, so that its peak memory is its own')
+    parser.add_argument('--backend', choices=sorted(BACKENDS), default='tree')
+    parser.add_argument('--typecheck', action='store_true')
+    parser.add_argument('--optimize', action='store_true')
+    parser.add_argument('--passes', nargs='+', choices=list(PASSES), default=list(DEFAULT_PIPELINE))
+    parser.add_argument('--jit', action='store_true')
+    parser.add_argument('--memoize', nargs='?', type=int, const=DEFAULT_MEMO_SIZE, default=None, metavar='SIZE')
+
+    args = parser.parse_args(argv)
+    if args.isolate and sys.version_info < (3, 11):
+        parser.error('--isolate needs python 3.11 or later')
+    if args.jit and args.backend != 'tree':
+        parser.error('--jit needs the tree backend')
+
+    options = BatchOptions(args.backend, args.typecheck, args.passes if args.optimize else None, args.jit,
+                           args.memoize, args.timeout or None, Limits(args.max_steps, args.max_output, args.max_memory))
+    paths = find_programs(args.programs)
+    start = time.perf_counter()
+    results = open(args.results, 'w') if args.results is not None else sys.stdout
+    try:
+        counts = run_batch(paths, options, results, args.workers, args.isolate)
+    finally:
+        if results is not sys.stdout:
+            results.close()
+    summary = ', '.join(f'{count} {status}' for status, count in sorted(counts.items()))
+    print(f'{len(paths)} programs in {time.perf_counter() - start:.2f}s: {summary or "none run"}', file=sys.stderr)
+    return EXIT_OK if counts.get('ok', 0) == len(paths) else EXIT_ERROR
@@ -0,0 +1,239 @@
+# Compiles a program into flat bytecode for the vm file to run. The code is an array of (opcode, argument) pairs of
+# ints; arguments index into the constants, names and nodes tables kept alongside it, or are jump targets, which are
+# offsets of pairs in the code. Expressions leave their values on the vm's stack and instructions consume them.
+#
+# Nodes without their own opcodes are kept in the nodes table and run by the tree walker with EVALUATE or EXECUTE, so
+# every program can be compiled. Loop invariants are recomputed each time they are used.
+from array import array
+from typing import Optional
+
+from pseudocoder import interfaces
+from pseudocoder import operations
+from pseudocoder.instructions import VariableDeclaration, VariableAssignment, Output, ForLoop, WhileLoop, DoWhileLoop
+from pseudocoder.instructions import IfElse, InvariantScope
+from pseudocoder.namespaces import NameSpace
+from pseudocoder.operations import Identifier, IntegerLiteral, RealLiteral, BooleanLiteral, LoopInvariant
+from pseudocoder.visitor import NodeVisitor
+
+# LOAD_CONST         push constants[arg]
+# LOAD_NAME          push the value of the variable, or else the constant, names[arg]
+# STORE_NAME         pop a value into the variable names[arg]
+# DECLARE            pop a data type and declare the variable names[arg] with it
+# ADD ... DIVIDE     pop two numbers and push the result
+# GREATER ... OR     pop two values and push a BOOLEAN
+# OUTPUT             pop a value and write it out
+# JUMP               continue from arg
+# JUMP_IF_FALSE      pop a BOOLEAN, and continue from arg if it is false
+# JUMP_IF_TRUE       pop a BOOLEAN, and continue from arg if it is true
+# FOR_SETUP          pop the step, end and start of a FOR loop over names[arg], and push the variable's slot and an
+#                    iterator over the loop's values
+# FOR_ITER           store the iterator's next value in the slot under it and continue from arg, or once it has run
+#                    out pop both
+# EVALUATE           push the value of nodes[arg], worked out by the tree walker
+# EXECUTE            run nodes[arg] with the tree walker
+# RETURN             stop
+OPCODES = (
+    'LOAD_CONST', 'LOAD_NAME', 'STORE_NAME', 'DECLARE',
+    'ADD', 'SUBTRACT', 'MULTIPLY', 'DIVIDE',
+    'GREATER', 'LESS', 'GREATER_EQUAL', 'LESS_EQUAL', 'EQUAL', 'NOT_EQUAL', 'AND', 'OR',
+    'OUTPUT', 'JUMP', 'JUMP_IF_FALSE', 'JUMP_IF_TRUE', 'FOR_SETUP', 'FOR_ITER', 'EVALUATE', 'EXECUTE', 'RETURN',
+)
+(
+    LOAD_CONST, LOAD_NAME, STORE_NAME, DECLARE,
+    ADD, SUBTRACT, MULTIPLY, DIVIDE,
+    GREATER, LESS, GREATER_EQUAL, LESS_EQUAL, EQUAL, NOT_EQUAL, AND, OR,
+    OUTPUT, JUMP, JUMP_IF_FALSE, JUMP_IF_TRUE, FOR_SETUP, FOR_ITER, EVALUATE, EXECUTE, RETURN,
+) = range(len(OPCODES))
+
+BINARY_OPCODES = {
+    operations.Addition: ADD,
+    operations.Subtraction: SUBTRACT,
+    operations.Multiplication: MULTIPLY,
+    operations.Division: DIVIDE,
+    operations.GreaterThan: GREATER,
+    operations.LessThan: LESS,
+    operations.GreaterThanEqual: GREATER_EQUAL,
+    operations.LessThanEqual: LESS_EQUAL,
+    operations.Equal: EQUAL,
+    operations.NotEqual: NOT_EQUAL,
+    operations.And: AND,
+    operations.Or: OR,
+}
+
+JUMPS = (JUMP, JUMP_IF_FALSE, JUMP_IF_TRUE, FOR_ITER)
+
+
+class Bytecode:
+    def __init__(
+            self,
+            code: array,
+            constants: tuple[interfaces.data, ...],
+            names: tuple[str, ...],
+            nodes: tuple
+    ) -> None:
+        self.__code = code
+        self.__constants = constants
+        self.__names = names
+        self.__nodes = nodes
+
+    def get_code(self) -> array:
+        return self.__code
+
+    def get_constants(self) -> tuple[interfaces.data, ...]:
+        return self.__constants
+
+    def get_names(self) -> tuple[str, ...]:
+        return self.__names
+
+    def get_nodes(self) -> tuple:
+        return self.__nodes
+
+
+class BytecodeCompiler(NodeVisitor):
+    def __init__(self, namespace: NameSpace) -> None:
+        super(BytecodeCompiler, self).__init__()
+        self.__namespace = namespace
+        self.__code = array('l')
+        self.__constants: list[interfaces.data] = []
+        self.__names: list[str] = []
+        self.__name_indices: dict[str, int] = {}
+        self.__nodes: list = []
+
+    def get_bytecode(self) -> Bytecode:
+        return Bytecode(self.__code, tuple(self.__constants), tuple(self.__names), tuple(self.__nodes))
+
+    def emit(self, opcode: int, argument: int = 0) -> int:
+        self.__code.extend((opcode, argument))
+        return len(self.__code) // 2 - 1
+
+    def here(self) -> int:
+        return len(self.__code) // 2
+
+    def patch(self, offset: int, target: Optional[int] = None) -> None:
+        self.__code[offset * 2 + 1] = self.here() if target is None else target
+
+    def name(self, identifier: Identifier) -> int:
+        name = identifier.get_identifier()
+        if name not in self.__name_indices:
+            self.__name_indices[name] = len(self.__names)
+            self.__names.append(name)
+        return self.__name_indices[name]
+
+    def constant(self, type_name: str, value) -> int:
+        self.__constants.append(interfaces.evaluable.get_type(type_name, self.__namespace).from_python(value))
+        return len(self.__constants) - 1
+
+    def compile_block(self, instructions: tuple[interfaces.instruction, ...]) -> None:
+        for instruction in instructions:
+            self.visit(instruction)
+
+    def generic_visit(self, node) -> None:
+        self.__nodes.append(node)
+        self.emit(EVALUATE if isinstance(node, interfaces.evaluable) else EXECUTE, len(self.__nodes) - 1)
+
+    # operations
+
+    def visit_Identifier(self, node: Identifier) -> None:
+        self.emit(LOAD_NAME, self.name(node))
+
+    def visit_IntegerLiteral(self, node: IntegerLiteral) -> None:
+        self.emit(LOAD_CONST, self.constant('INTEGER', node.get_value()))
+
+    def visit_RealLiteral(self, node: RealLiteral) -> None:
+        self.emit(LOAD_CONST, self.constant('REAL', node.get_value()))
+
+    def visit_BooleanLiteral(self, node: BooleanLiteral) -> None:
+        self.emit(LOAD_CONST, self.constant('BOOLEAN', node.get_value()))
+
+    def visit_LoopInvariant(self, node: LoopInvariant) -> None:
+        self.visit(node.get_expression())
+
+    def visit_evaluable(self, node: interfaces.evaluable) -> None:
+        opcode = next((BINARY_OPCODES[cls] for cls in type(node).__mro__ if cls in BINARY_OPCODES), None)
+        if opcode is None:
+            return self.generic_visit(node)
+        for operand in node.get_operands():
+            self.visit(operand)
+        self.emit(opcode)
+
+    # instructions
+
+    def visit_VariableDeclaration(self, node: VariableDeclaration) -> None:
+        self.visit(node.get_type_expression())
+        self.emit(DECLARE, self.name(node.get_identifier()))
+
+    def visit_VariableAssignment(self, node: VariableAssignment) -> None:
+        self.visit(node.get_value())
+        self.emit(STORE_NAME, self.name(node.get_identifier()))
+
+    def visit_Output(self, node: Output) -> None:
+        self.visit(node.get_value())
+        self.emit(OUTPUT)
+
+    def visit_ForLoop(self, node: ForLoop) -> None:
+        for expression in node.get_range():
+            self.visit(expression)
+        # the test is at the bottom of the loop, so that each time round takes one jump rather than two
+        self.emit(FOR_SETUP, self.name(node.get_identifier()))
+        test_jump = self.emit(JUMP)
+        start = self.here()
+        self.compile_block(node.get_instructions())
+        self.patch(test_jump)
+        self.emit(FOR_ITER, start)
+
+    def visit_WhileLoop(self, node: WhileLoop) -> None:
+        start = self.here()
+        self.visit(node.get_condition())
+        exit_jump = self.emit(JUMP_IF_FALSE)
+        self.compile_block(node.get_instructions())
+        self.emit(JUMP, start)
+        self.patch(exit_jump)
+
+    def visit_DoWhileLoop(self, node: DoWhileLoop) -> None:
+        start = self.here()
+        self.compile_block(node.get_instructions())
+        self.visit(node.get_condition())
+        self.emit(JUMP_IF_TRUE, start)
+
+    def visit_IfElse(self, node: IfElse) -> None:
+        true_code, false_code = node.get_branches()
+        self.visit(node.get_condition())
+        else_jump = self.emit(JUMP_IF_FALSE)
+        self.compile_block(true_code)
+        if false_code:
+            end_jump = self.emit(JUMP)
+            self.patch(else_jump)
+            self.compile_block(false_code)
+            self.patch(end_jump)
+        else:
+            self.patch(else_jump)
+
+    def visit_InvariantScope(self, node: InvariantScope) -> None:
+        self.visit(node.get_loop())
+
+
+def compile_program(program: list[interfaces.instruction], namespace: NameSpace) -> Bytecode:
+    compiler = BytecodeCompiler(namespace)
+    compiler.compile_block(tuple(program))
+    compiler.emit(RETURN)
+    return compiler.get_bytecode()
+
+
+def disassemble(bytecode: Bytecode) -> str:
+    code = bytecode.get_code()
+    lines = []
+    for offset in range(len(code) // 2):
+        opcode, argument = code[offset * 2], code[offset * 2 + 1]
+        if opcode == LOAD_CONST:
+            detail = repr(bytecode.get_constants()[argument].to_python())
+        elif opcode in (LOAD_NAME, STORE_NAME, DECLARE, FOR_SETUP):
+            detail = bytecode.get_names()[argument]
+        elif opcode in (EVALUATE, EXECUTE):
+            detail = type(bytecode.get_nodes()[argument]).__name__
+        elif opcode in JUMPS:
+            detail = f'to {argument}'
+        else:
+            detail = ''
+        argument_text = str(argument) if detail else ''
+        lines.append(f'{offset:>6} {OPCODES[opcode]:<14} {argument_text:>4} {detail}'.rstrip())
+    return '\n'.join(lines)
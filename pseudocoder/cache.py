@@ -0,0 +1,118 @@
+# An on-disk cache of parsed programs. Entries are addressed by a hash of the source code and of the package itself, so
+# editing the grammar or any of the ast classes invalidates everything that was stored before. Loading an entry only
+# unpickles the ast classes, so a cache hit never has to import TatSu or build a parser.
+import hashlib
+import os
+import pickle
+from typing import Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pseudocoder.interfaces import instruction
+
+DEFAULT_CACHE_SIZE = 64 * 1024 * 1024  # bytes
+
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+_fingerprint: Optional[str] = None
+
+
+def default_cache_dir() -> str:
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'pseudocoder')
+
+
+def package_fingerprint() -> str:
+    # hashes every module in the package rather than a version number, as the version in setup.py is never bumped
+    global _fingerprint
+    if _fingerprint is None:
+        digest = hashlib.sha256()
+        for name in sorted(os.listdir(_PACKAGE_DIR)):
+            if name.endswith('.py'):
+                digest.update(name.encode())
+                with open(os.path.join(_PACKAGE_DIR, name), 'rb') as fh:
+                    digest.update(fh.read())
+        _fingerprint = digest.hexdigest()
+    return _fingerprint
+
+
+class ParseCache:
+    def __init__(self, directory: Optional[str] = None, max_size: Optional[int] = None) -> None:
+        self.__directory = directory if directory is not None else default_cache_dir()
+        self.__max_size = max_size if max_size is not None else DEFAULT_CACHE_SIZE
+
+    def get_directory(self) -> str:
+        return self.__directory
+
+    def key(self, code: str) -> str:
+        digest = hashlib.sha256(package_fingerprint().encode())
+        digest.update(code.encode())
+        return digest.hexdigest()
+
+    def __path(self, key: str) -> str:
+        return os.path.join(self.__directory, key + '.ast')
+
+    def load(self, code: str) -> 'Optional[list[instruction]]':
+        path = self.__path(self.key(code))
+        try:
+            with open(path, 'rb') as fh:
+                program = pickle.load(fh)
+        except FileNotFoundError:
+            return None
+        except Exception:  # a truncated or otherwise unreadable entry is treated as a miss and thrown away
+            self.__remove(path)
+            return None
+        try:
+            os.utime(path)  # the modification time doubles as the last access time for eviction
+        except OSError:
+            pass
+        return program
+
+    def store(self, code: str, program: 'list[instruction]') -> None:
+        try:
+            pickled = pickle.dumps(program, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, RecursionError):
+            return
+        if len(pickled) > self.__max_size:
+            return
+        os.makedirs(self.__directory, exist_ok=True)
+        path = self.__path(self.key(code))
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        with open(temp_path, 'wb') as fh:
+            fh.write(pickled)
+        os.replace(temp_path, path)  # atomic, so concurrent runners never see half an entry
+        self.__evict()
+
+    def clear(self) -> None:
+        for path, _, _ in self.__entries():
+            self.__remove(path)
+
+    def __entries(self) -> list[tuple[str, float, int]]:
+        try:
+            names = os.listdir(self.__directory)
+        except FileNotFoundError:
+            return []
+        entries = []
+        for name in names:
+            if name.endswith('.ast'):
+                path = os.path.join(self.__directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((path, stat.st_mtime, stat.st_size))
+        return entries
+
+    def __evict(self) -> None:
+        entries = sorted(self.__entries(), key=lambda entry: entry[1])
+        total = sum(size for _, _, size in entries)
+        for path, _, size in entries:
+            if total <= self.__max_size:
+                break
+            self.__remove(path)
+            total -= size
+
+    @staticmethod
+    def __remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
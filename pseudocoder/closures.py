@@ -0,0 +1,302 @@
+# The closure backend. Rather than walking the ast on every execution, the tree is compiled once into nested python
+# closures, one per node. Each closure has its children, the data types it needs and the namespace it runs in bound
+# when it is made, so running it involves no attribute lookups on nodes and no walks up the namespace chain for types.
+# Nodes that this file does not know how to compile are wrapped and run by the tree walker instead.
+import operator
+from typing import Any, Callable
+
+from pseudocoder import interfaces
+from pseudocoder.instructions import VariableDeclaration, VariableAssignment, Output, ForLoop, WhileLoop, DoWhileLoop
+from pseudocoder.instructions import IfElse, InvariantScope
+from pseudocoder.namespaces import NameSpace, Slot
+from pseudocoder.operations import Identifier, IntegerLiteral, RealLiteral, BooleanLiteral, LoopInvariant
+from pseudocoder.visitor import NodeVisitor
+
+Evaluator = Callable[[], interfaces.data]
+Executor = Callable[[], None]
+
+
+class ClosureCompiler(NodeVisitor):
+    def __init__(self, namespace: NameSpace) -> None:
+        super(ClosureCompiler, self).__init__()
+        self.__namespace = namespace
+        self.__invariants: dict[int, list] = {}
+
+    def get_type(self, type_name: str) -> interfaces.DataType:
+        return interfaces.evaluable.get_type(type_name, self.__namespace)
+
+    def compile_block(self, instructions: tuple[interfaces.instruction, ...]) -> Executor:
+        compiled = tuple(self.visit(instruction) for instruction in instructions)
+        if len(compiled) == 1:
+            return compiled[0]
+
+        def block() -> None:
+            for execute in compiled:
+                execute()
+        return block
+
+    def slot_reference(self, identifier: Identifier) -> Callable[[], Slot]:
+        # slots only exist once their DECLARE has run, so they are looked up on first use and then kept
+        namespace = self.__namespace
+        name = identifier.get_identifier()
+        cell: list[Slot] = []
+
+        def get_slot() -> Slot:
+            if not cell:
+                cell.append(namespace.lookup_variable(name))
+            return cell[0]
+        return get_slot
+
+    def invariant_cell(self, invariant: LoopInvariant) -> list:
+        # the one element list shared by a LoopInvariant and the InvariantScope that empties it
+        return self.__invariants.setdefault(id(invariant), [None])
+
+    def generic_visit(self, node) -> Callable:
+        namespace = self.__namespace
+        if isinstance(node, interfaces.evaluable):
+            return lambda: node.evaluate(namespace)
+
+        # a RETURN can only reach here outside of a function, as functions are run by the tree walker
+        def execute() -> None:
+            returned = node.execute(namespace, namespace)
+            if returned is not None:
+                raise interfaces.FunctionEnd(returned)
+        return execute
+
+    # operations
+
+    def visit_Identifier(self, node: Identifier) -> Evaluator:
+        namespace = self.__namespace
+        name = node.get_identifier()
+        cell: list[Slot] = []
+
+        def identifier() -> interfaces.data:
+            if cell:
+                return cell[0].get()
+            try:
+                cell.append(namespace.lookup_variable(name))
+            except AssertionError:  # not a variable, so a constant such as a type name
+                return namespace.lookup(name)
+            return cell[0].get()
+        return identifier
+
+    def visit_IntegerLiteral(self, node: IntegerLiteral) -> Evaluator:
+        value = self.get_type('INTEGER').from_python(node.get_value())
+        return lambda: value
+
+    def visit_RealLiteral(self, node: RealLiteral) -> Evaluator:
+        value = self.get_type('REAL').from_python(node.get_value())
+        return lambda: value
+
+    def visit_BooleanLiteral(self, node: BooleanLiteral) -> Evaluator:
+        value = self.get_type('BOOLEAN').from_python(node.get_value())
+        return lambda: value
+
+    def visit_LoopInvariant(self, node: LoopInvariant) -> Evaluator:
+        expression = self.visit(node.get_expression())
+        cell = self.invariant_cell(node)
+
+        def loop_invariant() -> interfaces.data:
+            if cell[0] is None:
+                cell[0] = expression()
+            return cell[0]
+        return loop_invariant
+
+    def arithmetic(self, node, function: Callable[[Any, Any], Any]) -> Evaluator:
+        a, b = (self.visit(operand) for operand in node.get_operands())
+        integer = self.get_type('INTEGER')
+        real = self.get_type('REAL')
+        number = interfaces.number
+
+        def arithmetic() -> interfaces.number:
+            x = a()
+            y = b()
+            assert isinstance(x, number)
+            assert isinstance(y, number)
+            c = function(x.to_python(), y.to_python())
+            if isinstance(c, float):
+                return real.from_python(c)
+            else:
+                return integer.from_python(c)
+        return arithmetic
+
+    def comparison(self, node, function: Callable[[Any, Any], bool], check: bool = True) -> Evaluator:
+        a, b = (self.visit(operand) for operand in node.get_operands())
+        boolean = self.get_type('BOOLEAN')
+        number = interfaces.number
+
+        def comparison() -> interfaces.data:
+            x = a()
+            y = b()
+            if check:
+                assert isinstance(x, number)
+                assert isinstance(y, number)
+            return boolean.from_python(function(x.to_python(), y.to_python()))
+        return comparison
+
+    def logical(self, node, function: Callable[[Any, Any], bool]) -> Evaluator:
+        a, b = (self.visit(operand) for operand in node.get_operands())
+        boolean = self.get_type('BOOLEAN')
+
+        def logical() -> interfaces.data:
+            x = a()
+            y = b()
+            assert boolean.is_type(x)
+            assert boolean.is_type(y)
+            return boolean.from_python(function(x.to_python(), y.to_python()))
+        return logical
+
+    def visit_Addition(self, node) -> Evaluator:
+        return self.arithmetic(node, operator.add)
+
+    def visit_Subtraction(self, node) -> Evaluator:
+        return self.arithmetic(node, operator.sub)
+
+    def visit_Multiplication(self, node) -> Evaluator:
+        return self.arithmetic(node, operator.mul)
+
+    def visit_Division(self, node) -> Evaluator:
+        a, b = (self.visit(operand) for operand in node.get_operands())
+        real = self.get_type('REAL')
+        number = interfaces.number
+
+        def division() -> interfaces.number:
+            x = a()
+            y = b()
+            assert isinstance(x, number)
+            assert isinstance(y, number)
+            return real.from_python(x.to_python() / y.to_python())
+        return division
+
+    def visit_GreaterThan(self, node) -> Evaluator:
+        return self.comparison(node, operator.gt)
+
+    def visit_LessThan(self, node) -> Evaluator:
+        return self.comparison(node, operator.lt)
+
+    def visit_GreaterThanEqual(self, node) -> Evaluator:
+        return self.comparison(node, operator.ge)
+
+    def visit_LessThanEqual(self, node) -> Evaluator:
+        return self.comparison(node, operator.le)
+
+    def visit_Equal(self, node) -> Evaluator:
+        return self.comparison(node, operator.eq)
+
+    def visit_NotEqual(self, node) -> Evaluator:
+        return self.comparison(node, operator.ne, check=False)
+
+    def visit_And(self, node) -> Evaluator:
+        return self.logical(node, lambda x, y: x and y)
+
+    def visit_Or(self, node) -> Evaluator:
+        return self.logical(node, lambda x, y: x or y)
+
+    # instructions
+
+    def visit_VariableDeclaration(self, node: VariableDeclaration) -> Executor:
+        namespace = self.__namespace
+        name = node.get_identifier().get_identifier()
+        data_type = self.visit(node.get_type_expression())
+
+        def declaration() -> None:
+            declared = data_type()
+            assert isinstance(declared, interfaces.DataType)
+            namespace.declare_variable(name, declared)
+        return declaration
+
+    def visit_VariableAssignment(self, node: VariableAssignment) -> Executor:
+        value = self.visit(node.get_value())
+        get_slot = self.slot_reference(node.get_identifier())
+
+        def assignment() -> None:
+            data_value = value()
+            get_slot().set(data_value)
+        return assignment
+
+    def visit_Output(self, node: Output) -> Executor:
+        value = self.visit(node.get_value())
+        write_line = self.__namespace.get_output().write_line
+
+        def output() -> None:
+            write_line(str(value().to_python()))
+        return output
+
+    def visit_ForLoop(self, node: ForLoop) -> Executor:
+        frm, to, step = (self.visit(expression) for expression in node.get_range())
+        body = self.compile_block(node.get_instructions())
+        get_slot = self.slot_reference(node.get_identifier())
+        integer = self.get_type('INTEGER')
+
+        def for_loop() -> None:
+            start = frm()
+            stop = to()
+            increment = step()
+            assert all(integer.is_type(x) for x in (start, stop, increment))
+            slot = get_slot()
+            box = integer.from_python
+            for x in range(start.to_python(), stop.to_python() + 1, increment.to_python()):
+                slot.set(box(x))
+                body()
+        return for_loop
+
+    def visit_WhileLoop(self, node: WhileLoop) -> Executor:
+        condition = self.visit(node.get_condition())
+        body = self.compile_block(node.get_instructions())
+        boolean = self.get_type('BOOLEAN')
+
+        def while_loop() -> None:
+            while True:
+                run = condition()
+                assert boolean.is_type(run)
+                if not run.to_python():
+                    break
+                body()
+        return while_loop
+
+    def visit_DoWhileLoop(self, node: DoWhileLoop) -> Executor:
+        condition = self.visit(node.get_condition())
+        body = self.compile_block(node.get_instructions())
+        boolean = self.get_type('BOOLEAN')
+
+        def do_while_loop() -> None:
+            while True:
+                body()
+                run = condition()
+                assert boolean.is_type(run)
+                if not run.to_python():
+                    break
+        return do_while_loop
+
+    def visit_IfElse(self, node: IfElse) -> Executor:
+        condition = self.visit(node.get_condition())
+        true_code, false_code = (self.compile_block(branch) for branch in node.get_branches())
+        boolean = self.get_type('BOOLEAN')
+
+        def if_else() -> None:
+            cond = condition()
+            assert boolean.is_type(cond)
+            if cond.to_python():
+                true_code()
+            else:
+                false_code()
+        return if_else
+
+    def visit_InvariantScope(self, node: InvariantScope) -> Executor:
+        cells = [self.invariant_cell(invariant) for invariant in node.get_invariants()]
+        loop = self.visit(node.get_loop())
+
+        def invariant_scope() -> None:
+            saved = [cell[0] for cell in cells]
+            for cell in cells:
+                cell[0] = None
+            try:
+                loop()
+            finally:
+                for cell, value in zip(cells, saved):
+                    cell[0] = value
+        return invariant_scope
+
+
+def compile_program(program: list[interfaces.instruction], namespace: NameSpace) -> Executor:
+    return ClosureCompiler(namespace).compile_block(tuple(program))
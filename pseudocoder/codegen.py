@@ -0,0 +1,234 @@
+# The python backend. A whole program is translated into a python function, with one local variable per pseudocode
+# variable, which is compiled with compile() and run. The translation works out the type of every expression from the
+# DECLARE statements, and refuses (by raising Untranslatable) anything it cannot prove would run the same way as the
+# tree walker, including anything the tree walker would reject with a failed assertion. The runner then falls back to
+# walking the tree, so those programs fail exactly as they always have.
+#
+# Values are kept as plain python ints, floats and bools. Integer arithmetic in the tree walker goes through
+# data.Integer, which rounds, but the operands and results of +, - and * on INTEGERs are already ints so the rounding
+# never changes anything; / always gives a REAL, as in operations.Division.
+import ast
+from typing import Callable
+
+from pseudocoder import interfaces
+from pseudocoder.instructions import VariableDeclaration, VariableAssignment, Output, ForLoop, IfElse, InvariantScope
+from pseudocoder.operations import Identifier, IntegerLiteral, RealLiteral, BooleanLiteral, LoopInvariant
+from pseudocoder.visitor import NodeVisitor
+
+INTEGER, REAL, BOOLEAN = 'INTEGER', 'REAL', 'BOOLEAN'
+NUMBERS = (INTEGER, REAL)
+
+FUNCTION_NAME = '__pseudocode__'
+OUTPUT_NAME = '__output__'  # the function OUTPUT lines are written with
+
+
+class Untranslatable(Exception):
+    pass
+
+
+def local_name(identifier: str) -> str:
+    # prefixed so that pseudocode variables can never shadow python builtins or keywords
+    return 'v_' + identifier
+
+
+def _load(name: str) -> ast.Name:
+    return ast.Name(id=name, ctx=ast.Load())
+
+
+def _store(name: str) -> ast.Name:
+    return ast.Name(id=name, ctx=ast.Store())
+
+
+def _call(function: str, *arguments: ast.expr) -> ast.Call:
+    return ast.Call(func=_load(function), args=list(arguments), keywords=[])
+
+
+class PythonTranslator(NodeVisitor):
+    def __init__(self) -> None:
+        super(PythonTranslator, self).__init__()
+        self.__types: dict[str, str] = {}
+        self.__loop_depth = 0
+        self.__branch_depth = 0
+
+    def generic_visit(self, node):
+        raise Untranslatable(f'{type(node).__name__} cannot be translated to python')
+
+    def get_variable_type(self, identifier: Identifier) -> str:
+        name = identifier.get_identifier()
+        if name not in self.__types:
+            raise Untranslatable(f'{name} is not a declared variable')
+        return self.__types[name]
+
+    def translate_block(self, instructions: tuple[interfaces.instruction, ...]) -> list[ast.stmt]:
+        statements = []
+        for instruction in instructions:
+            statements.extend(self.visit(instruction))
+        return statements or [ast.Pass()]
+
+    def translate_loop_body(self, instructions: tuple[interfaces.instruction, ...]) -> list[ast.stmt]:
+        self.__loop_depth += 1
+        try:
+            return self.translate_block(instructions)
+        finally:
+            self.__loop_depth -= 1
+
+    def translate_branch(self, instructions: tuple[interfaces.instruction, ...]) -> list[ast.stmt]:
+        self.__branch_depth += 1
+        try:
+            return self.translate_block(instructions)
+        finally:
+            self.__branch_depth -= 1
+
+    def translate_program(self, program: list[interfaces.instruction]) -> ast.Module:
+        module = ast.parse(f'def {FUNCTION_NAME}():\n    pass\n')
+        module.body[0].body = self.translate_block(tuple(program))
+        return ast.fix_missing_locations(module)
+
+    # operations: each returns the python expression and the name of its pseudocode type
+
+    def visit_Identifier(self, node: Identifier) -> tuple[ast.expr, str]:
+        return _load(local_name(node.get_identifier())), self.get_variable_type(node)
+
+    def visit_IntegerLiteral(self, node: IntegerLiteral) -> tuple[ast.expr, str]:
+        return ast.Constant(value=int(node.get_value())), INTEGER
+
+    def visit_RealLiteral(self, node: RealLiteral) -> tuple[ast.expr, str]:
+        return ast.Constant(value=float(node.get_value())), REAL
+
+    def visit_BooleanLiteral(self, node: BooleanLiteral) -> tuple[ast.expr, str]:
+        return ast.Constant(value=bool(node.get_value())), BOOLEAN
+
+    def visit_LoopInvariant(self, node: LoopInvariant) -> tuple[ast.expr, str]:
+        return self.visit(node.get_expression())  # recomputed each time; cheap once it is python
+
+    def translate_operands(self, node, allowed: tuple[str, ...]) -> tuple[ast.expr, str, ast.expr, str]:
+        (a, a_type), (b, b_type) = (self.visit(operand) for operand in node.get_operands())
+        if a_type not in allowed or b_type not in allowed:
+            raise Untranslatable(f'{type(node).__name__} of {a_type} and {b_type}')
+        return a, a_type, b, b_type
+
+    def arithmetic(self, node, op: ast.operator) -> tuple[ast.expr, str]:
+        a, a_type, b, b_type = self.translate_operands(node, NUMBERS)
+        result = INTEGER if a_type == INTEGER and b_type == INTEGER else REAL
+        return ast.BinOp(left=a, op=op, right=b), result
+
+    def comparison(self, node, op: ast.cmpop) -> tuple[ast.expr, str]:
+        a, _, b, _ = self.translate_operands(node, NUMBERS)
+        return ast.Compare(left=a, ops=[op], comparators=[b]), BOOLEAN
+
+    def logical(self, node, op: ast.operator) -> tuple[ast.expr, str]:
+        # the tree walker evaluates both sides of AND and OR, so bitwise operators are used to avoid short circuiting
+        a, _, b, _ = self.translate_operands(node, (BOOLEAN,))
+        return ast.BinOp(left=a, op=op, right=b), BOOLEAN
+
+    def visit_Addition(self, node) -> tuple[ast.expr, str]:
+        return self.arithmetic(node, ast.Add())
+
+    def visit_Subtraction(self, node) -> tuple[ast.expr, str]:
+        return self.arithmetic(node, ast.Sub())
+
+    def visit_Multiplication(self, node) -> tuple[ast.expr, str]:
+        return self.arithmetic(node, ast.Mult())
+
+    def visit_Division(self, node) -> tuple[ast.expr, str]:
+        a, _, b, _ = self.translate_operands(node, NUMBERS)
+        return ast.BinOp(left=a, op=ast.Div(), right=b), REAL
+
+    def visit_GreaterThan(self, node) -> tuple[ast.expr, str]:
+        return self.comparison(node, ast.Gt())
+
+    def visit_LessThan(self, node) -> tuple[ast.expr, str]:
+        return self.comparison(node, ast.Lt())
+
+    def visit_GreaterThanEqual(self, node) -> tuple[ast.expr, str]:
+        return self.comparison(node, ast.GtE())
+
+    def visit_LessThanEqual(self, node) -> tuple[ast.expr, str]:
+        return self.comparison(node, ast.LtE())
+
+    def visit_Equal(self, node) -> tuple[ast.expr, str]:
+        return self.comparison(node, ast.Eq())
+
+    def visit_NotEqual(self, node) -> tuple[ast.expr, str]:
+        return self.comparison(node, ast.NotEq())
+
+    def visit_And(self, node) -> tuple[ast.expr, str]:
+        return self.logical(node, ast.BitAnd())
+
+    def visit_Or(self, node) -> tuple[ast.expr, str]:
+        return self.logical(node, ast.BitOr())
+
+    # instructions: each returns a list of python statements
+
+    def visit_VariableDeclaration(self, node: VariableDeclaration) -> list[ast.stmt]:
+        name = node.get_identifier().get_identifier()
+        type_expression = node.get_type_expression()
+        if not isinstance(type_expression, Identifier) or type_expression.get_identifier() not in (INTEGER, REAL,
+                                                                                                  BOOLEAN):
+            raise Untranslatable(f'{name} is not declared with a builtin type')
+        if name in self.__types:
+            raise Untranslatable(f'{name} is declared more than once')
+        if self.__loop_depth:  # the second time round the loop the tree walker fails as the name is already defined
+            raise Untranslatable(f'{name} is declared inside a loop')
+        if self.__branch_depth:  # the name only exists once the branch has run, which is not known until it runs
+            raise Untranslatable(f'{name} is declared inside an IF')
+        self.__types[name] = type_expression.get_identifier()
+        return []
+
+    def visit_VariableAssignment(self, node: VariableAssignment) -> list[ast.stmt]:
+        target_type = self.get_variable_type(node.get_identifier())
+        value, value_type = self.visit(node.get_value())
+        if value_type != target_type:
+            raise Untranslatable(f'{value_type} assigned to a {target_type} variable')
+        return [ast.Assign(targets=[_store(local_name(node.get_identifier().get_identifier()))], value=value)]
+
+    def visit_Output(self, node: Output) -> list[ast.stmt]:
+        value, _ = self.visit(node.get_value())
+        return [ast.Expr(value=_call(OUTPUT_NAME, _call('str', value)))]
+
+    def visit_ForLoop(self, node: ForLoop) -> list[ast.stmt]:
+        if self.get_variable_type(node.get_identifier()) != INTEGER:
+            raise Untranslatable('FOR loop over a variable that is not an INTEGER')
+        bounds = []
+        for expression in node.get_range():
+            value, value_type = self.visit(expression)
+            if value_type != INTEGER:
+                raise Untranslatable('FOR loop bounds must be INTEGERs')
+            bounds.append(value)
+        frm, to, step = bounds
+        stop = ast.BinOp(left=to, op=ast.Add(), right=ast.Constant(value=1))
+        return [ast.For(
+            target=_store(local_name(node.get_identifier().get_identifier())),
+            iter=_call('range', frm, stop, step),
+            body=self.translate_loop_body(node.get_instructions()),
+            orelse=[],
+        )]
+
+    def visit_IfElse(self, node: IfElse) -> list[ast.stmt]:
+        condition, condition_type = self.visit(node.get_condition())
+        if condition_type != BOOLEAN:
+            raise Untranslatable('IF condition is not a BOOLEAN')
+        true_code, false_code = node.get_branches()
+        orelse = self.translate_branch(false_code) if false_code else []
+        return [ast.If(test=condition, body=self.translate_branch(true_code), orelse=orelse)]
+
+    def visit_InvariantScope(self, node: InvariantScope) -> list[ast.stmt]:
+        return self.visit(node.get_loop())
+
+
+def compile_program(
+        program: list[interfaces.instruction],
+        filename: str = '<pseudocode>',
+        write_line: Callable[[str], None] = print
+) -> Callable[[], None]:
+    module = PythonTranslator().translate_program(program)
+    scope: dict = {OUTPUT_NAME: write_line}
+    exec(compile(module, filename, 'exec'), scope)
+    function = scope[FUNCTION_NAME]
+
+    def run() -> None:
+        try:
+            function()
+        except NameError as e:  # a variable that was declared but never assigned, as in Slot.get
+            raise Exception('Not Yet Set') from e
+    return run
@@ -2,11 +2,16 @@
 from typing import Type, Any
 from pseudocoder import interfaces
 
+# integers in this range, which covers most loop counters and arithmetic, are made once and then shared
+SMALL_INTEGER_MIN = -256
+SMALL_INTEGER_MAX = 1024
+
 
 # for containing builtin data types
 class BuiltInDataType(interfaces.DataType):
     def __init__(self, data_type: Type[interfaces.data]):
         self.__data_type = data_type
+        self.__box = getattr(data_type, 'box', data_type)
 
     def is_type(self, *args) -> bool:
         if len(args) == 0:
@@ -15,10 +20,12 @@ class BuiltInDataType(interfaces.DataType):
             return isinstance(args[0], self.__data_type)
 
     def from_python(self, val) -> interfaces.data:
-        return self.__data_type(val)
+        return self.__box(val)
 
 
 class String(interfaces.data):
+    __slots__ = ('__string',)
+
     def __init__(self, string: str) -> None:
         self.__string = string
 
@@ -27,6 +34,8 @@ class String(interfaces.data):
 
 
 class Char(interfaces.data):
+    __slots__ = ('__char',)
+
     def __init__(self, char: str):
         assert len(char) == 1
         self.__char = char
@@ -36,24 +45,52 @@ class Char(interfaces.data):
 
 
 class Real(interfaces.number[float]):
+    __slots__ = ()
+
     def __init__(self, num) -> None:
         super(Real, self).__init__(float(num))
 
 
 class Integer(interfaces.number[int]):
+    __slots__ = ()
+
     def __init__(self, num) -> None:
         super(Integer, self).__init__(round(num))
 
+    @classmethod
+    def box(cls, num) -> 'Integer':
+        if type(num) is int and SMALL_INTEGER_MIN <= num < SMALL_INTEGER_MAX:
+            return SMALL_INTEGERS[num - SMALL_INTEGER_MIN]
+        return cls(num)
+
+
+SMALL_INTEGERS = tuple(Integer(i) for i in range(SMALL_INTEGER_MIN, SMALL_INTEGER_MAX))
+
 
 class Boolean(interfaces.data):
+    __slots__ = ('__truth',)
+
     def __init__(self, truth: bool):
         self.__truth = truth
 
     def to_python(self) -> bool:
         return self.__truth
 
+    @classmethod
+    def box(cls, truth: bool) -> 'Boolean':
+        if truth is True:
+            return TRUE
+        elif truth is False:
+            return FALSE
+        return cls(truth)
+
+
+TRUE, FALSE = Boolean(True), Boolean(False)
+
 
 class Date(interfaces.data):
+    __slots__ = ('__year', '__month', '__day')
+
     def __init__(self, year, month, day) -> None:
         assert 0 < day <= 31
         assert 0 < month <= 12
@@ -0,0 +1,80 @@
+# Prints an ast as indented s-expressions, one instruction per line, for looking at what the optimizer and other passes
+# have done to a program. Operations are printed on one line, e.g. (Addition (Identifier total) (IntegerLiteral 1)).
+from typing import Sequence
+
+from pseudocoder import interfaces
+from pseudocoder.visitor import NodeVisitor
+
+INDENT = '  '
+
+
+class TreeDumper(NodeVisitor):
+    def __init__(self) -> None:
+        super(TreeDumper, self).__init__()
+        self.__lines: list[str] = []
+        self.__depth = 0
+
+    def get_text(self) -> str:
+        return '\n'.join(self.__lines)
+
+    def line(self, text: str) -> None:
+        self.__lines.append(INDENT * self.__depth + text)
+
+    def block(self, header: str, *blocks: Sequence[interfaces.instruction]) -> None:
+        self.line('(' + header)
+        self.__depth += 1
+        for i, instructions in enumerate(blocks):
+            if i:
+                self.line(':else')
+            for instruction in instructions:
+                self.visit(instruction)
+        self.__depth -= 1
+        self.line(')')
+
+    def expression(self, node) -> str:
+        if hasattr(node, 'get_operands'):
+            return f'({type(node).__name__} ' + ' '.join(self.expression(x) for x in node.get_operands()) + ')'
+        elif hasattr(node, 'get_expression'):
+            return f'({type(node).__name__} {self.expression(node.get_expression())})'
+        elif hasattr(node, 'get_identifier'):
+            return f'({type(node).__name__} {node.get_identifier()})'
+        elif hasattr(node, 'get_value'):
+            return f'({type(node).__name__} {node.get_value()!r})'
+        else:
+            return f'({type(node).__name__})'
+
+    def generic_visit(self, node) -> None:
+        self.line(f'({type(node).__name__})')
+
+    def visit_VariableDeclaration(self, node) -> None:
+        name = node.get_identifier().get_identifier()
+        self.line(f'(VariableDeclaration {name} {self.expression(node.get_type_expression())})')
+
+    def visit_VariableAssignment(self, node) -> None:
+        name = node.get_identifier().get_identifier()
+        self.line(f'(VariableAssignment {name} {self.expression(node.get_value())})')
+
+    def visit_Output(self, node) -> None:
+        self.line(f'(Output {self.expression(node.get_value())})')
+
+    def visit_ForLoop(self, node) -> None:
+        bounds = ' '.join(self.expression(x) for x in node.get_range())
+        self.block(f'ForLoop {node.get_identifier().get_identifier()} {bounds}', node.get_instructions())
+
+    def visit_WhileLoop(self, node) -> None:
+        self.block(f'{type(node).__name__} {self.expression(node.get_condition())}', node.get_instructions())
+
+    def visit_IfElse(self, node) -> None:
+        true_code, false_code = node.get_branches()
+        blocks = (true_code, false_code) if false_code else (true_code,)
+        self.block(f'IfElse {self.expression(node.get_condition())}', *blocks)
+
+    def visit_InvariantScope(self, node) -> None:
+        self.block(f'InvariantScope {len(node.get_invariants())}', (node.get_loop(),))
+
+
+def dump_program(program: Sequence[interfaces.instruction]) -> str:
+    dumper = TreeDumper()
+    for instruction in program:
+        dumper.visit(instruction)
+    return dumper.get_text()
@@ -0,0 +1,206 @@
+# Tells listeners what a program does as it runs: each statement run, each call made, each time round a loop, each
+# line written, and how long parsing and running took. Nothing checks whether there are listeners as the program runs.
+# With none there is nothing to tell, and the program runs as it always has. With any, the program is rewritten before
+# it runs in the same way as for limits:
+# - every statement is wrapped in a StatementEvent
+# - every loop body starts with an IterationEvent
+# - every call is replaced by one that reports itself
+# - the output sink is wrapped by one that reports each line
+#
+# Statements, loops and calls are only reported by the tree walker. The other backends compile the program or, for the
+# stack machine, take it apart, and report only their output and timings, with the counts they cannot know as null.
+import json
+from typing import Optional, Sequence, TYPE_CHECKING
+
+from pseudocoder import interfaces
+from pseudocoder.instructions import ForLoop, WhileLoop, ProcedureCall
+from pseudocoder.operations import FunctionEvaluate
+from pseudocoder.output import OutputSink
+from pseudocoder.visitor import NodeTransformer
+
+if TYPE_CHECKING:
+    from pseudocoder.namespaces import NameSpace
+
+
+# a listener overrides the events it wants; the rest do nothing
+class Listener:
+    def on_statement(self, statement: interfaces.instruction) -> None:
+        pass
+
+    def on_call(self, name: str) -> None:
+        pass
+
+    def on_iteration(self, loop: interfaces.instruction) -> None:
+        pass
+
+    def on_output(self, line: str) -> None:
+        pass
+
+    # a phase is 'parse' or 'execute'
+    def on_phase(self, phase: str, seconds: float) -> None:
+        pass
+
+
+# tells each of several listeners of every event, in order
+class ListenerGroup(Listener):
+    def __init__(self, listeners: Sequence[Listener]) -> None:
+        self.__listeners = tuple(listeners)
+
+    def on_statement(self, statement: interfaces.instruction) -> None:
+        for listener in self.__listeners:
+            listener.on_statement(statement)
+
+    def on_call(self, name: str) -> None:
+        for listener in self.__listeners:
+            listener.on_call(name)
+
+    def on_iteration(self, loop: interfaces.instruction) -> None:
+        for listener in self.__listeners:
+            listener.on_iteration(loop)
+
+    def on_output(self, line: str) -> None:
+        for listener in self.__listeners:
+            listener.on_output(line)
+
+    def on_phase(self, phase: str, seconds: float) -> None:
+        for listener in self.__listeners:
+            listener.on_phase(phase, seconds)
+
+
+# counts_statements is False for the backends that only report their output and timings, so that the counts of
+# statements, calls and iterations they never report are given as None rather than as a misleading 0
+class CountersListener(Listener):
+    def __init__(self, counts_statements: bool = True) -> None:
+        self.counts_statements = counts_statements
+        self.statements = 0
+        self.calls = 0
+        self.iterations = 0
+        self.outputs = 0
+        self.output_bytes = 0
+        self.calls_by_name: dict[str, int] = {}
+        self.seconds: dict[str, float] = {}
+
+    def on_statement(self, statement: interfaces.instruction) -> None:
+        self.statements += 1
+
+    def on_call(self, name: str) -> None:
+        self.calls += 1
+        self.calls_by_name[name] = self.calls_by_name.get(name, 0) + 1
+
+    def on_iteration(self, loop: interfaces.instruction) -> None:
+        self.iterations += 1
+
+    def on_output(self, line: str) -> None:
+        self.outputs += 1
+        self.output_bytes += len(line.encode()) + 1
+
+    def on_phase(self, phase: str, seconds: float) -> None:
+        self.seconds[phase] = self.seconds.get(phase, 0.0) + seconds
+
+    def summary(self) -> dict:
+        counted = self.counts_statements
+        return {
+            'statements': self.statements if counted else None,
+            'calls': self.calls if counted else None,
+            'calls_by_name': dict(self.calls_by_name) if counted else None,
+            'loop_iterations': self.iterations if counted else None,
+            'outputs': self.outputs,
+            'output_bytes': self.output_bytes,
+            'parse_seconds': round(self.seconds.get('parse', 0.0), 6),
+            'execute_seconds': round(self.seconds.get('execute', 0.0), 6),
+        }
+
+    def describe(self) -> str:
+        return json.dumps(self.summary(), indent=2)
+
+
+class ListenedSink(OutputSink):
+    def __init__(self, sink: OutputSink, listener: Listener) -> None:
+        self.__sink = sink
+        self.__listener = listener
+
+    def write_line(self, line: str) -> None:
+        self.__listener.on_output(line)
+        self.__sink.write_line(line)
+
+    def flush(self) -> None:
+        self.__sink.flush()
+
+    def close(self) -> None:
+        self.__sink.close()
+
+
+class StatementEvent(interfaces.InstructionWrapper):
+    def __init__(self, instruction: interfaces.instruction, listener: Listener) -> None:
+        super(StatementEvent, self).__init__(instruction)
+        self.__listener = listener
+
+    def wrap(self, instruction: interfaces.instruction) -> 'StatementEvent':
+        return StatementEvent(instruction, self.__listener)
+
+    def execute(self, lookup_namespace: 'NameSpace', action_namespace: 'NameSpace') -> Optional[interfaces.data]:
+        self.__listener.on_statement(self._instruction)
+        return self._instruction.execute(lookup_namespace, action_namespace)
+
+
+class IterationEvent(interfaces.instruction):
+    def __init__(self, loop: interfaces.instruction, listener: Listener) -> None:
+        self.__loop = loop  # the loop as the parser made it, as the one that runs is only made after this
+        self.__listener = listener
+
+    def execute(self, lookup_namespace: 'NameSpace', action_namespace: 'NameSpace') -> None:
+        self.__listener.on_iteration(self.__loop)
+
+
+class ListenedFunctionEvaluate(FunctionEvaluate):
+    def __init__(self, listener: Listener, function_name: str, *arguments: interfaces.evaluable) -> None:
+        super(ListenedFunctionEvaluate, self).__init__(function_name, *arguments)
+        self.__listener = listener
+
+    def evaluate(self, namespace: 'NameSpace') -> interfaces.data:
+        self.__listener.on_call(self.get_name())
+        return super(ListenedFunctionEvaluate, self).evaluate(namespace)
+
+
+class ListenedProcedureCall(ProcedureCall):
+    def __init__(self, listener: Listener, procedure_name: str, *arguments: interfaces.evaluable) -> None:
+        super(ListenedProcedureCall, self).__init__(procedure_name, *arguments)
+        self.__listener = listener
+
+    def execute(self, lookup_namespace: 'NameSpace', action_namespace: 'NameSpace') -> None:
+        self.__listener.on_call(self.get_name())
+        super(ListenedProcedureCall, self).execute(lookup_namespace, action_namespace)
+
+
+class _Hooker(NodeTransformer):
+    def __init__(self, listener: Listener) -> None:
+        super(_Hooker, self).__init__()
+        self.__listener = listener
+
+    def visit(self, node):
+        transformed = super(_Hooker, self).visit(node)  # with every statement inside it wrapped
+        if isinstance(transformed, interfaces.instruction):
+            return StatementEvent(transformed, self.__listener)
+        return transformed
+
+    def counted(self, loop: interfaces.instruction) -> tuple[interfaces.instruction, ...]:
+        return (IterationEvent(loop, self.__listener),) + self.transform_block(loop.get_instructions())
+
+    def visit_ForLoop(self, node: ForLoop) -> ForLoop:
+        frm, to, step = (self.visit(expression) for expression in node.get_range())
+        return ForLoop(node.get_identifier(), frm, to, step, self.counted(node))
+
+    def visit_WhileLoop(self, node: WhileLoop) -> WhileLoop:
+        return type(node)(self.visit(node.get_condition()), self.counted(node))
+
+    def visit_FunctionEvaluate(self, node: FunctionEvaluate) -> ListenedFunctionEvaluate:
+        arguments = (self.visit(argument) for argument in node.get_arguments())
+        return ListenedFunctionEvaluate(self.__listener, node.get_name(), *arguments)
+
+    def visit_ProcedureCall(self, node: ProcedureCall) -> ListenedProcedureCall:
+        arguments = (self.visit(argument) for argument in node.get_arguments())
+        return ListenedProcedureCall(self.__listener, node.get_name(), *arguments)
+
+
+def make_listened(program: list[interfaces.instruction], listener: Listener) -> list[interfaces.instruction]:
+    return _Hooker(listener).transform_program(program)
@@ -0,0 +1,50 @@
+# Builds expression trees from the flat operand/operator runs matched by the grammar. Precedence is resolved here with
+# an operator precedence (shunting-yard) parser rather than in the grammar, so building a tree is a single linear pass
+# and never recurses, however long the expression.
+from typing import Sequence, Type
+
+from pseudocoder import interfaces
+from pseudocoder.operations import Addition, Subtraction, Multiplication, Division, And, Or
+from pseudocoder.operations import Equal, NotEqual, LessThan, GreaterThan, LessThanEqual, GreaterThanEqual
+
+# operator -> (binding power, operation). All of the binary operators are left associative.
+BINARY_OPERATORS: dict[str, tuple[int, Type[interfaces.evaluable]]] = {
+    'OR': (1, Or),
+    'AND': (2, And),
+    '=': (3, Equal),
+    '<>': (3, NotEqual),
+    '<': (3, LessThan),
+    '>': (3, GreaterThan),
+    '<=': (3, LessThanEqual),
+    '>=': (3, GreaterThanEqual),
+    '+': (4, Addition),
+    '-': (4, Subtraction),
+    '*': (5, Multiplication),
+    '/': (5, Division),
+}
+
+
+def build_expression(
+        first: interfaces.evaluable,
+        rest: Sequence[tuple[str, interfaces.evaluable]]
+) -> interfaces.evaluable:
+    operands: list[interfaces.evaluable] = [first]
+    operators: list[str] = []
+
+    def reduce() -> None:
+        b = operands.pop()
+        a = operands.pop()
+        operands.append(BINARY_OPERATORS[operators.pop()][1](a, b))
+
+    for operator, operand in rest:
+        power = BINARY_OPERATORS[operator][0]
+        # anything already on the stack that binds at least as tightly is complete, as the operators are left associative
+        while operators and BINARY_OPERATORS[operators[-1]][0] >= power:
+            reduce()
+        operators.append(operator)
+        operands.append(operand)
+
+    while operators:
+        reduce()
+
+    return operands[0]
@@ -0,0 +1,172 @@
+# Runs every program in a process of its own without paying to start one, as `python -m pseudocoder forkserver`. The
+# parent imports the parser, TatSu and every backend once, warms the parser up, and then forks a child for each program,
+# which starts with all of that already done and only has to parse and run. Whatever a child does to its memory stays
+# in the child, so a program that crashes, leaks or is killed cannot affect the next.
+#
+# A child sends the lines its program writes over one pipe and its result over another, and exits with the program's
+# exit code; the parent reads the child's peak memory from its rusage when it is reaped. Besides the time limit each
+# child keeps for itself, the parent gives it a cpu time limit a second longer, so that even a child stuck where no
+# signal handler can run is stopped by the operating system.
+#
+# Parsing is most of what is left for a child to do, so with a ParseCache a child loads a program it has seen before
+# rather than parsing it again. Forking needs a platform that has it, which windows does not.
+import argparse
+import gc
+import json
+import math
+import os
+import signal
+import sys
+import time
+from typing import Optional, Sequence
+
+from pseudocoder.batch import BatchOptions, ProgramTimeout, TimeLimit, describe_error, find_programs, make_result
+from pseudocoder.batch import run_parsed, DEFAULT_TIMEOUT, EXIT_OK, EXIT_ERROR, EXIT_TIMEOUT
+from pseudocoder.cache import ParseCache
+from pseudocoder.limits import Limits, maxrss_kb
+from pseudocoder.memo import DEFAULT_MEMO_SIZE
+from pseudocoder.optimizer import PASSES, DEFAULT_PIPELINE
+from pseudocoder.output import StreamSink, DEFAULT_BUFFER_LINES
+from pseudocoder.runner import BACKENDS, load_program
+
+# imported by the parent, so that no child has to; the backends import these lazily otherwise
+PRELOAD_MODULES = (
+    'pseudocoder.interpreter',
+    'pseudocoder.tatsu_gen',
+    'pseudocoder.closures',
+    'pseudocoder.codegen',
+    'pseudocoder.bytecode',
+    'pseudocoder.vm',
+    'pseudocoder.stackmachine',
+    'pseudocoder.jit',
+    'pseudocoder.unchecked',
+    'pseudocoder.limits',
+    'pseudocoder.typechecker',
+)
+
+
+def preload() -> None:
+    import importlib
+    for module in PRELOAD_MODULES:
+        importlib.import_module(module)
+    from pseudocoder.interpreter import parse_program
+    parse_program('DECLARE x : INTEGER\nx <- 1\nOUTPUT x\n')
+    # nothing the parent holds now is ever freed, so the collector can leave it alone rather than touch, and so copy,
+    # every page of it in each child
+    gc.collect()
+    gc.freeze()
+
+
+class ForkServer:
+    def __init__(self, options: BatchOptions, cache: Optional[ParseCache] = None) -> None:
+        if not hasattr(os, 'fork'):
+            raise RuntimeError('The fork server needs os.fork, which this platform does not have')
+        self.__options = options
+        self.__cache = cache
+        self.__started = False
+
+    def start(self) -> None:
+        if not self.__started:
+            preload()
+            self.__started = True
+
+    def run(self, path: str, code: str) -> dict:
+        self.start()
+        output_read, output_write = os.pipe()
+        result_read, result_write = os.pipe()
+        start = time.perf_counter()
+        pid = os.fork()
+        if pid == 0:
+            try:
+                os.close(output_read)
+                os.close(result_read)
+                self.__child(path, code, output_write, result_write)
+            finally:
+                os._exit(EXIT_ERROR)  # a child must never go back to the parent's code
+        os.close(output_write)
+        os.close(result_write)
+        with os.fdopen(output_read, 'rb') as fh:
+            stdout = fh.read().decode(errors='replace')
+        with os.fdopen(result_read, 'rb') as fh:
+            reported = fh.read()
+        _, wait_status, usage = os.wait4(pid, 0)
+        seconds = time.perf_counter() - start
+        if reported:
+            status, exit_code, error, limit = json.loads(reported)
+        elif os.WIFSIGNALED(wait_status):
+            signum = os.WTERMSIG(wait_status)
+            status, exit_code, limit = 'error', EXIT_ERROR, None
+            if signum == signal.SIGXCPU:
+                status, exit_code = 'timeout', EXIT_TIMEOUT
+            error = f'Killed by {signal.Signals(signum).name}'
+        else:
+            status, exit_code, error, limit = 'error', EXIT_ERROR, 'Exited without a result', None
+        result = make_result(path, status, exit_code, stdout, error, seconds, limit)
+        result['peak_memory_kb'] = maxrss_kb(usage.ru_maxrss)
+        return result
+
+    # runs in the child, and sends the parent what happened as JSON
+    def __child(self, path: str, code: str, output_write: int, result_write: int) -> None:
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        options = self.__options
+        if options.timeout is not None:
+            import resource
+            seconds = math.ceil(options.timeout) + 1
+            resource.setrlimit(resource.RLIMIT_CPU, (seconds, seconds + 1))
+        output = StreamSink(os.fdopen(output_write, 'w'), DEFAULT_BUFFER_LINES)
+        try:
+            with TimeLimit(options.timeout):
+                program = load_program(code, path, self.__cache)
+        except ProgramTimeout as e:
+            reported = ('parse-error', EXIT_TIMEOUT, str(e), None)
+        except Exception as e:
+            reported = ('parse-error', EXIT_ERROR, describe_error(e), None)
+        else:
+            reported = run_parsed(program, options, output)
+        output.close()
+        with os.fdopen(result_write, 'w') as fh:
+            fh.write(json.dumps(reported))
+        os._exit(reported[1])
+
+
+def main(argv: Sequence[str]) -> int:
+    parser = argparse.ArgumentParser(prog='pseudocoder forkserver')
+
+    parser.add_argument('programs', nargs='+',
+                        help='Pseudocode files to run, directories to run every .pseudo file under, or manifests')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT,
+                        help='Seconds each program may take to parse, and then to run; 0 for no limit')
+    parser.add_argument('--max-steps', type=int, default=None, help='Steps each program may take')
+    parser.add_argument('--max-output', type=int, default=None, help='Bytes of output each program may write')
+    parser.add_argument('--max-memory', type=int, default=None, help='Kilobytes of memory each program may reach')
+    parser.add_argument('--backend', choices=sorted(BACKENDS), default='tree')
+    parser.add_argument('--typecheck', action='store_true')
+    parser.add_argument('--optimize', action='store_true')
+    parser.add_argument('--passes', nargs='+', choices=list(PASSES), default=list(DEFAULT_PIPELINE))
+    parser.add_argument('--jit', action='store_true')
+    parser.add_argument('--memoize', nargs='?', type=int, const=DEFAULT_MEMO_SIZE, default=None, metavar='SIZE')
+    parser.add_argument('--cache', action='store_true', help='Reuse parsed programs stored on disk from previous runs')
+    parser.add_argument('--cache-dir', default=None, help='Directory for the parse cache')
+
+    args = parser.parse_args(argv)
+
+    options = BatchOptions(args.backend, args.typecheck, args.passes if args.optimize else None, args.jit,
+                           args.memoize, args.timeout or None, Limits(args.max_steps, args.max_output, args.max_memory))
+    paths: list[str] = []
+    for program in args.programs:
+        paths.extend([program] if program.endswith('.pseudo') else find_programs(program))
+    server = ForkServer(options, ParseCache(args.cache_dir) if args.cache else None)
+    start = time.perf_counter()
+    failed = 0
+    for path in paths:
+        try:
+            with open(path, 'r') as fh:
+                code = fh.read()
+        except (OSError, UnicodeDecodeError) as e:
+            result = make_result(path, 'error', EXIT_ERROR, '', describe_error(e), 0.0)
+        else:
+            result = server.run(path, code)
+        failed += result['status'] != 'ok'
+        print(json.dumps(result), flush=True)
+    print(f'{len(paths)} programs in {time.perf_counter() - start:.2f}s, {failed} not ok', file=sys.stderr)
+    return EXIT_OK if not failed else EXIT_ERROR
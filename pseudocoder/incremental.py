@@ -0,0 +1,149 @@
+# Parses a program again after an edit, parsing only the top level statements the edit changed, for editors that parse
+# on every keystroke and for `python -m pseudocoder --watch`. The source is split into its top level statements in the
+# same way as when streaming: a whole IF ... ENDIF or FOR ... ENDFOR, or a single statement, each with any blank lines
+# after it. Splitting is only a scan of the lines, and it is parsing that takes the time. After an edit, each statement
+# whose text is the same as one before it keeps the instructions parsed from it, moved to the lines it is now on, and
+# only the rest are parsed.
+#
+# The instructions kept are the same objects, so a ParsedSource gives its instructions up to the one made from it, and
+# should not be used once it has been edited. The resolver binds the names in the instructions it is given, which it
+# does again for the whole program before every run, so nothing that depends on the statements around it is kept.
+import os
+import sys
+import time
+from typing import Callable, Optional
+
+from pseudocoder import interfaces
+from pseudocoder.stream import ChunkParseError, split_statements, shift_positions
+
+WATCH_INTERVAL = 0.25  # seconds between looking at the file
+
+
+# replaces the text from start up to end, as offsets in the old source, with text
+class TextEdit:
+    def __init__(self, start: int, end: int, text: str) -> None:
+        self.start = start
+        self.end = end
+        self.text = text
+
+    def apply(self, source: str) -> str:
+        assert 0 <= self.start <= self.end <= len(source), f'The edit {self.start}:{self.end} is outside the source'
+        return source[:self.start] + self.text + source[self.end:]
+
+
+# the edit that turns one source into another, for when only the text after is known, such as a file saved again
+def find_edit(old: str, new: str) -> TextEdit:
+    start = 0
+    limit = min(len(old), len(new))
+    while start < limit and old[start] == new[start]:
+        start += 1
+    end = 0
+    while end < limit - start and old[-1 - end] == new[-1 - end]:
+        end += 1
+    return TextEdit(start, len(old) - end, new[start:len(new) - end])
+
+
+class Block:
+    def __init__(self, first_line: int, text: str, instructions: list[interfaces.instruction]) -> None:
+        self.first_line = first_line
+        self.text = text
+        self.instructions = instructions
+
+
+class ParsedSource:
+    def __init__(self, source: str, blocks: list[Block], reparsed: int, filename: Optional[str] = None) -> None:
+        self.__source = source
+        self.__blocks = blocks
+        self.__reparsed = reparsed
+        self.__filename = filename
+
+    def get_source(self) -> str:
+        return self.__source
+
+    def get_blocks(self) -> list[Block]:
+        return self.__blocks
+
+    # how many of the blocks had to be parsed to make this
+    def get_reparsed(self) -> int:
+        return self.__reparsed
+
+    def get_filename(self) -> Optional[str]:
+        return self.__filename
+
+    def get_program(self) -> list[interfaces.instruction]:
+        return [instruction for block in self.__blocks for instruction in block.instructions]
+
+
+def _parse_block(first_line: int, text: str, filename: Optional[str]) -> list[interfaces.instruction]:
+    from pseudocoder.interpreter import parse_program
+    if not text.strip():
+        return []
+    try:
+        instructions = parse_program(text, filename)
+    except Exception as e:
+        raise ChunkParseError(first_line, e) from e
+    shift_positions(instructions, first_line - 1)
+    return instructions
+
+
+def _split(source: str) -> list[tuple[int, str]]:
+    return list(split_statements(source.splitlines(keepends=True), 1))
+
+
+def parse_incremental(source: str, filename: Optional[str] = None) -> ParsedSource:
+    blocks = [Block(first_line, text, _parse_block(first_line, text, filename)) for first_line, text in _split(source)]
+    return ParsedSource(source, blocks, len(blocks), filename)
+
+
+def reparse(previous: ParsedSource, edit: TextEdit) -> ParsedSource:
+    source = edit.apply(previous.get_source())
+    filename = previous.get_filename()
+    unchanged: dict[str, list[Block]] = {}
+    for block in reversed(previous.get_blocks()):
+        unchanged.setdefault(block.text, []).append(block)  # reversed, so that each list pops in the order of the source
+    blocks = []
+    reparsed = 0
+    for first_line, text in _split(source):
+        kept = unchanged.get(text)
+        if kept:
+            block = kept.pop()
+            if block.first_line != first_line:
+                shift_positions(block.instructions, first_line - block.first_line)
+                block.first_line = first_line
+        else:
+            block = Block(first_line, text, _parse_block(first_line, text, filename))
+            reparsed += 1
+        blocks.append(block)
+    return ParsedSource(source, blocks, reparsed, filename)
+
+
+# runs the program in a file, then again each time the file changes, until interrupted. Errors in parsing or running it
+# are reported and it waits for the next change; after one that could not be parsed, what it keeps is from the last
+# version that could.
+def watch(file: str, execute: Callable[[list[interfaces.instruction]], None], interval: float = WATCH_INTERVAL) -> None:
+    parsed: Optional[ParsedSource] = None
+    seen = None
+    try:
+        while True:
+            try:
+                stat = os.stat(file)
+            except FileNotFoundError:
+                stat = None  # being saved by an editor that replaces the file, so look again
+            if stat is not None and (stat.st_mtime_ns, stat.st_size) != seen:
+                seen = (stat.st_mtime_ns, stat.st_size)
+                with open(file, 'r') as fh:
+                    source = fh.read()
+                try:
+                    start = time.perf_counter()
+                    if parsed is None:
+                        parsed = parse_incremental(source, file)
+                    else:
+                        parsed = reparse(parsed, find_edit(parsed.get_source(), source))
+                    print(f'-- {file}: parsed {parsed.get_reparsed()} of {len(parsed.get_blocks())} statements in '
+                          f'{(time.perf_counter() - start) * 1000:.1f} ms', file=sys.stderr)
+                    execute(parsed.get_program())
+                except Exception as e:
+                    print(f'{file}: {e}', file=sys.stderr)
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
@@ -1,11 +1,11 @@
 # Contains all the instruction: things that are run to get a value, and not executed to get a result.
 from pseudocoder import interfaces
 from pseudocoder import data
-from typing import TYPE_CHECKING
+from typing import Optional, TYPE_CHECKING
 
-from pseudocoder.interfaces import FunctionEnd, evaluable
+from pseudocoder.interfaces import evaluable
 from pseudocoder.namespaces import NameSpace
-from pseudocoder.operations import Identifier
+from pseudocoder.operations import Identifier, LoopInvariant
 
 if TYPE_CHECKING:
     pass
@@ -16,10 +16,17 @@ class ProcedureCall(interfaces.instruction):
         self.__name = procedure_name
         self.__args = arguments
 
+    def get_name(self) -> str:
+        return self.__name
+
+    def get_arguments(self) -> tuple:
+        return self.__args
+
     def execute(self, lookup_namespace: 'NameSpace', action_namespace: 'NameSpace') -> None:
         procedure = lookup_namespace.lookup(self.__name)
-        assert isinstance(procedure, interfaces.Function)
-        return procedure.run(lookup_namespace, *self.__args)
+        assert isinstance(procedure, interfaces.Procedure)
+        # a RETURN inside the procedure ends only the procedure
+        procedure.run(lookup_namespace, *self.__args)
 
 
 class VariableDeclaration(interfaces.instruction):
@@ -27,6 +34,12 @@ class VariableDeclaration(interfaces.instruction):
         self.__id = identifier
         self.__type = type_identifier
 
+    def get_identifier(self) -> Identifier:
+        return self.__id
+
+    def get_type_expression(self) -> evaluable:
+        return self.__type
+
     def execute(self, lookup_namespace: 'NameSpace', action_namespace: 'NameSpace') -> None:
         data_type = self.__type.evaluate(lookup_namespace)
         assert isinstance(data_type, interfaces.DataType)
@@ -40,6 +53,15 @@ class ConstantDeclaration(interfaces.instruction):
         self.__type = type_identifier
         self.__value = value
 
+    def get_identifier(self) -> str:
+        return self.__id
+
+    def get_type_name(self) -> str:
+        return self.__type
+
+    def get_value(self) -> interfaces.evaluable:
+        return self.__value
+
     def execute(self, lookup_namespace: 'NameSpace', action_namespace: 'NameSpace') -> None:
         data_type = lookup_namespace.lookup(self.__type)
         assert isinstance(data_type, interfaces.DataType)
@@ -68,9 +90,15 @@ class VariableAssignment(interfaces.instruction):
         self.__id = identifier
         self.__value = value
 
+    def get_identifier(self) -> Identifier:
+        return self.__id
+
+    def get_value(self) -> interfaces.evaluable:
+        return self.__value
+
     def execute(self, lookup_namespace: 'NameSpace', action_namespace: 'NameSpace') -> None:
         data_value = self.__value.evaluate(lookup_namespace)
-        slot = action_namespace.lookup_variable(self.__id.get_identifier())
+        slot = self.__id.get_slot(action_namespace)
         slot.set(data_value)
 
 
@@ -78,9 +106,11 @@ class FunctionReturn(interfaces.instruction):
     def __init__(self, returned: interfaces.evaluable):
         self.__value = returned
 
-    def execute(self, lookup_namespace: 'NameSpace', action_namespace: 'NameSpace') -> None:
-        data_value = self.__value.evaluate(lookup_namespace)
-        raise FunctionEnd(data_value)
+    def get_value(self) -> interfaces.evaluable:
+        return self.__value
+
+    def execute(self, lookup_namespace: 'NameSpace', action_namespace: 'NameSpace') -> interfaces.data:
+        return self.__value.evaluate(lookup_namespace)
 
 
 class Input(interfaces.instruction): # TODO
@@ -92,9 +122,12 @@ class Output(interfaces.instruction):
     def __init__(self, output: interfaces.evaluable):
         self.__out = output
 
+    def get_value(self) -> interfaces.evaluable:
+        return self.__out
+
     def execute(self, lookup_namespace: 'NameSpace', action_namespace: 'NameSpace') -> None:
         data_value = self.__out.evaluate(lookup_namespace)
-        print(str(data_value.to_python()))
+        lookup_namespace.get_output().write_line(str(data_value.to_python()))
 
 
 class ForLoop(interfaces.instruction):
@@ -111,18 +144,53 @@ class ForLoop(interfaces.instruction):
         self.__id = identifier
         self.__step = step_expression
 
-    def execute(self, lookup_namespace: 'NameSpace', action_namespace: 'NameSpace') -> None:
+    def get_identifier(self) -> Identifier:
+        return self.__id
+
+    def get_range(self) -> tuple[interfaces.evaluable, interfaces.evaluable, interfaces.evaluable]:
+        return self.__from, self.__to, self.__step
+
+    def get_instructions(self) -> tuple[interfaces.instruction, ...]:
+        return self.__instructions
+
+    def execute(self, lookup_namespace: 'NameSpace', action_namespace: 'NameSpace') -> Optional[interfaces.data]:
         frm = self.__from.evaluate(lookup_namespace)
         to = self.__to.evaluate(lookup_namespace)
         step = self.__step.evaluate(lookup_namespace)
         integer = lookup_namespace.lookup('INTEGER')
         assert isinstance(integer, interfaces.DataType)
         assert all(integer.is_type(x) for x in (frm, to, step))
-        slot = action_namespace.lookup_variable(self.__id.get_identifier())
+        slot = self.__id.get_slot(action_namespace)
         for x in range(frm.to_python(), to.to_python() + 1, step.to_python()):
             slot.set(integer.from_python(x))
             for instruction in self.__instructions:
-                instruction.execute(lookup_namespace, action_namespace)
+                returned = instruction.execute(lookup_namespace, action_namespace)
+                if returned is not None:
+                    return returned
+        return None
+
+
+# Runs a loop whose invariant expressions have been hoisted by the optimizer. The invariants are emptied each time the
+# loop starts, and what they held before is put back afterwards, so a loop that is re-entered before it finishes (by a
+# recursive call) cannot see the values of another run of it.
+class InvariantScope(interfaces.instruction):
+    def __init__(self, loop: interfaces.instruction, invariants: tuple[LoopInvariant, ...]) -> None:
+        self.__loop = loop
+        self.__invariants = invariants
+
+    def get_loop(self) -> interfaces.instruction:
+        return self.__loop
+
+    def get_invariants(self) -> tuple[LoopInvariant, ...]:
+        return self.__invariants
+
+    def execute(self, lookup_namespace: 'NameSpace', action_namespace: 'NameSpace') -> Optional[interfaces.data]:
+        saved = [invariant.reset() for invariant in self.__invariants]
+        try:
+            return self.__loop.execute(lookup_namespace, action_namespace)
+        finally:
+            for invariant, value in zip(self.__invariants, saved):
+                invariant.restore(value)
 
 
 class WhileLoop(interfaces.instruction):
@@ -130,26 +198,37 @@ class WhileLoop(interfaces.instruction):
         self.__condition = condition
         self.__instructions = instructions
 
-    def execute(self, lookup_namespace: 'NameSpace', action_namespace: 'NameSpace') -> None:
+    def get_condition(self) -> interfaces.evaluable:
+        return self.__condition
+
+    def get_instructions(self) -> tuple[interfaces.instruction, ...]:
+        return self.__instructions
+
+    def execute(self, lookup_namespace: 'NameSpace', action_namespace: 'NameSpace') -> Optional[interfaces.data]:
         while True:
             run = self.__condition.evaluate(lookup_namespace)
             assert isinstance(run, data.Boolean)
             if run.to_python():
                 for instruction in self.__instructions:
-                    instruction.execute(lookup_namespace, action_namespace)
+                    returned = instruction.execute(lookup_namespace, action_namespace)
+                    if returned is not None:
+                        return returned
             else:
-                break
+                return None
 
 
 class DoWhileLoop(WhileLoop):
-    def execute(self, lookup_namespace: 'NameSpace', action_namespace: 'NameSpace') -> None:
+    def execute(self, lookup_namespace: 'NameSpace', action_namespace: 'NameSpace') -> Optional[interfaces.data]:
+        # the condition and body are private to WhileLoop, so are reached through its accessors
         while True:
-            for instruction in self.__instructions:
-                instruction.execute(lookup_namespace, action_namespace)
-            run = self.__condition.evaluate(lookup_namespace)
+            for instruction in self.get_instructions():
+                returned = instruction.execute(lookup_namespace, action_namespace)
+                if returned is not None:
+                    return returned
+            run = self.get_condition().evaluate(lookup_namespace)
             assert isinstance(run, data.Boolean)
             if not run.to_python():
-                break
+                return None
 
 
 class IfElse(interfaces.instruction):
@@ -162,8 +241,17 @@ class IfElse(interfaces.instruction):
         self.__condition = condition
         self.__code = {True: true_code, False: false_code}
 
-    def execute(self, lookup_namespace: 'NameSpace', action_namespace: 'NameSpace') -> None:
+    def get_condition(self) -> interfaces.evaluable:
+        return self.__condition
+
+    def get_branches(self) -> tuple[tuple[interfaces.instruction, ...], tuple[interfaces.instruction, ...]]:
+        return self.__code[True], self.__code[False]
+
+    def execute(self, lookup_namespace: 'NameSpace', action_namespace: 'NameSpace') -> Optional[interfaces.data]:
         cond = self.__condition.evaluate(lookup_namespace)
         assert isinstance(cond, data.Boolean)
         for instruction in self.__code[cond.to_python()]:
-            instruction.execute(lookup_namespace, action_namespace)
+            returned = instruction.execute(lookup_namespace, action_namespace)
+            if returned is not None:
+                return returned
+        return None
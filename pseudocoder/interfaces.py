@@ -3,18 +3,27 @@ from __future__ import annotations
 # for type hinting. This is the 'root' python file in that it is imported by nearly ever other python file,
 # and itself imports none of them.
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING, Any, Generic, TypeVar
+from typing import TYPE_CHECKING, Any, Generic, Optional, TypeVar
 
 if TYPE_CHECKING:
     from namespaces import Parameters, FunctionNameSpace, NameSpace
 
 
+# execute returns None, or once a RETURN has run, the value it returned. Every instruction that runs a block of others
+# stops and hands that value back as soon as it gets one, until it reaches the function being called, so that returning
+# needs no exception to be raised and caught.
+# position is the line and column, counted from 1, where the parser found the instruction in the source, for reporting
+# on the program in its own terms; the passes that rebuild an instruction hand its position on to the new one.
 class instruction(ABC):
+    position: Optional[tuple[int, int]] = None
+
     @abstractmethod
-    def execute(self, lookup_namespace: 'NameSpace', action_namespace: 'NameSpace') -> None: ...
+    def execute(self, lookup_namespace: 'NameSpace', action_namespace: 'NameSpace') -> 'Optional[data]': ...
 
 
 class data(ABC):
+    __slots__ = ()
+
     @abstractmethod
     def __init__(self, val: Any): raise NotImplementedError()
 
@@ -26,6 +35,8 @@ N = TypeVar('N', int, float)
 
 
 class number(data, Generic[N]):
+    __slots__ = ('__num',)
+
     def __init__(self, num: N):
         self.__num = num
 
@@ -45,9 +56,23 @@ class evaluable(ABC):
         return type_obj
 
 
+# an instruction that runs another, and only watches it, such as to time it; the passes that rebuild the tree see
+# through it to the instruction inside, and wrap whatever that becomes in the same way
+class InstructionWrapper(instruction):
+    def __init__(self, instruction: instruction) -> None:
+        self._instruction = instruction
+        self.position = instruction.position
+
+    def get_instruction(self) -> instruction:
+        return self._instruction
+
+    @abstractmethod
+    def wrap(self, instruction: instruction) -> InstructionWrapper: ...
+
+
 class FunctionEnd(Exception):
     def __init__(self, value: data) -> None:
-        self.value = data
+        self.value = value
         super(FunctionEnd, self).__init__("The RETURN keyword was invoked outside of a function")
 
 
@@ -71,15 +96,40 @@ class Procedure(data):
             instructions: tuple[instruction, ...],
             parent: 'NameSpace'
     ) -> None:
+        # imported here, as this file imports no others when it is loaded
+        from pseudocoder.namespaces import FramePool
         self.__params = params
         self.__instructions = instructions
         self.__parent = parent
+        self.__frames = FramePool(params, parent)
 
-    def run(self, namespace: 'NameSpace', *arguments: evaluable):
-        proc_namespace = FunctionNameSpace(self.__parent)
-        self.__params.pass_parameters(arguments, namespace, proc_namespace)
-        for instruction in self.__instructions:
-            instruction.execute(proc_namespace, proc_namespace)
+    def get_parameters(self) -> 'Parameters':
+        return self.__params
+
+    def get_instructions(self) -> tuple[instruction, ...]:
+        return self.__instructions
+
+    def get_parent(self) -> 'NameSpace':
+        return self.__parent
+
+    # the namespace for a call, with the arguments bound to the parameters; it must be given back to close_frame
+    def open_frame(self, namespace: 'NameSpace', *arguments: evaluable) -> 'FunctionNameSpace':
+        return self.__frames.acquire(arguments, namespace)
+
+    def close_frame(self, frame: 'FunctionNameSpace') -> None:
+        self.__frames.release(frame)
+
+    # returns the value of the RETURN that ended the call, if any
+    def run(self, namespace: 'NameSpace', *arguments: evaluable) -> Optional[data]:
+        frame = self.open_frame(namespace, *arguments)
+        try:
+            for instruction in self.__instructions:
+                returned = instruction.execute(frame, frame)
+                if returned is not None:
+                    return returned
+            return None
+        finally:
+            self.close_frame(frame)
 
 
 class Function(Procedure):
@@ -96,11 +146,12 @@ class Function(Procedure):
         super(Function, self).__init__(params, instructions, parent)
         self.__return_type = return_type
 
-    def run(self, namespace: 'NameSpace', *arguments: evaluable):
-        try:
-            super(Function, self).run(namespace, *arguments)
-        except FunctionEnd as e:
-            assert self.__return_type.is_type(e.value)
-            return e.value
-        else:
+    def get_return_type(self) -> DataType:
+        return self.__return_type
+
+    def run(self, namespace: 'NameSpace', *arguments: evaluable) -> data:
+        returned = super(Function, self).run(namespace, *arguments)
+        if returned is None:
             raise Exception("Function failed to return")
+        assert self.__return_type.is_type(returned)
+        return returned
@@ -1,13 +1,36 @@
 # contains custom semantic analysis code
 
-from pseudocoder.tatsu_gen import PseudoCodeSemantics, PseudoCodeParser, KEYWORDS
+from typing import Optional
+
+from pseudocoder.tatsu_gen import PseudoCodeParser, KEYWORDS
 from pseudocoder.interfaces import instruction, evaluable
-from pseudocoder.operations import Identifier, IntegerLiteral, RealLiteral, Multiplication, Division, Addition
-from pseudocoder.operations import Subtraction, Equal, NotEqual, LessThanEqual, GreaterThanEqual, LessThan, GreaterThan
+from pseudocoder.operations import Identifier, IntegerLiteral, RealLiteral
+from pseudocoder.expressions import build_expression
 from pseudocoder.instructions import VariableDeclaration, VariableAssignment, ForLoop, IfElse, Output
 
 
-class CustomSemantics(PseudoCodeSemantics):
+# records where each instruction starts, from the position TatSu has for the start of the rule that produced it
+class PositionedParser(PseudoCodeParser):
+    def _invoke_rule(self, ruleinfo, key):
+        result = super(PositionedParser, self)._invoke_rule(ruleinfo, key)
+        if isinstance(result.node, instruction) and result.node.position is None:
+            tokenizer = self.tokenizer
+            line = tokenizer.posline(key.pos)
+            result.node.position = (line + 1, key.pos - tokenizer.text.rfind('\n', 0, key.pos))
+        return result
+
+
+# TatSu calls the method named for each rule that has one; the rest hand back their ast unchanged
+class CustomSemantics:
+
+    # program = @:instructions $ ;
+    def program(self, ast) -> list[instruction]:
+        return list(ast)
+
+    # instructions = {instruction}*;
+    # TatSu hands back its own list subclass here, which would drag TatSu into anything that pickles the tree.
+    def instructions(self, ast) -> tuple[instruction, ...]:
+        return tuple(ast)
 
     # declare = 'DECLARE' identifier ':' expression;
     def declare(self, ast) -> VariableDeclaration:
@@ -17,39 +40,18 @@ class CustomSemantics(PseudoCodeSemantics):
     def identifier(self, ast) -> Identifier:
         return Identifier(ast)
 
-    # product = product '*' product | product '/' product | factor;
-    def product(self, ast) -> evaluable:
-        if isinstance(ast, tuple) and len(ast) == 3:
-            term1, op, term2 = ast
-            if op == '*':
-                return Multiplication(term1, term2)
-            else:
-                return Division(term1, term2)
-        else:
-            return ast
-
-    # product = product '*' product | product '/' product | factor;
-    def summing(self, ast) -> evaluable:
-        if isinstance(ast, tuple) and len(ast) == 3:
-            term1, op, term2 = ast
-            if op == '+':
-                return Addition(term1, term2)
-            else:
-                return Subtraction(term1, term2)
-        else:
-            return ast
+    # expression = operand {binary_operator operand}* ;
+    def expression(self, ast) -> evaluable:
+        first, rest = ast
+        return build_expression(first, [tuple(pair) for pair in rest])
 
-    # non_arithmetic_expression =
+    # operand =
     #     '(' expression ')' |
-    #     boolean_expression |
     #     literal |
     #     identifier ;
-    def non_arithmetic_expression(self, ast) -> evaluable:
-        if isinstance(ast, tuple):
-            if len(ast) == 3 and ast[0] == '(' and ast[2] == ')':
-                return ast[1]
-            else:
-                return ast[0]
+    def operand(self, ast) -> evaluable:
+        if isinstance(ast, tuple) and len(ast) == 3 and ast[0] == '(' and ast[2] == ')':
+            return ast[1]
         else:
             return ast
 
@@ -57,7 +59,7 @@ class CustomSemantics(PseudoCodeSemantics):
     def integer_literal(self, ast) -> IntegerLiteral:
         return IntegerLiteral(int(ast))
 
-    # real_literal = /\d+.\d*/;
+    # real_literal = /\d+\.\d+/;
     def real_literal(self, ast) -> RealLiteral:
         return RealLiteral(float(ast))
 
@@ -85,43 +87,32 @@ class CustomSemantics(PseudoCodeSemantics):
             _, ident, _, from_, _, to, _, step, code, _ = ast
             return ForLoop(ident, from_, to, step, code)
 
-    # equal_to = expression '=' expression;
-    def equal_to(self, ast) -> Equal:
-        return Equal(ast[0], ast[2])
-
-    # not_equal_to = expression '<>' expression;
-    def not_equal_to(self, ast) -> NotEqual:
-        return NotEqual(ast[0], ast[2])
-
-    # less_than = expression '<' expression;
-    def less_than(self, ast) -> LessThan:
-        return LessThan(ast[0], ast[2])
+    # output = 'OUTPUT' expression;
+    def output(self, ast) -> Output:
+        return Output(ast[1])
 
-    # greater_than = expression '>' expression;
-    def greater_than(self, ast) -> GreaterThan:
-        return GreaterThan(ast[0], ast[2])
 
-    # less_than_or_equal_to = expression '<=' expression;
-    def less_than_or_equal_to(self, ast) -> LessThanEqual:
-        return LessThanEqual(ast[0], ast[2])
+_parser: Optional[PositionedParser] = None
+_semantics: Optional[CustomSemantics] = None
 
-    # greater_than_or_equal_to = expression '>=' expression;
-    def greater_than_or_equal_to(self, ast) -> GreaterThanEqual:
-        return GreaterThanEqual(ast[0], ast[2])
 
-    # output = 'OUTPUT' expression;
-    def output(self, ast) -> Output:
-        return Output(ast[1])
+# one parser for the whole process, made the first time it is needed; TatSu starts it afresh for every parse
+def get_parser() -> tuple[PositionedParser, CustomSemantics]:
+    global _parser, _semantics
+    if _parser is None:
+        _parser = PositionedParser(keywords=KEYWORDS)
+        _semantics = CustomSemantics()
+    return _parser, _semantics
 
 
 def parse_program(code: str, filename: str = None) -> list[instruction]:
-    parser = PseudoCodeParser(keywords=KEYWORDS)
+    parser, semantics = get_parser()
 
     ast: list[instruction] = parser.parse(
         code,
         rule_name='program',
         filename=filename,
-        semantics=CustomSemantics()
+        semantics=semantics
     )
 
     return ast
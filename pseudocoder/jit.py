@@ -0,0 +1,177 @@
+# A tracing jit for FOR loops in the tree walker. With --jit, every ForLoop in the program is replaced by a TracingForLoop,
+# which runs exactly as a ForLoop does but counts how many times its body has run. Once that reaches
+# HOT_LOOP_ITERATIONS, the body is translated to python by the codegen file, with the types of the variables it uses
+# taken from the values they hold at that moment, and the remaining iterations are run by the translated function.
+#
+# Each time a trace is run, guards first check that every variable it uses holds a value of the class it was compiled
+# for. If any does not, the loop bails back to the tree walker. Within a trace the codegen file has already proven the
+# type of every expression, so the types cannot change while it runs. The variables are read into python locals when a
+# trace starts, and written back to their slots when it stops, including when it fails.
+#
+# A loop is never traced when its body has been wrapped to be watched, by --profile or --metrics, which need the tree
+# walker to run every statement so that they can count and time it; __main__ warns that --jit does nothing with them.
+import ast
+from typing import Callable, Iterator, Optional, TYPE_CHECKING
+
+from pseudocoder import interfaces
+from pseudocoder.codegen import PythonTranslator, Untranslatable, local_name, OUTPUT_NAME
+from pseudocoder.data import Integer, Real, Boolean
+from pseudocoder.instructions import ForLoop
+from pseudocoder.operations import Identifier
+from pseudocoder.visitor import NodeTransformer
+
+if TYPE_CHECKING:
+    from pseudocoder.namespaces import NameSpace
+
+HOT_LOOP_ITERATIONS = 50
+
+TYPE_NAMES = {Integer: 'INTEGER', Real: 'REAL', Boolean: 'BOOLEAN'}
+
+TRACE_NAME = '__trace__'
+ITERATIONS_NAME = '__iterations__'
+WRITE_BACK_NAME = '__write_back__'
+
+
+# a translator that takes the types of variables from the values they hold, rather than from their declarations
+class TraceTranslator(PythonTranslator):
+    def __init__(self, namespace: 'NameSpace') -> None:
+        super(TraceTranslator, self).__init__()
+        self.__namespace = namespace
+        self.__observed: dict[str, type] = {}
+
+    def get_observed(self) -> dict[str, type]:
+        return self.__observed
+
+    def get_variable_type(self, identifier: Identifier) -> str:
+        name = identifier.get_identifier()
+        if name not in self.__observed:
+            try:
+                value = self.__namespace.lookup_variable(name).get()
+            except Exception:  # not a variable, or not yet set
+                raise Untranslatable(f'{name} has no value to take its type from')
+            if type(value) not in TYPE_NAMES:
+                raise Untranslatable(f'{name} is not an INTEGER, REAL or BOOLEAN')
+            self.__observed[name] = type(value)
+        return TYPE_NAMES[self.__observed[name]]
+
+
+class Trace:
+    def __init__(
+            self,
+            function: Callable,
+            loop_name: str,
+            names: tuple[str, ...],
+            classes: tuple[type, ...]
+    ) -> None:
+        self.__function = function
+        self.__loop_name = loop_name
+        self.__names = names
+        self.__classes = classes
+
+    # runs the rest of the loop's iterations, or returns False without using any of them if a guard fails
+    def __call__(self, iterations: Iterator[int], namespace: 'NameSpace') -> bool:
+        slots = []
+        values = []
+        for name, cls in zip(self.__names, self.__classes):
+            try:
+                slot = namespace.lookup_variable(name)
+                value = slot.get()
+            except Exception:
+                return False
+            if value.__class__ is not cls:
+                return False
+            slots.append(slot)
+            values.append(value.to_python())
+        loop_slot = namespace.lookup_variable(self.__loop_name)
+        boxes = [interfaces.evaluable.get_type(TYPE_NAMES[cls], namespace).from_python for cls in self.__classes]
+        box_integer = interfaces.evaluable.get_type('INTEGER', namespace).from_python
+
+        def write_back(loop_value: Optional[int], *final_values) -> None:
+            if loop_value is not None:
+                loop_slot.set_unchecked(box_integer(loop_value))
+            for slot, box, final_value in zip(slots, boxes, final_values):
+                slot.set_unchecked(box(final_value))
+
+        self.__function(namespace.get_output().write_line, iterations, write_back, *values)
+        return True
+
+
+def compile_trace(loop: ForLoop, namespace: 'NameSpace') -> Optional[Trace]:
+    loop_name = loop.get_identifier().get_identifier()
+    translator = TraceTranslator(namespace)
+    try:
+        if translator.get_variable_type(loop.get_identifier()) != 'INTEGER':
+            return None
+        body = translator.translate_loop_body(loop.get_instructions())
+    except Untranslatable:
+        return None
+    observed = {name: cls for name, cls in translator.get_observed().items() if name != loop_name}
+    names = tuple(observed)
+    loop_local = local_name(loop_name)
+    locals_text = ', '.join(local_name(name) for name in names)
+    module = ast.parse(
+        f'def {TRACE_NAME}({OUTPUT_NAME}, {ITERATIONS_NAME}, {WRITE_BACK_NAME}, {locals_text}):\n'
+        f'    {loop_local} = None\n'
+        f'    try:\n'
+        f'        for {loop_local} in {ITERATIONS_NAME}:\n'
+        f'            pass\n'
+        f'    finally:\n'
+        f'        {WRITE_BACK_NAME}({loop_local}, {locals_text})\n'
+    )
+    module.body[0].body[1].body[0].body = body
+    scope: dict = {}
+    exec(compile(ast.fix_missing_locations(module), '<trace>', 'exec'), scope)
+    return Trace(scope[TRACE_NAME], loop_name, names, tuple(observed.values()))
+
+
+class TracingForLoop(ForLoop):
+    def __init__(
+            self, identifier: Identifier,
+            from_expression: interfaces.evaluable,
+            to_expression: interfaces.evaluable,
+            step_expression: interfaces.evaluable,
+            instructions: tuple[interfaces.instruction, ...]
+    ):
+        super(TracingForLoop, self).__init__(identifier, from_expression, to_expression, step_expression,
+                                             instructions)
+        self.__iterations = 0
+        self.__trace: Optional[Trace] = None
+
+    def get_trace(self) -> Optional[Trace]:
+        return self.__trace
+
+    def execute(self, lookup_namespace: 'NameSpace', action_namespace: 'NameSpace') -> Optional[interfaces.data]:
+        frm, to, step = (expression.evaluate(lookup_namespace) for expression in self.get_range())
+        integer = lookup_namespace.lookup('INTEGER')
+        assert isinstance(integer, interfaces.DataType)
+        assert all(integer.is_type(x) for x in (frm, to, step))
+        slot = self.get_identifier().get_slot(action_namespace)
+        iterations = iter(range(frm.to_python(), to.to_python() + 1, step.to_python()))
+        # traces read and write every variable in the one namespace
+        traceable = lookup_namespace is action_namespace
+        if traceable and self.__trace is not None and self.__trace(iterations, action_namespace):
+            return None
+        body = self.get_instructions()
+        for x in iterations:
+            slot.set(integer.from_python(x))
+            for instruction in body:
+                returned = instruction.execute(lookup_namespace, action_namespace)
+                if returned is not None:
+                    return returned
+            if self.__iterations < HOT_LOOP_ITERATIONS:
+                self.__iterations += 1
+                if self.__iterations == HOT_LOOP_ITERATIONS and traceable:
+                    self.__trace = compile_trace(self, action_namespace)
+                    if self.__trace is not None and self.__trace(iterations, action_namespace):
+                        return None
+        return None
+
+
+class _Tracer(NodeTransformer):
+    def visit_ForLoop(self, node: ForLoop) -> TracingForLoop:
+        frm, to, step = (self.visit(expression) for expression in node.get_range())
+        return TracingForLoop(node.get_identifier(), frm, to, step, self.transform_block(node.get_instructions()))
+
+
+def make_tracing(program: list[interfaces.instruction]) -> list[interfaces.instruction]:
+    return _Tracer().transform_program(program)
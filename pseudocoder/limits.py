@@ -0,0 +1,192 @@
+# Limits on how much a program may do, for running programs that cannot be trusted to stop. With no limits set nothing
+# here is used, and the program runs exactly as it would otherwise. Otherwise the program is rewritten before it runs:
+# every loop body gets a Tick at its start, which charges the budget one step for each instruction in the body, and
+# every call is replaced by one that charges a step before it is made. Every MEMORY_CHECK_STEPS steps the budget also
+# checks the memory the process is using. Output is capped by a LimitedSink around the program's sink.
+#
+# The memory checked is what the process holds at the time rather than its peak, as a worker that runs many programs
+# would otherwise be charged for the largest it has ever run. Where the platform cannot report that, which only linux
+# can without more dependencies, the peak is used instead, and the memory limit is not kept at all on windows.
+# Going over any limit raises LimitExceeded, which the runner's callers report as a result rather than a traceback.
+# Loops in the bodies of functions and procedures are not rewritten, as those bodies are not part of the program's tree,
+# but each call to them is still charged.
+import sys
+from typing import Optional, TYPE_CHECKING
+
+from pseudocoder import interfaces
+from pseudocoder.instructions import ForLoop, WhileLoop, ProcedureCall
+from pseudocoder.operations import FunctionEvaluate
+from pseudocoder.output import OutputSink
+from pseudocoder.visitor import NodeTransformer
+
+if TYPE_CHECKING:
+    from pseudocoder.namespaces import NameSpace
+
+MEMORY_CHECK_STEPS = 1 << 14
+
+EXIT_LIMIT_EXCEEDED = 3
+
+
+class LimitExceeded(Exception):
+    def __init__(self, limit: str, allowed: int, used: int) -> None:
+        self.limit = limit  # 'steps', 'output' or 'memory'
+        self.allowed = allowed
+        self.used = used
+        super(LimitExceeded, self).__init__(f'{limit} limit exceeded: {used} used, {allowed} allowed')
+
+    def to_dict(self) -> dict:
+        return {'limit': self.limit, 'allowed': self.allowed, 'used': self.used}
+
+
+class Limits:
+    def __init__(
+            self,
+            max_steps: Optional[int] = None,
+            max_output_bytes: Optional[int] = None,
+            max_memory_kb: Optional[int] = None
+    ) -> None:
+        self.max_steps = max_steps
+        self.max_output_bytes = max_output_bytes
+        self.max_memory_kb = max_memory_kb
+
+    def is_set(self) -> bool:
+        return any(limit is not None for limit in (self.max_steps, self.max_output_bytes, self.max_memory_kb))
+
+
+def peak_memory_kb() -> Optional[int]:
+    try:
+        import resource
+    except ImportError:  # not on windows
+        return None
+    return maxrss_kb(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+
+def memory_kb() -> Optional[int]:
+    try:
+        with open('/proc/self/statm', 'rb') as fh:
+            resident_pages = int(fh.read().split()[1])
+    except OSError:
+        return peak_memory_kb()
+    import os
+    return resident_pages * os.sysconf('SC_PAGE_SIZE') // 1024
+
+
+def maxrss_kb(maxrss: int) -> int:
+    return maxrss // 1024 if sys.platform == 'darwin' else maxrss  # bytes on macos, kilobytes elsewhere
+
+
+class Budget:
+    def __init__(self, limits: Limits) -> None:
+        self.__max_steps = limits.max_steps
+        self.__max_memory_kb = limits.max_memory_kb if memory_kb() is not None else None
+        self.__steps = 0
+        self.__next_check = 0
+        self.check()
+
+    def get_steps(self) -> int:
+        return self.__steps
+
+    def charge(self, steps: int) -> None:
+        self.__steps += steps
+        if self.__steps >= self.__next_check:
+            self.check()
+
+    # makes the checks that are too slow for every charge, and works out how many steps can pass before the next
+    def check(self) -> None:
+        steps = self.__steps
+        next_check = None
+        if self.__max_steps is not None:
+            if steps > self.__max_steps:
+                raise LimitExceeded('steps', self.__max_steps, steps)
+            next_check = self.__max_steps + 1
+        if self.__max_memory_kb is not None:
+            memory = memory_kb()
+            if memory > self.__max_memory_kb:
+                raise LimitExceeded('memory', self.__max_memory_kb, memory)
+            next_check = min(next_check or sys.maxsize, steps + MEMORY_CHECK_STEPS)
+        self.__next_check = sys.maxsize if next_check is None else next_check
+
+
+class LimitedSink(OutputSink):
+    def __init__(self, sink: OutputSink, max_bytes: int) -> None:
+        self.__sink = sink
+        self.__max_bytes = max_bytes
+        self.__bytes = 0
+
+    def write_line(self, line: str) -> None:
+        self.__bytes += len(line.encode()) + 1
+        if self.__bytes > self.__max_bytes:
+            raise LimitExceeded('output', self.__max_bytes, self.__bytes)
+        self.__sink.write_line(line)
+
+    def flush(self) -> None:
+        self.__sink.flush()
+
+    def close(self) -> None:
+        self.__sink.close()
+
+
+class Tick(interfaces.instruction):
+    def __init__(self, budget: Budget, steps: int) -> None:
+        self.__budget = budget
+        self.__steps = steps
+
+    def get_steps(self) -> int:
+        return self.__steps
+
+    def execute(self, lookup_namespace: 'NameSpace', action_namespace: 'NameSpace') -> None:
+        self.__budget.charge(self.__steps)
+
+
+class LimitedFunctionEvaluate(FunctionEvaluate):
+    def __init__(self, budget: Budget, function_name: str, *arguments: interfaces.evaluable) -> None:
+        super(LimitedFunctionEvaluate, self).__init__(function_name, *arguments)
+        self.__budget = budget
+
+    def evaluate(self, namespace: 'NameSpace') -> interfaces.data:
+        self.__budget.charge(1)
+        return super(LimitedFunctionEvaluate, self).evaluate(namespace)
+
+
+class LimitedProcedureCall(ProcedureCall):
+    def __init__(self, budget: Budget, procedure_name: str, *arguments: interfaces.evaluable) -> None:
+        super(LimitedProcedureCall, self).__init__(procedure_name, *arguments)
+        self.__budget = budget
+
+    def execute(self, lookup_namespace: 'NameSpace', action_namespace: 'NameSpace') -> None:
+        self.__budget.charge(1)
+        super(LimitedProcedureCall, self).execute(lookup_namespace, action_namespace)
+
+
+class _Limiter(NodeTransformer):
+    def __init__(self, budget: Budget) -> None:
+        super(_Limiter, self).__init__()
+        self.__budget = budget
+
+    def tick(self, body: tuple[interfaces.instruction, ...]) -> tuple[interfaces.instruction, ...]:
+        # imported here, as most programs with limits have no listener. A listener's IterationEvent is left out of the
+        # count, so that watching a program does not change how far it may go.
+        from pseudocoder.events import IterationEvent
+        steps = sum(1 for instruction in body if not isinstance(instruction, IterationEvent))
+        return (Tick(self.__budget, steps + 1),) + body
+
+    def visit_ForLoop(self, node: ForLoop) -> ForLoop:
+        frm, to, step = (self.visit(expression) for expression in node.get_range())
+        body = self.tick(self.transform_block(node.get_instructions()))
+        return ForLoop(node.get_identifier(), frm, to, step, body)
+
+    def visit_WhileLoop(self, node: WhileLoop) -> WhileLoop:
+        body = self.tick(self.transform_block(node.get_instructions()))
+        return type(node)(self.visit(node.get_condition()), body)
+
+    def visit_FunctionEvaluate(self, node: FunctionEvaluate) -> LimitedFunctionEvaluate:
+        arguments = (self.visit(argument) for argument in node.get_arguments())
+        return LimitedFunctionEvaluate(self.__budget, node.get_name(), *arguments)
+
+    def visit_ProcedureCall(self, node: ProcedureCall) -> LimitedProcedureCall:
+        arguments = (self.visit(argument) for argument in node.get_arguments())
+        return LimitedProcedureCall(self.__budget, node.get_name(), *arguments)
+
+
+def make_limited(program: list[interfaces.instruction], budget: Budget) -> list[interfaces.instruction]:
+    return _Limiter(budget).transform_program(program)
@@ -0,0 +1,107 @@
+# Caches the results of pure functions. A Memoizer given to the global namespace is handed down to every namespace made
+# under it, and FunctionEvaluate passes its calls through it. Each function is checked by the purity file the first time
+# it is called; the results of a pure one are kept in a least recently used cache of its own, keyed on the class and
+# python value of each argument, and calls to any other function go ahead as normal. Every cache counts its hits and
+# misses, so that a run can show whether memoizing helped.
+from collections import OrderedDict
+from typing import Hashable, Optional, TYPE_CHECKING
+
+from pseudocoder import interfaces
+from pseudocoder.operations import Evaluated
+from pseudocoder.purity import is_pure
+
+if TYPE_CHECKING:
+    from pseudocoder.namespaces import NameSpace
+
+DEFAULT_MEMO_SIZE = 1024
+
+
+class FunctionCache:
+    def __init__(self, name: str, size: int) -> None:
+        self.__name = name
+        self.__size = size
+        self.__results: OrderedDict[Hashable, interfaces.data] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_name(self) -> str:
+        return self.__name
+
+    def __len__(self) -> int:
+        return len(self.__results)
+
+    def get(self, key: Hashable) -> Optional[interfaces.data]:
+        result = self.__results.get(key)
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.__results.move_to_end(key)
+        return result
+
+    def store(self, key: Hashable, result: interfaces.data) -> None:
+        self.__results[key] = result
+        if len(self.__results) > self.__size:
+            self.__results.popitem(last=False)
+
+
+class Memoizer:
+    def __init__(self, size: int = DEFAULT_MEMO_SIZE) -> None:
+        if size < 1:
+            raise ValueError('The memo size must be at least 1')
+        self.__size = size
+        # None for a function found to be impure, which is never cached
+        self.__caches: dict[int, Optional[FunctionCache]] = {}
+        self.__functions: list[interfaces.Function] = []  # keeps the functions alive, so their ids stay theirs
+
+    def get_caches(self) -> list[FunctionCache]:
+        return [cache for cache in self.__caches.values() if cache is not None]
+
+    def get_hits(self) -> int:
+        return sum(cache.hits for cache in self.get_caches())
+
+    def get_misses(self) -> int:
+        return sum(cache.misses for cache in self.get_caches())
+
+    def get_cache(self, name: str, function: interfaces.Function) -> Optional[FunctionCache]:
+        key = id(function)
+        if key not in self.__caches:
+            self.__functions.append(function)
+            self.__caches[key] = FunctionCache(name, self.__size) if is_pure(function) else None
+        return self.__caches[key]
+
+    def call(
+            self,
+            name: str,
+            function: interfaces.Function,
+            namespace: 'NameSpace',
+            arguments: tuple[interfaces.evaluable, ...]
+    ) -> interfaces.data:
+        cache = self.get_cache(name, function)
+        if cache is None:
+            return function.run(namespace, *arguments)
+        values = tuple(argument.evaluate(namespace) for argument in arguments)
+        key = self.make_key(values)
+        if key is None:
+            return function.run(namespace, *map(Evaluated, values))
+        result = cache.get(key)
+        if result is None:
+            result = function.run(namespace, *map(Evaluated, values))
+            cache.store(key, result)
+        return result
+
+    # None for arguments that cannot be made into a key, which are never cached
+    @staticmethod
+    def make_key(values: tuple[interfaces.data, ...]) -> Optional[Hashable]:
+        try:
+            key = tuple((value.__class__, value.to_python()) for value in values)
+            hash(key)
+        except TypeError:  # a value without a hashable python analogue
+            return None
+        return key
+
+    def describe(self) -> str:
+        lines = [f'{"function":>16} {"hits":>10} {"misses":>10} {"cached":>8}']
+        for cache in self.get_caches():
+            lines.append(f'{cache.get_name():>16} {cache.hits:>10} {cache.misses:>10} {len(cache):>8}')
+        return '\n'.join(lines)
@@ -1,13 +1,14 @@
 # for defining namespaces and the slots that allow the passing of references to variables
-from typing import TypeVar, Generic, TYPE_CHECKING, Type, Union
+from typing import TypeVar, Generic, TYPE_CHECKING, Type, Union, Optional, Sequence
 
 from pseudocoder import interfaces
 from pseudocoder.data import BuiltInDataType, Real, Integer, Boolean
 from pseudocoder import operations
 from pseudocoder.interfaces import data
+from pseudocoder.output import OutputSink, StreamSink
 
 if TYPE_CHECKING:
-    pass
+    from pseudocoder.memo import Memoizer
 
 SomeData = TypeVar('SomeData', bound=interfaces.data)
 
@@ -23,6 +24,10 @@ class Slot(Generic[SomeData]):
         assert self.__type.is_type(value)
         self.__stored = value
 
+    # for code the type checker has already proven only ever stores values of the slot's type
+    def set_unchecked(self, value: SomeData) -> None:
+        self.__stored = value
+
     def get(self) -> SomeData:
         if self.__stored is None:
             raise Exception('Not Yet Set')
@@ -30,12 +35,47 @@ class Slot(Generic[SomeData]):
             return self.__stored
 
 
+# holds a constant in a frame, where every name is reached through a slot
+class ConstantSlot(Slot):
+    def __init__(self, value: interfaces.data) -> None:
+        super(ConstantSlot, self).__init__(None)
+        self.__value = value
+
+    def set(self, value: SomeData) -> None:
+        raise AssertionError('Constants cannot be assigned to.')
+
+    def set_unchecked(self, value: SomeData) -> None:
+        self.set(value)
+
+    def get(self) -> interfaces.data:
+        return self.__value
+
+
 class NameSpace:
 
-    def __init__(self, parent: 'Optional[NameSpace]' = None) -> None:
+    def __init__(
+            self,
+            parent: 'Optional[NameSpace]' = None,
+            output: Optional[OutputSink] = None,
+            memoizer: 'Optional[Memoizer]' = None
+    ) -> None:
         self._variables: dict[str, Slot] = dict()
         self._constants: dict[str, data] = dict()
         self._parent = parent
+        if output is None:
+            output = parent.get_output() if parent is not None else StreamSink()
+        self._output = output
+        if memoizer is None and parent is not None:
+            memoizer = parent.get_memoizer()
+        self._memoizer = memoizer
+
+    # where OUTPUT writes its lines; inherited from the parent namespace unless one is given
+    def get_output(self) -> OutputSink:
+        return self._output
+
+    # caches the results of pure functions when set; inherited from the parent namespace like the output
+    def get_memoizer(self) -> 'Optional[Memoizer]':
+        return self._memoizer
 
     def lookup(self, identifier: str) -> data:
         if identifier in self._variables:
@@ -77,23 +117,103 @@ class NameSpace:
             raise AssertionError(f'{identifier} is already defined.')
 
 
-class FunctionNameSpace(NameSpace):
+# A frame is a namespace that also keeps its slots in a list, laid out by the resolver file before the program runs.
+# Identifiers the resolver has bound to a (depth, index) address are read straight from the list of the frame that many
+# parents up, instead of probing the dictionaries of every namespace on the way. The dictionaries are still kept, so
+# unresolved code, and the by-name methods above, work exactly as they do for any other namespace.
+class Frame(NameSpace):
+    def __init__(
+            self,
+            layout: Sequence[str] = (),
+            parent: 'Optional[NameSpace]' = None,
+            output: Optional[OutputSink] = None,
+            memoizer: 'Optional[Memoizer]' = None
+    ) -> None:
+        super(Frame, self).__init__(parent, output, memoizer)
+        self._names = tuple(layout)
+        self._indices = {name: index for index, name in enumerate(self._names)}
+        self._slots: list[Optional[Slot]] = [None] * len(self._names)
+
+    # adds the names at the end of a layout that has grown since the frame was made
+    def extend_layout(self, layout: Sequence[str]) -> None:
+        for name in layout[len(self._names):]:
+            self._indices[name] = len(self._names)
+            self._names += (name,)
+            self._slots.append(self._existing_slot(name))
+
+    def _existing_slot(self, identifier: str) -> Optional[Slot]:
+        if identifier in self._variables:
+            return self._variables[identifier]
+        if identifier in self._constants:
+            return ConstantSlot(self._constants[identifier])
+        return None
+
+    def _bind(self, identifier: str, slot: Slot) -> None:
+        index = self._indices.get(identifier)
+        if index is not None:
+            self._slots[index] = slot
+
+    def declare_variable(self, identifier: str, datatype: 'interfaces.DataType'):
+        super(Frame, self).declare_variable(identifier, datatype)
+        self._bind(identifier, self._variables[identifier])
+
+    def declare_constant(self, identifier: str, datatype: 'interfaces.DataType', value: data):
+        super(Frame, self).declare_constant(identifier, datatype, value)
+        self._bind(identifier, ConstantSlot(value))
+
+    def frame_slot(self, depth: int, index: int) -> Slot:
+        frame = self
+        while depth:
+            frame = frame._parent
+            depth -= 1
+        slot = frame._slots[index]
+        if slot is None:
+            raise AssertionError(f'{frame._names[index]} is not found in this namespace.')
+        return slot
+
+
+# The namespace of a call to a procedure or function, laid out as a frame with a slot for each parameter. Frames are
+# kept in a FramePool once their call has finished, and reset to be used by the next one.
+class FunctionNameSpace(Frame):
     def pass_reference(self, identifier: str, slot: Slot):
         self._variables[identifier] = slot
+        self._bind(identifier, slot)
 
     def pass_value(self, identifier: str, data_type: interfaces.DataType, value: interfaces.data):
         self.declare_variable(identifier, data_type)
         self.lookup_variable(identifier).set(value)
 
+    def reset(self) -> None:
+        self._variables.clear()
+        self._constants.clear()
+        self._slots = [None] * len(self._names)
+
 
 class Parameters:
     def __init__(self) -> None:
         self.__params: list[tuple[str, interfaces.DataType, bool]] = []
+        self.__plan: Optional[tuple[tuple[str, interfaces.DataType, bool, int], ...]] = None
 
     def add_parameter(self, identifier: str, type_name: str, type_namespace: NameSpace, by_ref: bool) -> None:
         data_type = type_namespace.lookup(type_name)
         assert isinstance(data_type, interfaces.DataType)
+        if any(identifier == param[0] for param in self.__params):
+            raise AssertionError(f'{identifier} is already a parameter.')
         self.__params.append((identifier, data_type, by_ref))
+        self.__plan = None
+
+    def get_names(self) -> tuple[str, ...]:
+        return tuple(identifier for identifier, _, _ in self.__params)
+
+    # how each argument is bound, worked out once rather than on every call: the parameter's name, its type, whether it
+    # is passed by reference, and the index of its slot in the frame
+    def get_plan(self) -> tuple[tuple[str, interfaces.DataType, bool, int], ...]:
+        if self.__plan is None:
+            self.__plan = tuple(
+                (identifier, data_type, by_ref, index)
+                for index, (identifier, data_type, by_ref) in enumerate(self.__params)
+            )
+        return self.__plan
 
     def pass_parameters(
             self,
@@ -101,32 +221,73 @@ class Parameters:
             outside_namespace: NameSpace,
             inside_namespace: FunctionNameSpace
     ) -> None:
-
-        assert len(self.__params) == len(identifiers)
-        for outside_identifier, param in zip(identifiers, self.__params):
-            inside_identifier, data_type, by_ref = param
+        plan = self.get_plan()
+        if len(plan) != len(identifiers):
+            raise AssertionError(f'{len(plan)} arguments were expected, but {len(identifiers)} were given.')
+        # the frame is always laid out by get_names, and new parameters cannot clash, so its slots are filled directly
+        variables = inside_namespace._variables
+        slots = inside_namespace._slots
+        for outside_identifier, (inside_identifier, data_type, by_ref, index) in zip(identifiers, plan):
             if by_ref:
                 assert isinstance(outside_identifier, operations.Identifier)
-                outside_identifier = outside_identifier.get_identifier()
-                slot = outside_namespace.lookup_variable(outside_identifier)
+                slot = outside_identifier.get_slot(outside_namespace)
                 assert data_type.is_type(slot.get())
-                inside_namespace.pass_reference(inside_identifier, slot)
             else:
                 data_value = outside_identifier.evaluate(outside_namespace)
                 assert data_type.is_type(data_value)
-                inside_namespace.pass_value(inside_identifier, data_type, data_value)
+                slot = Slot(data_type)
+                slot.set_unchecked(data_value)
+            variables[inside_identifier] = slot
+            slots[index] = slot
+
+
+# Frames for the calls of one procedure. A frame is taken from the pool for each call, or made if every one is in use,
+# as happens with recursion, and given back when the call returns. At most MAX_POOLED_FRAMES are kept.
+class FramePool:
+    MAX_POOLED_FRAMES = 64
+
+    def __init__(self, params: Parameters, parent: NameSpace) -> None:
+        self.__params = params
+        self.__parent = parent
+        self.__free: list[FunctionNameSpace] = []
+
+    def acquire(self, arguments: tuple[interfaces.evaluable, ...], outside_namespace: NameSpace) -> FunctionNameSpace:
+        free = self.__free
+        frame = free.pop() if free else FunctionNameSpace(self.__params.get_names(), self.__parent)
+        try:
+            self.__params.pass_parameters(arguments, outside_namespace, frame)
+        except BaseException:
+            self.release(frame)
+            raise
+        return frame
+
+    def release(self, frame: FunctionNameSpace) -> None:
+        frame.reset()
+        if len(self.__free) < self.MAX_POOLED_FRAMES:
+            self.__free.append(frame)
 
 
 # The global namespace defines on initialisation the built in types that can be used. At the moment only the built in
 # types supported by the ast converter are used. Since every namespace bar should find the global on a an eventual
 # parent, this is the only place where this need to happen
-class GlobalNameSpace(NameSpace):
+# the built in types hold no state, so every global namespace shares the one set made here
+BUILTIN_TYPES: dict[str, BuiltInDataType] = {
+    'REAL': BuiltInDataType(Real),
+    'INTEGER': BuiltInDataType(Integer),
+    'BOOLEAN': BuiltInDataType(Boolean),
+}
 
-    def __init__(self) -> None:
-        super(GlobalNameSpace, self).__init__()
-        builtins = {
-            'REAL': BuiltInDataType(Real),
-            'INTEGER': BuiltInDataType(Integer),
-            'BOOLEAN': BuiltInDataType(Boolean),
-        }
-        self._constants.update(builtins)
+
+class GlobalNameSpace(Frame):
+    BUILTINS = tuple(BUILTIN_TYPES)
+
+    def __init__(
+            self,
+            layout: Sequence[str] = BUILTINS,
+            output: Optional[OutputSink] = None,
+            memoizer: 'Optional[Memoizer]' = None
+    ) -> None:
+        super(GlobalNameSpace, self).__init__(layout, output=output, memoizer=memoizer)
+        self._constants.update(BUILTIN_TYPES)
+        for identifier, value in BUILTIN_TYPES.items():
+            self._bind(identifier, ConstantSlot(value))
@@ -1,20 +1,40 @@
 # Contains all the operations: things that are evaluated to get a value, and not executed to get a result.
 from pseudocoder import interfaces
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
 if TYPE_CHECKING:
-    from pseudocoder.namespaces import NameSpace
+    from pseudocoder.namespaces import NameSpace, Slot
     from pseudocoder import data
 
 
-class Addition(interfaces.evaluable):
+# The operations with two operands. Each works out its value from the values of its operands in apply. The tree walker
+# evaluates them through evaluate, which the first time it runs hands the node to the quickened file to be specialised
+# for the classes of data it was given.
+class BinaryOperation(interfaces.evaluable):
+    quickening = True  # False once the node has been found not to be worth specialising, or has been deoptimised
+
     def __init__(self, _a: interfaces.evaluable, _b: interfaces.evaluable) -> None:
         self.__a = _a
         self.__b = _b
 
-    def evaluate(self, namespace: 'NameSpace') -> interfaces.number:
+    def get_operands(self) -> tuple[interfaces.evaluable, interfaces.evaluable]:
+        return self.__a, self.__b
+
+    def evaluate(self, namespace: 'NameSpace') -> interfaces.data:
         a = self.__a.evaluate(namespace)
         b = self.__b.evaluate(namespace)
+        c = self.apply(a, b, namespace)
+        if self.quickening:
+            from pseudocoder.quickened import quicken
+            quicken(self, a, b, c, namespace)
+        return c
+
+    def apply(self, a: interfaces.data, b: interfaces.data, namespace: 'NameSpace') -> interfaces.data:
+        raise NotImplementedError()
+
+
+class Addition(BinaryOperation):
+    def apply(self, a: interfaces.data, b: interfaces.data, namespace: 'NameSpace') -> interfaces.number:
         assert isinstance(a, interfaces.number)
         assert isinstance(b, interfaces.number)
         a = a.to_python()
@@ -26,14 +46,8 @@ class Addition(interfaces.evaluable):
             return self.get_type('INTEGER', namespace).from_python(c)
 
 
-class Subtraction(interfaces.evaluable):
-    def __init__(self, _a: interfaces.evaluable, _b: interfaces.evaluable) -> None:
-        self.__a = _a
-        self.__b = _b
-
-    def evaluate(self, namespace: 'NameSpace') -> interfaces.number:
-        a = self.__a.evaluate(namespace)
-        b = self.__b.evaluate(namespace)
+class Subtraction(BinaryOperation):
+    def apply(self, a: interfaces.data, b: interfaces.data, namespace: 'NameSpace') -> interfaces.number:
         assert isinstance(a, interfaces.number)
         assert isinstance(b, interfaces.number)
         a = a.to_python()
@@ -45,167 +59,190 @@ class Subtraction(interfaces.evaluable):
             return self.get_type('INTEGER', namespace).from_python(c)
 
 
-class Multiplication(interfaces.evaluable):
-    def __init__(self, _a: interfaces.evaluable, _b: interfaces.evaluable) -> None:
-        self.__a = _a
-        self.__b = _b
-
-    def evaluate(self, namespace: 'NameSpace') -> interfaces.number:
-        a = self.__a.evaluate(namespace)
-        b = self.__b.evaluate(namespace)
+class Multiplication(BinaryOperation):
+    def apply(self, a: interfaces.data, b: interfaces.data, namespace: 'NameSpace') -> interfaces.number:
         assert isinstance(a, interfaces.number)
         assert isinstance(b, interfaces.number)
         a = a.to_python()
         b = b.to_python()
         c = a * b
         if isinstance(c, float):
-            return self.get_type('REAL', namespace)(c)
+            return self.get_type('REAL', namespace).from_python(c)
         else:
-            return self.get_type('INTEGER', namespace)(c)
+            return self.get_type('INTEGER', namespace).from_python(c)
 
 
-class Division(interfaces.evaluable):
-    def __init__(self, _a: interfaces.evaluable, _b: interfaces.evaluable) -> None:
-        self.__a = _a
-        self.__b = _b
-
-    def evaluate(self, namespace: 'NameSpace') -> 'data.Real':
-        a = self.__a.evaluate(namespace)
-        b = self.__b.evaluate(namespace)
+class Division(BinaryOperation):
+    def apply(self, a: interfaces.data, b: interfaces.data, namespace: 'NameSpace') -> 'data.Real':
         assert isinstance(a, interfaces.number)
         assert isinstance(b, interfaces.number)
         a = a.to_python()
         b = b.to_python()
         c = a / b
-        return self.get_type('REAL', namespace)(c)
+        return self.get_type('REAL', namespace).from_python(c)
 
 
-class Concatenation(interfaces.evaluable):
-    def __init__(self, _a: interfaces.evaluable, _b: interfaces.evaluable) -> None:
-        self.__a = _a
-        self.__b = _b
-
-    def evaluate(self, namespace: 'NameSpace') -> 'data.String':
-        a = self.__a.evaluate(namespace)
-        b = self.__b.evaluate(namespace)
+class Concatenation(BinaryOperation):
+    def apply(self, a: interfaces.data, b: interfaces.data, namespace: 'NameSpace') -> 'data.String':
         assert isinstance(a, self.get_type('STRING', namespace)) or isinstance(a, self.get_type('CHAR', namespace))
         assert isinstance(b, self.get_type('STRING', namespace)) or isinstance(a, self.get_type('CHAR', namespace))
         a = a.to_python()
         b = b.to_python()
         c = a + b
-        return self.get_type('STRING', namespace)(c)
+        return self.get_type('STRING', namespace).from_python(c)
 
 
-class GreaterThan(interfaces.evaluable):
-    def __init__(self, _a: interfaces.evaluable, _b: interfaces.evaluable) -> None:
-        self.__a = _a
-        self.__b = _b
-
-    def evaluate(self, namespace: 'NameSpace') -> 'data.Boolean':
-        a = self.__a.evaluate(namespace)
-        b = self.__b.evaluate(namespace)
+class GreaterThan(BinaryOperation):
+    def apply(self, a: interfaces.data, b: interfaces.data, namespace: 'NameSpace') -> 'data.Boolean':
         assert isinstance(a, interfaces.number)
         assert isinstance(b, interfaces.number)
         a = a.to_python()
         b = b.to_python()
         c = a > b
-        return self.get_type('BOOLEAN', namespace)(c)
+        return self.get_type('BOOLEAN', namespace).from_python(c)
 
 
-class LessThan(interfaces.evaluable):
-    def __init__(self, _a: interfaces.evaluable, _b: interfaces.evaluable) -> None:
-        self.__a = _a
-        self.__b = _b
-
-    def evaluate(self, namespace: 'NameSpace') -> 'data.Boolean':
-        a = self.__a.evaluate(namespace)
-        b = self.__b.evaluate(namespace)
+class LessThan(BinaryOperation):
+    def apply(self, a: interfaces.data, b: interfaces.data, namespace: 'NameSpace') -> 'data.Boolean':
         assert isinstance(a, interfaces.number)
         assert isinstance(b, interfaces.number)
         a = a.to_python()
         b = b.to_python()
         c = a < b
-        return self.get_type('BOOLEAN', namespace)(c)
+        return self.get_type('BOOLEAN', namespace).from_python(c)
 
 
-class GreaterThanEqual(interfaces.evaluable):
-    def __init__(self, _a: interfaces.evaluable, _b: interfaces.evaluable) -> None:
-        self.__a = _a
-        self.__b = _b
-
-    def evaluate(self, namespace: 'NameSpace') -> 'data.Boolean':
-        a = self.__a.evaluate(namespace)
-        b = self.__b.evaluate(namespace)
+class GreaterThanEqual(BinaryOperation):
+    def apply(self, a: interfaces.data, b: interfaces.data, namespace: 'NameSpace') -> 'data.Boolean':
         assert isinstance(a, interfaces.number)
         assert isinstance(b, interfaces.number)
         a = a.to_python()
         b = b.to_python()
         c = a >= b
-        return self.get_type('BOOLEAN', namespace)(c)
+        return self.get_type('BOOLEAN', namespace).from_python(c)
 
 
-class LessThanEqual(interfaces.evaluable):
-    def __init__(self, _a: interfaces.evaluable, _b: interfaces.evaluable) -> None:
-        self.__a = _a
-        self.__b = _b
-
-    def evaluate(self, namespace: 'NameSpace') -> 'data.Boolean':
-        a = self.__a.evaluate(namespace)
-        b = self.__b.evaluate(namespace)
+class LessThanEqual(BinaryOperation):
+    def apply(self, a: interfaces.data, b: interfaces.data, namespace: 'NameSpace') -> 'data.Boolean':
         assert isinstance(a, interfaces.number)
         assert isinstance(b, interfaces.number)
         a = a.to_python()
         b = b.to_python()
         c = a <= b
-        return self.get_type('BOOLEAN', namespace)(c)
+        return self.get_type('BOOLEAN', namespace).from_python(c)
 
 
-class Equal(interfaces.evaluable):
-    def __init__(self, _a: interfaces.evaluable, _b: interfaces.evaluable) -> None:
-        self.__a = _a
-        self.__b = _b
-
-    def evaluate(self, namespace: 'NameSpace') -> 'data.Boolean':
-        a = self.__a.evaluate(namespace)
-        b = self.__b.evaluate(namespace)
+class Equal(BinaryOperation):
+    def apply(self, a: interfaces.data, b: interfaces.data, namespace: 'NameSpace') -> 'data.Boolean':
         assert (isinstance(a, interfaces.number) and isinstance(b, interfaces.number)) or \
                (isinstance(a, self.get_type('STRING', namespace)) and isinstance(b, self.get_type('STRING', namespace))) or \
                (isinstance(a, self.get_type('CHAR', namespace)) and isinstance(b, self.get_type('CHAR', namespace)))
         a = a.to_python()
         b = b.to_python()
         c = a == b
-        return self.get_type('BOOLEAN', namespace)(c)
+        return self.get_type('BOOLEAN', namespace).from_python(c)
 
 
-class NotEqual(interfaces.evaluable):
-    def __init__(self, _a: interfaces.evaluable, _b: interfaces.evaluable) -> None:
-        self.__a = _a
-        self.__b = _b
-
-    def evaluate(self, namespace: 'NameSpace') -> 'data.Boolean':
-        a = self.__a.evaluate(namespace)
-        b = self.__b.evaluate(namespace)
+class NotEqual(BinaryOperation):
+    def apply(self, a: interfaces.data, b: interfaces.data, namespace: 'NameSpace') -> 'data.Boolean':
         a = a.to_python()
         b = b.to_python()
         c = a != b
-        return self.get_type('BOOLEAN', namespace).to_python(c)
+        return self.get_type('BOOLEAN', namespace).from_python(c)
+
+
+class And(BinaryOperation):
+    def apply(self, a: interfaces.data, b: interfaces.data, namespace: 'NameSpace') -> 'data.Boolean':
+        boolean = self.get_type('BOOLEAN', namespace)
+        assert boolean.is_type(a)
+        assert boolean.is_type(b)
+        a = a.to_python()
+        b = b.to_python()
+        c = a and b
+        return boolean.from_python(c)
+
+
+class Or(BinaryOperation):
+    def apply(self, a: interfaces.data, b: interfaces.data, namespace: 'NameSpace') -> 'data.Boolean':
+        boolean = self.get_type('BOOLEAN', namespace)
+        assert boolean.is_type(a)
+        assert boolean.is_type(b)
+        a = a.to_python()
+        b = b.to_python()
+        c = a or b
+        return boolean.from_python(c)
 
 
 class Identifier(interfaces.evaluable):
     def __init__(self, _id) -> None:
         self.__id = _id
+        self.__depth: Optional[int] = None
+        self.__index: Optional[int] = None
 
     def evaluate(self, namespace: 'NameSpace') -> interfaces.data:
-        return namespace.lookup(self.__id)
+        if self.__depth is None:
+            return namespace.lookup(self.__id)
+        return namespace.frame_slot(self.__depth, self.__index).get()
 
     def get_identifier(self) -> str:
         return self.__id
 
+    # set by the resolver file: how many frames up the name is declared, and its index in that frame
+    def bind(self, depth: int, index: int) -> None:
+        self.__depth = depth
+        self.__index = index
+
+    # for a tree resolved again, in which the name may no longer be declared before it is used
+    def unbind(self) -> None:
+        self.__depth = None
+        self.__index = None
+
+    def get_address(self) -> 'Optional[tuple[int, int]]':
+        if self.__depth is None:
+            return None
+        return self.__depth, self.__index
+
+    def get_slot(self, namespace: 'NameSpace') -> 'Slot':
+        if self.__depth is None:
+            return namespace.lookup_variable(self.__id)
+        return namespace.frame_slot(self.__depth, self.__index)
+
+
+# Put in place by the optimizer for an expression inside a loop whose value cannot change while the loop runs. The value
+# is worked out the first time it is needed, and kept until the InvariantScope around the loop starts it again.
+class LoopInvariant(interfaces.evaluable):
+    def __init__(self, expression: interfaces.evaluable) -> None:
+        self.__expression = expression
+        self.__value: Optional[interfaces.data] = None
+
+    def evaluate(self, namespace: 'NameSpace') -> interfaces.data:
+        if self.__value is None:
+            self.__value = self.__expression.evaluate(namespace)
+        return self.__value
+
+    def get_expression(self) -> interfaces.evaluable:
+        return self.__expression
+
+    # the value, if it has been worked out since the loop started
+    def get_value(self) -> Optional[interfaces.data]:
+        return self.__value
+
+    def reset(self) -> Optional[interfaces.data]:
+        value = self.__value
+        self.__value = None
+        return value
+
+    def restore(self, value: Optional[interfaces.data]) -> None:
+        self.__value = value
+
 
 class StringLiteral(interfaces.evaluable):
     def __init__(self, string: str) -> None:
         self.__string = string
 
+    def get_value(self) -> str:
+        return self.__string
+
     def evaluate(self, namespace: 'NameSpace') -> 'data.String':
         return self.get_type('STRING', namespace).from_python(self.__string)
 
@@ -215,6 +252,9 @@ class CharLiteral(interfaces.evaluable):
         assert len(char) == 1
         self.__char = char
 
+    def get_value(self) -> str:
+        return self.__char
+
     def evaluate(self, namespace: 'NameSpace') -> 'data.Char':
         return self.get_type('CHAR', namespace).from_python(self.__char)
 
@@ -223,6 +263,9 @@ class IntegerLiteral(interfaces.evaluable):
     def __init__(self, integer: int):
         self.__integer = integer
 
+    def get_value(self) -> int:
+        return self.__integer
+
     def evaluate(self, namespace: 'NameSpace') -> 'data.Integer':
         return self.get_type('INTEGER', namespace).from_python(self.__integer)
 
@@ -231,6 +274,9 @@ class RealLiteral(interfaces.evaluable):
     def __init__(self, real: float):
         self.__real = real
 
+    def get_value(self) -> float:
+        return self.__real
+
     def evaluate(self, namespace: 'NameSpace') -> 'data.Real':
         return self.get_type('REAL', namespace).from_python(self.__real)
 
@@ -239,16 +285,40 @@ class BooleanLiteral(interfaces.evaluable):
     def __init__(self, boolean: bool):
         self.__boolean = boolean
 
+    def get_value(self) -> bool:
+        return self.__boolean
+
     def evaluate(self, namespace: 'NameSpace') -> 'data.Boolean':
         return self.get_type('BOOLEAN', namespace).from_python(self.__boolean)
 
 
+# Stands for a value that has already been worked out, such as an argument that had to be evaluated before a call.
+class Evaluated(interfaces.evaluable):
+    def __init__(self, value: interfaces.data) -> None:
+        self.__value = value
+
+    def get_value(self) -> interfaces.data:
+        return self.__value
+
+    def evaluate(self, namespace: 'NameSpace') -> interfaces.data:
+        return self.__value
+
+
 class FunctionEvaluate(interfaces.evaluable):
     def __init__(self, function_name: str, *arguments: str):
         self.__name = function_name
         self.__args = arguments
 
+    def get_name(self) -> str:
+        return self.__name
+
+    def get_arguments(self) -> tuple:
+        return self.__args
+
     def evaluate(self, namespace: 'NameSpace') -> interfaces.data:
         function = namespace.lookup(self.__name)
         assert isinstance(function, interfaces.Function)
+        memoizer = namespace.get_memoizer()
+        if memoizer is not None:
+            return memoizer.call(self.__name, function, namespace, self.__args)
         return function.run(namespace, *self.__args)
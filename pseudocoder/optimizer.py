@@ -0,0 +1,280 @@
+# Rewrites the parsed program before it runs. The optimizer is a pipeline of passes, each a NodeTransformer that keeps
+# counts of what it changed:
+#   fold:          operations whose operands are all literals are worked out once, and replaced by a literal
+#   dead-branches: an IF on a literal TRUE or FALSE is replaced by the branch that would run
+#   hoist:         expressions in a FOR loop that do not depend on anything the loop changes are worked out once per
+#                  run of the loop rather than once per iteration, through operations.LoopInvariant
+# Passes never change what a program does, including where and how it fails: an operation that fails when folded, or a
+# condition that is not a BOOLEAN, is left for the program to fail on when it runs.
+from typing import Optional, Sequence, Type, TextIO
+
+from pseudocoder import interfaces
+from pseudocoder.data import Integer, Real, Boolean
+from pseudocoder.dump import dump_program
+from pseudocoder.instructions import VariableDeclaration, VariableAssignment, ForLoop, IfElse, InvariantScope
+from pseudocoder.namespaces import GlobalNameSpace
+from pseudocoder.operations import Identifier, IntegerLiteral, RealLiteral, BooleanLiteral, LoopInvariant
+from pseudocoder.operations import FunctionEvaluate
+from pseudocoder.operations import Addition, Subtraction, Multiplication, Division, And, Or
+from pseudocoder.operations import Equal, NotEqual, LessThan, GreaterThan, LessThanEqual, GreaterThanEqual
+from pseudocoder.visitor import NodeTransformer, NodeVisitor
+
+LITERALS = (IntegerLiteral, RealLiteral, BooleanLiteral)
+
+# operations that only depend on their operands, and so can be folded or hoisted
+PURE_OPERATIONS = (
+    Addition, Subtraction, Multiplication, Division, And, Or,
+    Equal, NotEqual, LessThan, GreaterThan, LessThanEqual, GreaterThanEqual,
+)
+
+
+class OptimizerPass(NodeTransformer):
+    name = ''
+
+    def __init__(self) -> None:
+        super(OptimizerPass, self).__init__()
+        self.statistics: dict[str, int] = {}
+
+    def count(self, statistic: str) -> None:
+        self.statistics[statistic] = self.statistics.get(statistic, 0) + 1
+
+
+class ConstantFolding(OptimizerPass):
+    name = 'fold'
+
+    def __init__(self) -> None:
+        super(ConstantFolding, self).__init__()
+        self.__namespace = GlobalNameSpace()
+
+    def visit_evaluable(self, node: interfaces.evaluable) -> interfaces.evaluable:
+        node = super(ConstantFolding, self).visit_evaluable(node)
+        if not isinstance(node, PURE_OPERATIONS) or not all(isinstance(x, LITERALS) for x in node.get_operands()):
+            return node
+        try:
+            value = node.evaluate(self.__namespace)
+        except Exception:
+            return node
+        if isinstance(value, Boolean):
+            literal = BooleanLiteral(value.to_python())
+        elif isinstance(value, Integer):
+            literal = IntegerLiteral(value.to_python())
+        elif isinstance(value, Real):
+            literal = RealLiteral(value.to_python())
+        else:
+            return node
+        self.count('operations folded')
+        return literal
+
+
+class DeadBranchElimination(OptimizerPass):
+    name = 'dead-branches'
+
+    def visit_IfElse(self, node: IfElse):
+        node = super(DeadBranchElimination, self).visit_IfElse(node)
+        condition = node.get_condition()
+        if not isinstance(condition, BooleanLiteral):
+            return node
+        true_code, false_code = node.get_branches()
+        self.count('branches removed')
+        return tuple(true_code) if condition.get_value() else tuple(false_code)
+
+
+# collects the names an expression reads, or None if it contains anything other than pure operations
+class _Reads(NodeVisitor):
+    def __init__(self) -> None:
+        super(_Reads, self).__init__()
+        self.names: Optional[set[str]] = set()
+
+    def generic_visit(self, node) -> None:
+        self.names = None
+
+    def visit_Identifier(self, node: Identifier) -> None:
+        if self.names is not None:
+            self.names.add(node.get_identifier())
+
+    def visit_IntegerLiteral(self, node) -> None:
+        pass
+
+    def visit_RealLiteral(self, node) -> None:
+        pass
+
+    def visit_BooleanLiteral(self, node) -> None:
+        pass
+
+    def visit_LoopInvariant(self, node: LoopInvariant) -> None:
+        self.visit(node.get_expression())
+
+    def visit_evaluable(self, node: interfaces.evaluable) -> None:
+        if not isinstance(node, PURE_OPERATIONS):
+            self.names = None
+            return
+        for operand in node.get_operands():
+            self.visit(operand)
+
+
+def reads(expression: interfaces.evaluable) -> Optional[set[str]]:
+    collector = _Reads()
+    collector.visit(expression)
+    return collector.names
+
+
+# whether an expression calls a function, which can assign to the names outside it through its parent namespace
+class _Calls(NodeVisitor):
+    def __init__(self) -> None:
+        super(_Calls, self).__init__()
+        self.found = False
+
+    def generic_visit(self, node) -> None:
+        pass
+
+    def visit_FunctionEvaluate(self, node: FunctionEvaluate) -> None:
+        self.found = True
+
+    def visit_LoopInvariant(self, node: LoopInvariant) -> None:
+        self.visit(node.get_expression())
+
+    def visit_evaluable(self, node: interfaces.evaluable) -> None:
+        for operand in getattr(node, 'get_operands', tuple)():
+            self.visit(operand)
+
+
+def calls_function(expression: interfaces.evaluable) -> bool:
+    finder = _Calls()
+    finder.visit(expression)
+    return finder.found
+
+
+# collects the names a block of instructions can change, or None if it contains anything that might change any name,
+# which includes a call to a function anywhere in it
+class _Writes(NodeVisitor):
+    def __init__(self) -> None:
+        super(_Writes, self).__init__()
+        self.names: Optional[set[str]] = set()
+
+    def generic_visit(self, node) -> None:
+        self.names = None
+
+    def add(self, name: str) -> None:
+        if self.names is not None:
+            self.names.add(name)
+
+    def read(self, *expressions: interfaces.evaluable) -> None:
+        if any(calls_function(expression) for expression in expressions):
+            self.names = None
+
+    def visit_block(self, instructions: Sequence[interfaces.instruction]) -> None:
+        for instruction in instructions:
+            self.visit(instruction)
+
+    def visit_Output(self, node) -> None:
+        self.read(node.get_value())
+
+    def visit_VariableDeclaration(self, node: VariableDeclaration) -> None:
+        self.read(node.get_type_expression())
+        self.add(node.get_identifier().get_identifier())
+
+    def visit_VariableAssignment(self, node: VariableAssignment) -> None:
+        self.read(node.get_value())
+        self.add(node.get_identifier().get_identifier())
+
+    def visit_ForLoop(self, node: ForLoop) -> None:
+        self.read(*node.get_range())
+        self.add(node.get_identifier().get_identifier())
+        self.visit_block(node.get_instructions())
+
+    def visit_WhileLoop(self, node) -> None:
+        self.read(node.get_condition())
+        self.visit_block(node.get_instructions())
+
+    def visit_IfElse(self, node: IfElse) -> None:
+        self.read(node.get_condition())
+        for branch in node.get_branches():
+            self.visit_block(branch)
+
+    def visit_InvariantScope(self, node: InvariantScope) -> None:
+        self.visit(node.get_loop())
+
+
+def writes(instructions: Sequence[interfaces.instruction]) -> Optional[set[str]]:
+    collector = _Writes()
+    collector.visit_block(instructions)
+    return collector.names
+
+
+# wraps the largest expressions in a loop body that read none of the names the loop changes
+class _Hoister(NodeTransformer):
+    def __init__(self, changed: set[str]) -> None:
+        super(_Hoister, self).__init__()
+        self.__changed = changed
+        self.invariants: list[LoopInvariant] = []
+
+    def hoist(self, node: interfaces.evaluable) -> LoopInvariant:
+        invariant = LoopInvariant(node)
+        self.invariants.append(invariant)
+        return invariant
+
+    def visit_evaluable(self, node: interfaces.evaluable) -> interfaces.evaluable:
+        if isinstance(node, PURE_OPERATIONS):
+            names = reads(node)
+            if names is not None and not names & self.__changed:
+                return self.hoist(node)
+        return super(_Hoister, self).visit_evaluable(node)
+
+    def visit_LoopInvariant(self, node: LoopInvariant) -> interfaces.evaluable:
+        # an invariant of an inner loop may also be invariant in this one, in which case it is kept across the runs of
+        # the inner loop as well
+        names = reads(node)
+        if names is not None and not names & self.__changed:
+            return self.hoist(node)
+        return node
+
+
+class LoopInvariantHoisting(OptimizerPass):
+    name = 'hoist'
+
+    def visit_ForLoop(self, node: ForLoop):
+        node = super(LoopInvariantHoisting, self).visit_ForLoop(node)  # inner loops first
+        changed = writes(node.get_instructions())
+        if changed is None:
+            return node
+        changed.add(node.get_identifier().get_identifier())
+        hoister = _Hoister(changed)
+        body = hoister.transform_block(node.get_instructions())
+        if not hoister.invariants:
+            return node
+        for _ in hoister.invariants:
+            self.count('expressions hoisted')
+        frm, to, step = node.get_range()
+        return InvariantScope(ForLoop(node.get_identifier(), frm, to, step, body), tuple(hoister.invariants))
+
+
+PASSES: dict[str, Type[OptimizerPass]] = {
+    ConstantFolding.name: ConstantFolding,
+    DeadBranchElimination.name: DeadBranchElimination,
+    LoopInvariantHoisting.name: LoopInvariantHoisting,
+}
+
+DEFAULT_PIPELINE = (ConstantFolding.name, DeadBranchElimination.name, LoopInvariantHoisting.name)
+
+
+# dump, if given, is where the optimized program and the statistics of each pass are written
+class Optimizer:
+    def __init__(self, pipeline: Sequence[str] = DEFAULT_PIPELINE, dump: Optional[TextIO] = None) -> None:
+        self.__pipeline = tuple(pipeline)
+        self.__dump = dump
+        self.__statistics: dict[str, dict[str, int]] = {}
+
+    def optimize(self, program: list[interfaces.instruction]) -> list[interfaces.instruction]:
+        for name in self.__pipeline:
+            optimizer_pass = PASSES[name]()
+            program = optimizer_pass.transform_program(program)
+            self.__statistics[name] = dict(optimizer_pass.statistics)
+        if self.__dump is not None:
+            print(dump_program(program), file=self.__dump)
+            for name, statistics in self.__statistics.items():
+                counts = ', '.join(f'{count} {statistic}' for statistic, count in statistics.items())
+                print(f'{name}: {counts or "no changes"}', file=self.__dump)
+        return program
+
+    def get_statistics(self) -> dict[str, dict[str, int]]:
+        return self.__statistics
@@ -0,0 +1,80 @@
+# Where the lines written by OUTPUT go. Every namespace carries a sink, handed down from its parent, so the backends
+# write to whichever one the program was started with rather than printing. The runner uses a buffered StreamSink on
+# stdout; anything that wants the output itself, such as a test harness, can run the program with a MemorySink.
+import sys
+from abc import ABC, abstractmethod
+from typing import Optional, TextIO
+
+DEFAULT_BUFFER_LINES = 4096
+
+# how many lines a StreamSink holds before writing them out: each line, in blocks, or only when the program finishes
+FLUSH_POLICIES = {
+    'line': 1,
+    'block': DEFAULT_BUFFER_LINES,
+    'exit': 0,
+}
+
+
+class OutputSink(ABC):
+    @abstractmethod
+    def write_line(self, line: str) -> None: ...
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self) -> 'OutputSink':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+# writes to a text stream, by default whatever sys.stdout is when the lines are written out
+class StreamSink(OutputSink):
+    def __init__(self, stream: Optional[TextIO] = None, buffer_lines: int = 1) -> None:
+        self.__stream = stream
+        self.__buffer_lines = buffer_lines
+        self.__lines: list[str] = []
+
+    def get_stream(self) -> TextIO:
+        return sys.stdout if self.__stream is None else self.__stream
+
+    def write_line(self, line: str) -> None:
+        self.__lines.append(line)
+        if self.__buffer_lines and len(self.__lines) >= self.__buffer_lines:
+            self.flush()
+
+    def flush(self) -> None:
+        stream = self.get_stream()
+        if self.__lines:
+            self.__lines.append('')
+            stream.write('\n'.join(self.__lines))
+            self.__lines.clear()
+        stream.flush()
+
+
+class FileSink(StreamSink):
+    def __init__(self, path: str, buffer_lines: int = DEFAULT_BUFFER_LINES) -> None:
+        self.__file = open(path, 'w')
+        super(FileSink, self).__init__(self.__file, buffer_lines)
+
+    def close(self) -> None:
+        super(FileSink, self).close()
+        self.__file.close()
+
+
+class MemorySink(OutputSink):
+    def __init__(self) -> None:
+        self.__lines: list[str] = []
+
+    def write_line(self, line: str) -> None:
+        self.__lines.append(line)
+
+    def get_lines(self) -> list[str]:
+        return self.__lines
+
+    def get_text(self) -> str:
+        return ''.join(line + '\n' for line in self.__lines)
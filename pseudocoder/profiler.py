@@ -0,0 +1,144 @@
+# Profiles a program in its own terms rather than the interpreter's. With --profile every instruction is wrapped, before
+# the program runs, in a ProfiledInstruction that counts how often it runs and times it, and the times are kept for each
+# position the parser recorded. The time an instruction takes includes the instructions inside it, such as the body of a
+# loop; its own time leaves those out. Without --profile nothing is wrapped, and nothing here is used.
+#
+# The results can be shown as the source with the counts and times of each line beside it, or as collapsed stacks, one
+# line for each chain of instructions inside one another with its own time in microseconds, which flame graph tools
+# such as flamegraph.pl and speedscope read.
+import time
+from typing import Optional, TextIO, TYPE_CHECKING
+
+from pseudocoder import interfaces
+from pseudocoder.visitor import NodeTransformer
+
+if TYPE_CHECKING:
+    from pseudocoder.namespaces import NameSpace
+
+Position = Optional[tuple[int, int]]  # None for instructions the parser did not make, such as those a pass adds
+
+
+class StatementStats:
+    def __init__(self) -> None:
+        self.hits = 0
+        self.total = 0.0  # seconds, including the instructions inside
+        self.own = 0.0  # seconds, without them
+
+
+# what is running: the positions of the instructions inside one another, and the time of those inside the last so far
+class _Frame:
+    __slots__ = ('path', 'inside')
+
+    def __init__(self, path: tuple[Position, ...]) -> None:
+        self.path = path
+        self.inside = 0.0
+
+
+class Profiler:
+    def __init__(self) -> None:
+        self.__stats: dict[Position, StatementStats] = {}
+        self.__stacks: dict[tuple[Position, ...], float] = {}
+        self.__running: list[_Frame] = [_Frame(())]
+
+    def get_stats(self) -> dict[Position, StatementStats]:
+        return self.__stats
+
+    def get_stacks(self) -> dict[tuple[Position, ...], float]:
+        return self.__stacks
+
+    def instrument(self, program: list[interfaces.instruction]) -> list[interfaces.instruction]:
+        return _Instrumenter(self).transform_program(program)
+
+    def enter(self, position: Position) -> _Frame:
+        frame = _Frame(self.__running[-1].path + (position,))
+        self.__running.append(frame)
+        return frame
+
+    def leave(self, frame: _Frame, position: Position, elapsed: float) -> None:
+        self.__running.pop()
+        self.__running[-1].inside += elapsed
+        stats = self.__stats.get(position)
+        if stats is None:
+            stats = self.__stats[position] = StatementStats()
+        own = elapsed - frame.inside
+        stats.hits += 1
+        stats.total += elapsed
+        stats.own += own
+        self.__stacks[frame.path] = self.__stacks.get(frame.path, 0.0) + own
+
+    def get_lines(self) -> dict[int, StatementStats]:
+        lines: dict[int, StatementStats] = {}
+        for position, stats in self.__stats.items():
+            if position is None:
+                continue
+            line = lines.setdefault(position[0], StatementStats())
+            line.hits += stats.hits
+            line.total += stats.total
+            line.own += stats.own
+        return lines
+
+    # the source, with the hits, total and own milliseconds and share of the run of each line that ran
+    def annotate(self, source: str) -> str:
+        lines = self.get_lines()
+        run_time = sum(stats.own for stats in self.__stats.values()) or 1.0
+        report = [f'{"line":>5} {"hits":>10} {"total ms":>10} {"own ms":>10} {"own %":>6}  source']
+        for number, text in enumerate(source.splitlines(), 1):
+            stats = lines.get(number)
+            if stats is None:
+                report.append(f'{number:>5} {"":>10} {"":>10} {"":>10} {"":>6}  {text}')
+            else:
+                report.append(f'{number:>5} {stats.hits:>10} {stats.total * 1000:>10.3f} {stats.own * 1000:>10.3f} '
+                              f'{stats.own / run_time:>6.1%}  {text}')
+        unplaced = self.__stats.get(None)
+        if unplaced is not None:
+            report.append(f'{"?":>5} {unplaced.hits:>10} {unplaced.total * 1000:>10.3f} {unplaced.own * 1000:>10.3f} '
+                          f'{unplaced.own / run_time:>6.1%}  (instructions with no position)')
+        return '\n'.join(report)
+
+    # one line for each chain of instructions, each named by its line of the source, with its own time in microseconds
+    def write_collapsed(self, source: str, out: TextIO) -> None:
+        lines = source.splitlines()
+
+        def name(position: Position) -> str:
+            if position is None or position[0] > len(lines):
+                return '?'
+            text = lines[position[0] - 1].strip().replace(';', ',')
+            return f'{position[0]}: {text}'
+
+        for path, own in self.__stacks.items():
+            microseconds = round(own * 1_000_000)
+            if microseconds > 0:
+                out.write(';'.join(map(name, path)) + f' {microseconds}\n')
+
+
+class ProfiledInstruction(interfaces.InstructionWrapper):
+    def __init__(self, instruction: interfaces.instruction, profiler: Profiler) -> None:
+        super(ProfiledInstruction, self).__init__(instruction)
+        self.__profiler = profiler
+
+    def wrap(self, instruction: interfaces.instruction) -> 'ProfiledInstruction':
+        return ProfiledInstruction(instruction, self.__profiler)
+
+    def execute(self, lookup_namespace: 'NameSpace', action_namespace: 'NameSpace') -> Optional[interfaces.data]:
+        profiler = self.__profiler
+        frame = profiler.enter(self.position)
+        start = time.perf_counter()
+        try:
+            return self._instruction.execute(lookup_namespace, action_namespace)
+        finally:
+            profiler.leave(frame, self.position, time.perf_counter() - start)
+
+
+class _Instrumenter(NodeTransformer):
+    def __init__(self, profiler: Profiler) -> None:
+        super(_Instrumenter, self).__init__()
+        self.__profiler = profiler
+
+    def visit(self, node):
+        transformed = super(_Instrumenter, self).visit(node)  # with every instruction inside it wrapped
+        if isinstance(transformed, interfaces.instruction):
+            return ProfiledInstruction(transformed, self.__profiler)
+        return transformed
+
+    def visit_evaluable(self, node: interfaces.evaluable) -> interfaces.evaluable:
+        return node
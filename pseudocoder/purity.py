@@ -0,0 +1,134 @@
+# Works out whether a function is pure: whether calling it twice with the same arguments must give the same result and
+# have no other effect, so that the memo file can keep its results. A function is pure when it takes every parameter by
+# value, never runs OUTPUT, INPUT or a procedure, assigns only to its parameters and the variables it declares, reads no
+# names from outside it other than constants, and calls only functions that are pure themselves. Anything the checker
+# does not know about makes a function impure.
+from typing import Optional
+
+from pseudocoder import interfaces
+from pseudocoder.instructions import VariableDeclaration, ConstantDeclaration, VariableAssignment, FunctionReturn
+from pseudocoder.instructions import ForLoop, WhileLoop, DoWhileLoop, IfElse, InvariantScope
+from pseudocoder.operations import Identifier, IntegerLiteral, RealLiteral, BooleanLiteral, LoopInvariant
+from pseudocoder.operations import FunctionEvaluate
+from pseudocoder.visitor import NodeVisitor
+
+
+class PurityChecker(NodeVisitor):
+    def __init__(self, function: interfaces.Function, checking: Optional[set[int]] = None) -> None:
+        super(PurityChecker, self).__init__()
+        self.__function = function
+        self.__parent = function.get_parent()
+        # the functions being checked further up, which are taken to be pure so that recursion ends
+        self.__checking = {id(function)} if checking is None else checking | {id(function)}
+        self.__locals: set[str] = set()
+        self.reasons: list[str] = []
+
+    def is_pure(self) -> bool:
+        for identifier, _, by_ref, _ in self.__function.get_parameters().get_plan():
+            self.__locals.add(identifier)
+            if by_ref:
+                self.reasons.append(f'{identifier} is passed by reference')
+        self.check_block(self.__function.get_instructions())
+        return not self.reasons
+
+    def check_block(self, instructions: tuple[interfaces.instruction, ...]) -> None:
+        # a variable declared in a block may not have been declared when the code after the block runs
+        outer = set(self.__locals)
+        for instruction in instructions:
+            self.visit(instruction)
+        self.__locals = outer
+
+    def check_assigned(self, name: str) -> None:
+        if name not in self.__locals:
+            self.reasons.append(f'{name} is assigned to, but is not declared in the function')
+
+    def generic_visit(self, node) -> None:
+        self.reasons.append(f'{type(node).__name__} may have side effects')
+
+    # operations
+
+    def visit_Identifier(self, node: Identifier) -> None:
+        name = node.get_identifier()
+        if name in self.__locals:
+            return
+        try:
+            self.__parent.lookup_constant(name)
+        except AssertionError:
+            self.reasons.append(f'{name} is read from outside the function, and is not a constant')
+
+    def visit_IntegerLiteral(self, node: IntegerLiteral) -> None:
+        pass
+
+    def visit_RealLiteral(self, node: RealLiteral) -> None:
+        pass
+
+    def visit_BooleanLiteral(self, node: BooleanLiteral) -> None:
+        pass
+
+    def visit_LoopInvariant(self, node: LoopInvariant) -> None:
+        self.visit(node.get_expression())
+
+    def visit_FunctionEvaluate(self, node: FunctionEvaluate) -> None:
+        for argument in node.get_arguments():
+            self.visit(argument)
+        name = node.get_name()
+        try:
+            function = self.__parent.lookup_constant(name)
+        except AssertionError:
+            self.reasons.append(f'{name} is not a function that can be found when the function is defined')
+            return
+        if not isinstance(function, interfaces.Function):
+            self.reasons.append(f'{name} is not a function')
+        elif id(function) not in self.__checking:
+            checker = PurityChecker(function, self.__checking)
+            if not checker.is_pure():
+                self.reasons.append(f'{name} is not pure')
+
+    def visit_evaluable(self, node: interfaces.evaluable) -> None:
+        if not hasattr(node, 'get_operands'):
+            return self.generic_visit(node)
+        for operand in node.get_operands():
+            self.visit(operand)
+
+    # instructions
+
+    def visit_VariableDeclaration(self, node: VariableDeclaration) -> None:
+        self.visit(node.get_type_expression())
+        self.__locals.add(node.get_identifier().get_identifier())
+
+    def visit_ConstantDeclaration(self, node: ConstantDeclaration) -> None:
+        self.visit(node.get_value())
+        self.__locals.add(node.get_identifier())
+
+    def visit_VariableAssignment(self, node: VariableAssignment) -> None:
+        self.visit(node.get_value())
+        self.check_assigned(node.get_identifier().get_identifier())
+
+    def visit_FunctionReturn(self, node: FunctionReturn) -> None:
+        self.visit(node.get_value())
+
+    def visit_ForLoop(self, node: ForLoop) -> None:
+        for expression in node.get_range():
+            self.visit(expression)
+        self.check_assigned(node.get_identifier().get_identifier())
+        self.check_block(node.get_instructions())
+
+    def visit_WhileLoop(self, node: WhileLoop) -> None:
+        self.visit(node.get_condition())
+        self.check_block(node.get_instructions())
+
+    def visit_DoWhileLoop(self, node: DoWhileLoop) -> None:
+        self.check_block(node.get_instructions())
+        self.visit(node.get_condition())
+
+    def visit_IfElse(self, node: IfElse) -> None:
+        self.visit(node.get_condition())
+        for branch in node.get_branches():
+            self.check_block(branch)
+
+    def visit_InvariantScope(self, node: InvariantScope) -> None:
+        self.visit(node.get_loop())
+
+
+def is_pure(function: interfaces.Function) -> bool:
+    return PurityChecker(function).is_pure()
@@ -0,0 +1,184 @@
+# Specialised versions of the binary operations, which the tree walker swaps in as it runs. The first time a generic
+# operation is evaluated, quicken looks at the classes of data its operands gave, and if there is a specialised class
+# for them, changes the node's class to it. The specialised class checks that the operands still give the same classes,
+# and then works out the value with the data type of the result it has cached, without the isinstance checks or looking
+# the data type up through the namespaces. If the operands ever give anything else, the node changes back to its
+# generic class for good.
+import operator
+from typing import Any, Callable, Optional, TYPE_CHECKING
+
+from pseudocoder import interfaces
+from pseudocoder import operations
+from pseudocoder.data import Integer, Real, Boolean
+
+if TYPE_CHECKING:
+    from pseudocoder.namespaces import NameSpace
+
+# what kind of specialised class to use for each pair of operand classes
+KINDS: dict[tuple[type, type], str] = {
+    (Integer, Integer): 'Int',
+    (Integer, Real): 'Real',
+    (Real, Integer): 'Real',
+    (Real, Real): 'Real',
+    (Boolean, Boolean): 'Bool',
+}
+
+SPECIALISED: 'dict[tuple[type, str], type[Quickened]]' = {}
+
+
+class Quickened(operations.BinaryOperation):
+    quickening = False  # already specialised
+    kind: str
+    generic: type  # the class the node changes back to
+    function: Callable[[Any, Any], Any]
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super(Quickened, cls).__init_subclass__(**kwargs)
+        cls.generic = cls.__bases__[-1]
+        SPECIALISED[cls.generic, cls.kind] = cls
+
+    def __init__(self, _a: interfaces.evaluable, _b: interfaces.evaluable) -> None:
+        # only ever made directly when a pass rebuilds a specialised node, which then starts again as a generic one
+        super(Quickened, self).__init__(_a, _b)
+        self.__class__ = self.generic
+
+    def specialise(self, a_class: type, b_class: type, result: interfaces.DataType) -> None:
+        self.__a, self.__b = self.get_operands()
+        self.__a_class = a_class
+        self.__b_class = b_class
+        self.__result = result
+
+    def evaluate(self, namespace: 'NameSpace') -> interfaces.data:
+        a = self.__a.evaluate(namespace)
+        b = self.__b.evaluate(namespace)
+        if a.__class__ is not self.__a_class or b.__class__ is not self.__b_class:
+            return self.deoptimise(a, b, namespace)
+        return self.__result.from_python(self.function(a.to_python(), b.to_python()))
+
+    # the same, for the stack backend, which evaluates the operands itself
+    def apply(self, a: interfaces.data, b: interfaces.data, namespace: 'NameSpace') -> interfaces.data:
+        if a.__class__ is not self.__a_class or b.__class__ is not self.__b_class:
+            return self.deoptimise(a, b, namespace)
+        return self.__result.from_python(self.function(a.to_python(), b.to_python()))
+
+    def deoptimise(self, a: interfaces.data, b: interfaces.data, namespace: 'NameSpace') -> interfaces.data:
+        self.__class__ = self.generic
+        self.quickening = False
+        return self.apply(a, b, namespace)
+
+
+def quicken(
+        node: operations.BinaryOperation,
+        a: interfaces.data,
+        b: interfaces.data,
+        c: interfaces.data,
+        namespace: 'NameSpace'
+) -> None:
+    specialised: Optional[type[Quickened]] = SPECIALISED.get((type(node), KINDS.get((type(a), type(b)))))
+    if specialised is None:
+        node.quickening = False  # not worth trying again
+        return
+    result = next(data_type for data_type in (node.get_type(name, namespace) for name in ('INTEGER', 'REAL', 'BOOLEAN'))
+                  if data_type.is_type(c))
+    node.__class__ = specialised
+    node.specialise(type(a), type(b), result)
+
+
+def logical_and(a: bool, b: bool) -> bool:
+    return a and b
+
+
+def logical_or(a: bool, b: bool) -> bool:
+    return a or b
+
+
+class IntAddition(Quickened, operations.Addition):
+    kind, function = 'Int', staticmethod(operator.add)
+
+
+class RealAddition(Quickened, operations.Addition):
+    kind, function = 'Real', staticmethod(operator.add)
+
+
+class IntSubtraction(Quickened, operations.Subtraction):
+    kind, function = 'Int', staticmethod(operator.sub)
+
+
+class RealSubtraction(Quickened, operations.Subtraction):
+    kind, function = 'Real', staticmethod(operator.sub)
+
+
+class IntMultiplication(Quickened, operations.Multiplication):
+    kind, function = 'Int', staticmethod(operator.mul)
+
+
+class RealMultiplication(Quickened, operations.Multiplication):
+    kind, function = 'Real', staticmethod(operator.mul)
+
+
+class IntDivision(Quickened, operations.Division):
+    kind, function = 'Int', staticmethod(operator.truediv)
+
+
+class RealDivision(Quickened, operations.Division):
+    kind, function = 'Real', staticmethod(operator.truediv)
+
+
+class IntGreaterThan(Quickened, operations.GreaterThan):
+    kind, function = 'Int', staticmethod(operator.gt)
+
+
+class RealGreaterThan(Quickened, operations.GreaterThan):
+    kind, function = 'Real', staticmethod(operator.gt)
+
+
+class IntLessThan(Quickened, operations.LessThan):
+    kind, function = 'Int', staticmethod(operator.lt)
+
+
+class RealLessThan(Quickened, operations.LessThan):
+    kind, function = 'Real', staticmethod(operator.lt)
+
+
+class IntGreaterThanEqual(Quickened, operations.GreaterThanEqual):
+    kind, function = 'Int', staticmethod(operator.ge)
+
+
+class RealGreaterThanEqual(Quickened, operations.GreaterThanEqual):
+    kind, function = 'Real', staticmethod(operator.ge)
+
+
+class IntLessThanEqual(Quickened, operations.LessThanEqual):
+    kind, function = 'Int', staticmethod(operator.le)
+
+
+class RealLessThanEqual(Quickened, operations.LessThanEqual):
+    kind, function = 'Real', staticmethod(operator.le)
+
+
+class IntEqual(Quickened, operations.Equal):
+    kind, function = 'Int', staticmethod(operator.eq)
+
+
+class RealEqual(Quickened, operations.Equal):
+    kind, function = 'Real', staticmethod(operator.eq)
+
+
+class IntNotEqual(Quickened, operations.NotEqual):
+    kind, function = 'Int', staticmethod(operator.ne)
+
+
+class RealNotEqual(Quickened, operations.NotEqual):
+    kind, function = 'Real', staticmethod(operator.ne)
+
+
+class BoolNotEqual(Quickened, operations.NotEqual):
+    kind, function = 'Bool', staticmethod(operator.ne)
+
+
+class BoolAnd(Quickened, operations.And):
+    kind, function = 'Bool', staticmethod(logical_and)
+
+
+class BoolOr(Quickened, operations.Or):
+    kind, function = 'Bool', staticmethod(logical_or)
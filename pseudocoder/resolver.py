@@ -0,0 +1,114 @@
+# The resolver runs after parsing and works out, for every identifier in the program, which frame its name will be
+# declared in and where in that frame's list of slots it lives, then binds the identifier to that address. The layout
+# of the global frame it returns is used to build the GlobalNameSpace the program then runs in.
+#
+# Names that are never declared, or only declared later in the program than they are used, are left unbound and are
+# looked up by name at run time, so they fail in the same way as they would without the resolver.
+from typing import Optional
+
+from pseudocoder import interfaces
+from pseudocoder.instructions import VariableDeclaration, ConstantDeclaration, VariableAssignment, Output, ForLoop
+from pseudocoder.instructions import WhileLoop, IfElse, FunctionReturn, InvariantScope
+from pseudocoder.namespaces import GlobalNameSpace
+from pseudocoder.operations import Identifier, LoopInvariant
+from pseudocoder.visitor import NodeVisitor
+
+
+class Scope:
+    def __init__(self, names: tuple[str, ...] = (), parent: 'Optional[Scope]' = None) -> None:
+        self.__names: list[str] = []
+        self.__indices: dict[str, int] = {}
+        self.__parent = parent
+        for name in names:
+            self.declare(name)
+
+    def declare(self, name: str) -> int:
+        # declaring a name twice keeps its first slot; whether that is allowed is decided when the program runs
+        if name not in self.__indices:
+            self.__indices[name] = len(self.__names)
+            self.__names.append(name)
+        return self.__indices[name]
+
+    def resolve(self, name: str) -> Optional[tuple[int, int]]:
+        scope, depth = self, 0
+        while scope is not None:
+            if name in scope.__indices:
+                return depth, scope.__indices[name]
+            scope, depth = scope.__parent, depth + 1
+        return None
+
+    def get_layout(self) -> tuple[str, ...]:
+        return tuple(self.__names)
+
+
+class Resolver(NodeVisitor):
+    def __init__(self, scope: Scope) -> None:
+        super(Resolver, self).__init__()
+        self.__scope = scope
+
+    def generic_visit(self, node) -> None:
+        pass  # anything the resolver does not understand is left to look its names up at run time
+
+    def visit_block(self, instructions: tuple[interfaces.instruction, ...]) -> None:
+        for instruction in instructions:
+            self.visit(instruction)
+
+    def visit_Identifier(self, node: Identifier) -> None:
+        address = self.__scope.resolve(node.get_identifier())
+        if address is None:
+            node.unbind()
+        else:
+            node.bind(*address)
+
+    def visit_evaluable(self, node: interfaces.evaluable) -> None:
+        if hasattr(node, 'get_operands'):
+            for operand in node.get_operands():
+                self.visit(operand)
+
+    def visit_LoopInvariant(self, node: LoopInvariant) -> None:
+        self.visit(node.get_expression())
+
+    def visit_VariableDeclaration(self, node: VariableDeclaration) -> None:
+        self.visit(node.get_type_expression())
+        self.__scope.declare(node.get_identifier().get_identifier())
+        self.visit(node.get_identifier())
+
+    def visit_ConstantDeclaration(self, node: ConstantDeclaration) -> None:
+        self.visit(node.get_value())
+        self.__scope.declare(node.get_identifier())
+
+    def visit_VariableAssignment(self, node: VariableAssignment) -> None:
+        self.visit(node.get_value())
+        self.visit(node.get_identifier())
+
+    def visit_Output(self, node: Output) -> None:
+        self.visit(node.get_value())
+
+    def visit_FunctionReturn(self, node: FunctionReturn) -> None:
+        self.visit(node.get_value())
+
+    def visit_ForLoop(self, node: ForLoop) -> None:
+        for expression in node.get_range():
+            self.visit(expression)
+        self.visit(node.get_identifier())
+        self.visit_block(node.get_instructions())
+
+    def visit_WhileLoop(self, node: WhileLoop) -> None:
+        self.visit(node.get_condition())
+        self.visit_block(node.get_instructions())
+
+    def visit_IfElse(self, node: IfElse) -> None:
+        self.visit(node.get_condition())
+        for branch in node.get_branches():
+            self.visit_block(branch)
+
+    def visit_InvariantScope(self, node: InvariantScope) -> None:
+        self.visit(node.get_loop())
+
+
+# a program given in parts can be resolved a part at a time in the same global scope, whose layout only ever grows
+def resolve_program(program: list[interfaces.instruction], scope: Optional[Scope] = None) -> tuple[str, ...]:
+    if scope is None:
+        scope = Scope(GlobalNameSpace.BUILTINS)
+    Resolver(scope).visit_block(tuple(program))
+    return scope.get_layout()
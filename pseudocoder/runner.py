@@ -1,11 +1,168 @@
-from pseudocoder.interpreter import parse_program
-from pseudocoder.namespaces import GlobalNameSpace
+import time
+from typing import Callable, Optional, TYPE_CHECKING
 
+from pseudocoder.interfaces import FunctionEnd
+from pseudocoder.namespaces import GlobalNameSpace, NameSpace
+from pseudocoder.output import OutputSink, StreamSink, DEFAULT_BUFFER_LINES
+from pseudocoder.resolver import resolve_program
+from pseudocoder.typechecker import check_program, make_unchecked
 
-def run(file: str) -> None:
+if TYPE_CHECKING:
+    from pseudocoder.cache import ParseCache
+    from pseudocoder.events import Listener
+    from pseudocoder.interfaces import instruction
+    from pseudocoder.limits import Limits
+    from pseudocoder.memo import Memoizer
+    from pseudocoder.optimizer import Optimizer
+    from pseudocoder.profiler import Profiler
+    from pseudocoder.startup import StartupTimings
+
+
+def load_program(
+        code: str,
+        filename: str = None,
+        cache: 'Optional[ParseCache]' = None,
+        startup: 'Optional[StartupTimings]' = None
+) -> 'list[instruction]':
+    if cache is not None:
+        program = cache.load(code)
+        if program is not None:
+            if startup is not None:
+                startup.mark('load cached')
+            return program
+    # imported here so that a cache hit never imports TatSu or the generated parser
+    from pseudocoder.interpreter import parse_program
+    if startup is not None:
+        startup.mark('import parser')
+    program = parse_program(code, filename)
+    if startup is not None:
+        startup.mark('parse')
+    if cache is not None:
+        cache.store(code, program)
+    return program
+
+
+def execute_tree(program: 'list[instruction]', namespace: NameSpace) -> None:
+    for statement in program:
+        returned = statement.execute(namespace, namespace)
+        if returned is not None:
+            raise FunctionEnd(returned)
+
+
+def execute_closure(program: 'list[instruction]', namespace: NameSpace) -> None:
+    from pseudocoder.closures import compile_program
+    compile_program(program, namespace)()
+
+
+def execute_python(program: 'list[instruction]', namespace: NameSpace) -> None:
+    from pseudocoder.codegen import compile_program, Untranslatable
+    try:
+        compiled = compile_program(program, write_line=namespace.get_output().write_line)
+    except Untranslatable:
+        execute_tree(program, namespace)
+    else:
+        compiled()
+
+
+def execute_vm(program: 'list[instruction]', namespace: NameSpace) -> None:
+    from pseudocoder.bytecode import compile_program
+    from pseudocoder.vm import run_bytecode
+    run_bytecode(compile_program(program, namespace), namespace)
+
+
+def execute_stack(program: 'list[instruction]', namespace: NameSpace) -> None:
+    from pseudocoder.stackmachine import run_program
+    run_program(program, namespace)
+
+
+BACKENDS: dict[str, Callable[['list[instruction]', NameSpace], None]] = {
+    'tree': execute_tree,
+    'closure': execute_closure,
+    'python': execute_python,
+    'vm': execute_vm,
+    'stack': execute_stack,
+}
+
+
+# resolve=False leaves every identifier to be looked up by name through the namespace chain, which is slower but
+# easier to follow when debugging the namespaces themselves. typecheck=True rejects badly typed programs with a
+# TypeCheckError before any of them runs, and then runs the rest without their run time type checks. Lines from OUTPUT
+# go to the given sink, or are buffered on their way to stdout; either way they are flushed when the program stops.
+# jit=True has the tree walker compile hot FOR loops to python as it runs them. A memoizer caches the results of pure
+# functions, and keeps count of how often that saved a call. limits stop the program with LimitExceeded once it has
+# taken too many steps, or written or used too much. A profiler times every instruction as it runs, which only the tree
+# walker supports, as the other backends compile the instructions rather than run them. A listener is told of what the
+# program does as it runs; see the events file. startup is marked as each step of loading and running the program ends.
+def run(
+        file: str,
+        cache: 'Optional[ParseCache]' = None,
+        backend: str = 'tree',
+        resolve: bool = True,
+        optimizer: 'Optional[Optimizer]' = None,
+        typecheck: bool = False,
+        output: Optional[OutputSink] = None,
+        jit: bool = False,
+        memoizer: 'Optional[Memoizer]' = None,
+        limits: 'Optional[Limits]' = None,
+        profiler: 'Optional[Profiler]' = None,
+        listener: 'Optional[Listener]' = None,
+        startup: 'Optional[StartupTimings]' = None
+) -> None:
     with open(file, 'r') as fh:
         code = fh.read()
-    ast = parse_program(code, file)
-    gn = GlobalNameSpace()
-    for instruction in ast:
-        instruction.execute(gn, gn)
+    start = time.perf_counter()
+    ast = load_program(code, file, cache, startup)
+    if listener is not None:
+        listener.on_phase('parse', time.perf_counter() - start)
+    run_program(ast, backend, resolve, optimizer, typecheck, output, jit, memoizer, limits, profiler, listener)
+    if startup is not None:
+        startup.mark('run')
+
+
+# runs a program that has already been parsed, in the same way as run
+def run_program(
+        ast: 'list[instruction]',
+        backend: str = 'tree',
+        resolve: bool = True,
+        optimizer: 'Optional[Optimizer]' = None,
+        typecheck: bool = False,
+        output: Optional[OutputSink] = None,
+        jit: bool = False,
+        memoizer: 'Optional[Memoizer]' = None,
+        limits: 'Optional[Limits]' = None,
+        profiler: 'Optional[Profiler]' = None,
+        listener: 'Optional[Listener]' = None
+) -> None:
+    if optimizer is not None:
+        ast = optimizer.optimize(ast)
+    checker = check_program(ast) if typecheck else None
+    if output is None:
+        output = StreamSink(buffer_lines=DEFAULT_BUFFER_LINES)
+    if listener is not None:
+        from pseudocoder.events import ListenedSink
+        output = ListenedSink(output, listener)
+    if limits is not None and limits.is_set():
+        from pseudocoder.limits import Budget, LimitedSink, make_limited
+        if limits.max_output_bytes is not None:
+            output = LimitedSink(output, limits.max_output_bytes)
+    gn = GlobalNameSpace(resolve_program(ast) if resolve else GlobalNameSpace.BUILTINS, output, memoizer)
+    if profiler is not None:
+        ast = profiler.instrument(ast)
+    if listener is not None and backend == 'tree':
+        from pseudocoder.events import make_listened
+        ast = make_listened(ast, listener)
+    if limits is not None and limits.is_set():
+        # after resolving, which knows nothing of the nodes this adds, and before the passes below, which keep them
+        ast = make_limited(ast, Budget(limits))
+    if checker is not None:
+        ast = make_unchecked(ast, checker, gn)
+    if jit:
+        from pseudocoder.jit import make_tracing
+        ast = make_tracing(ast)
+    start = time.perf_counter()
+    try:
+        BACKENDS[backend](ast, gn)
+    finally:
+        output.flush()
+        if listener is not None:
+            listener.on_phase('execute', time.perf_counter() - start)
@@ -0,0 +1,395 @@
+# Keeps interpreters warm for running many programs one after another, as `python -m pseudocoder serve`. An asyncio
+# front end takes HTTP requests on a local port or a unix socket, and hands each program to a pool of worker processes,
+# every one of which has imported TatSu and built a parser before its first program arrives. While a program runs, the
+# lines it writes with OUTPUT are sent back to the server over a queue shared with the workers, and the server streams
+# them to the client as they come, as chunked JSON Lines.
+#
+# POST /run takes a JSON object with the program's "code", and optionally any of "backend", "typecheck", "optimize",
+# "jit", "memoize", "flush", "timeout", "max_steps", "max_output" and "max_memory"; the limits may be lowered by a
+# request, to any number above 0, but not raised above the server's own. The response is a line {"output": [...]} for
+# each block of lines the program writes, then a line {"result": {...}} with its status, exit code, error and timings.
+# GET /metrics gives the counts and timings of the server so far. "stdin" is accepted for the future, but the language
+# has no INPUT yet.
+#
+# At most max_concurrent programs run at once; up to max_pending more wait for a turn, and any beyond that are turned
+# away with 503.
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Optional, Sequence
+
+from pseudocoder.batch import BatchOptions, TimeLimit, ProgramTimeout, describe_error, run_parsed
+from pseudocoder.batch import DEFAULT_TIMEOUT, EXIT_ERROR, EXIT_TIMEOUT
+from pseudocoder.limits import Limits, peak_memory_kb
+from pseudocoder.memo import DEFAULT_MEMO_SIZE
+from pseudocoder.optimizer import DEFAULT_PIPELINE
+from pseudocoder.output import OutputSink, FLUSH_POLICIES
+from pseudocoder.runner import BACKENDS
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_MAX_PENDING = 64
+MAX_REQUEST_BYTES = 1 << 20
+STREAM_BUFFER_LINES = 256  # how many lines a worker sends at once, unless the request asks to flush every line
+
+_messages: Optional[multiprocessing.Queue] = None  # in a worker, the queue back to the server
+
+
+class BadRequest(Exception):
+    def __init__(self, status: int, message: str) -> None:
+        self.status = status
+        super(BadRequest, self).__init__(message)
+
+
+# sends the lines a program writes back to the server, tagged with the request they belong to
+class QueueSink(OutputSink):
+    def __init__(self, messages: multiprocessing.Queue, request_id: int, buffer_lines: int) -> None:
+        self.__messages = messages
+        self.__request_id = request_id
+        self.__buffer_lines = buffer_lines
+        self.__lines: list[str] = []
+        self.lines = 0
+        self.bytes = 0
+
+    def write_line(self, line: str) -> None:
+        self.__lines.append(line)
+        self.lines += 1
+        self.bytes += len(line) + 1
+        if self.__buffer_lines and len(self.__lines) >= self.__buffer_lines:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.__lines:
+            self.__messages.put((self.__request_id, 'output', self.__lines))
+            self.__lines = []
+
+
+# run in each worker as it starts, so that no program waits for the imports or the parser
+def start_worker(messages: multiprocessing.Queue) -> None:
+    global _messages
+    _messages = messages
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the server shuts the pool down itself
+    from pseudocoder.interpreter import parse_program
+    parse_program('')
+
+
+# run in a worker: parses and runs one program, and sends its output and then its result back through the queue
+def run_request(request_id: int, code: str, options: BatchOptions, buffer_lines: int) -> None:
+    from pseudocoder.interpreter import parse_program
+    output = QueueSink(_messages, request_id, buffer_lines)
+    error = limit = None
+    start = time.perf_counter()
+    try:
+        with TimeLimit(options.timeout):
+            program = parse_program(code)
+    except ProgramTimeout as e:
+        status, exit_code, error = 'parse-error', EXIT_TIMEOUT, str(e)
+    except Exception as e:
+        status, exit_code, error = 'parse-error', EXIT_ERROR, describe_error(e)
+    parsed = time.perf_counter()
+    if error is None:
+        status, exit_code, error, limit = run_parsed(program, options, output)
+    output.flush()
+    _messages.put((request_id, 'result', {
+        'status': status,
+        'exit_code': exit_code,
+        'error': error,
+        'limit': limit,
+        'parse_seconds': round(parsed - start, 6),
+        'run_seconds': round(time.perf_counter() - parsed, 6),
+        'output_lines': output.lines,
+        'output_bytes': output.bytes,
+        'peak_memory_kb': peak_memory_kb(),
+        'worker': os.getpid(),
+    }))
+
+
+class ServerMetrics:
+    def __init__(self) -> None:
+        self.started = time.time()
+        self.requests = 0
+        self.rejected = 0
+        self.running = 0
+        self.waiting = 0
+        self.statuses: dict[str, int] = {}
+        self.queue_seconds = 0.0
+        self.run_seconds = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            'uptime_seconds': round(time.time() - self.started, 3),
+            'requests': self.requests,
+            'rejected': self.rejected,
+            'running': self.running,
+            'waiting': self.waiting,
+            'statuses': dict(self.statuses),
+            'queue_seconds': round(self.queue_seconds, 6),
+            'run_seconds': round(self.run_seconds, 6),
+        }
+
+
+class Server:
+    def __init__(
+            self,
+            workers: Optional[int] = None,
+            max_concurrent: Optional[int] = None,
+            max_pending: int = DEFAULT_MAX_PENDING,
+            timeout: Optional[float] = DEFAULT_TIMEOUT,
+            limits: Optional[Limits] = None
+    ) -> None:
+        self.__workers = workers or os.cpu_count() or 1
+        self.__max_concurrent = max_concurrent or self.__workers
+        self.__max_pending = max_pending
+        self.__timeout = timeout
+        self.__limits = limits or Limits()
+        self.__metrics = ServerMetrics()
+        self.__next_id = 0
+        self.__streams: dict[int, asyncio.Queue] = {}
+        self.__loop: Optional[asyncio.AbstractEventLoop] = None
+        self.__slots: Optional[asyncio.Semaphore] = None
+        self.__messages: Optional[multiprocessing.Queue] = None
+        self.__pool: Optional[ProcessPoolExecutor] = None
+        self.__reader: Optional[threading.Thread] = None
+
+    def get_metrics(self) -> ServerMetrics:
+        return self.__metrics
+
+    def start(self) -> None:
+        self.__loop = asyncio.get_running_loop()
+        self.__slots = asyncio.Semaphore(self.__max_concurrent)
+        self.__messages = multiprocessing.Queue()
+        self.__pool = ProcessPoolExecutor(self.__workers, initializer=start_worker, initargs=(self.__messages,))
+        for _ in range(self.__workers):  # start every worker now, rather than when the first programs arrive
+            self.__pool.submit(os.getpid)
+        self.__reader = threading.Thread(target=self.__read_messages, daemon=True)
+        self.__reader.start()
+
+    def stop(self) -> None:
+        self.__pool.shutdown(cancel_futures=True)
+        self.__messages.put(None)
+        self.__reader.join()
+
+    # runs on its own thread, handing each message from the workers to the request it is for
+    def __read_messages(self) -> None:
+        while True:
+            message = self.__messages.get()
+            if message is None:
+                return
+            self.__loop.call_soon_threadsafe(self.__deliver, message)
+
+    def __deliver(self, message: tuple) -> None:
+        stream = self.__streams.get(message[0])
+        if stream is not None:  # otherwise the request has already been answered
+            stream.put_nowait(message)
+
+    def make_options(self, request: dict) -> tuple[BatchOptions, int]:
+        backend = request.get('backend', 'tree')
+        if backend not in BACKENDS:
+            raise BadRequest(400, f'Unknown backend {backend!r}')
+        flush = request.get('flush', 'block')
+        if flush not in FLUSH_POLICIES:
+            raise BadRequest(400, f'Unknown flush policy {flush!r}')
+        memoize = request.get('memoize')
+        if memoize is True:
+            memoize = DEFAULT_MEMO_SIZE
+        limits = Limits(
+            lower_limit('max_steps', self.__limits.max_steps, request.get('max_steps')),
+            lower_limit('max_output', self.__limits.max_output_bytes, request.get('max_output')),
+            lower_limit('max_memory', self.__limits.max_memory_kb, request.get('max_memory')),
+        )
+        options = BatchOptions(
+            backend,
+            bool(request.get('typecheck', False)),
+            DEFAULT_PIPELINE if request.get('optimize') else None,
+            bool(request.get('jit', False)),
+            memoize or None,
+            lower_limit('timeout', self.__timeout, request.get('timeout')),
+            limits,
+        )
+        buffer_lines = STREAM_BUFFER_LINES if flush == 'block' else FLUSH_POLICIES[flush]
+        return options, buffer_lines
+
+    # runs one program, yielding each message for it from the workers up to and including its result
+    async def run(self, code: str, options: BatchOptions, buffer_lines: int):
+        metrics = self.__metrics
+        if metrics.waiting >= self.__max_pending:
+            metrics.rejected += 1
+            raise BadRequest(503, 'Too many programs are waiting to run')
+        metrics.requests += 1
+        metrics.waiting += 1
+        queued = time.perf_counter()
+        try:
+            await self.__slots.acquire()
+        finally:
+            metrics.waiting -= 1
+        metrics.running += 1
+        started = time.perf_counter()
+        self.__next_id += 1
+        request_id = self.__next_id
+        stream = self.__streams[request_id] = asyncio.Queue()
+        try:
+            future = self.__pool.submit(run_request, request_id, code, options, buffer_lines)
+            future.add_done_callback(lambda done: self.__loop.call_soon_threadsafe(self.__failed, request_id, done))
+            while True:
+                _, kind, payload = await stream.get()
+                if kind == 'result':
+                    payload['queue_seconds'] = round(started - queued, 6)
+                    payload['total_seconds'] = round(time.perf_counter() - queued, 6)
+                    metrics.statuses[payload['status']] = metrics.statuses.get(payload['status'], 0) + 1
+                    metrics.queue_seconds += started - queued
+                    metrics.run_seconds += time.perf_counter() - started
+                yield kind, payload
+                if kind == 'result':
+                    return
+        finally:
+            del self.__streams[request_id]
+            metrics.running -= 1
+            self.__slots.release()
+
+    # a worker that dies never sends a result, so one is made up for it
+    def __failed(self, request_id: int, future: Future) -> None:
+        stream = self.__streams.get(request_id)
+        if stream is None or future.cancelled() or future.exception() is None:
+            return
+        stream.put_nowait((request_id, 'result', {
+            'status': 'error',
+            'exit_code': EXIT_ERROR,
+            'error': describe_error(future.exception()),
+            'limit': None,
+        }))
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            method, path, body = await read_request(reader)
+            if method == 'GET' and path == '/metrics':
+                body = json.dumps(self.__metrics.to_dict()).encode()
+                write_head(writer, 200, 'application/json', len(body))
+                writer.write(body)
+            elif method == 'POST' and path == '/run':
+                try:
+                    request = json.loads(body)
+                    code = request['code']
+                except (ValueError, TypeError, KeyError):
+                    raise BadRequest(400, 'Expected a JSON object with the program as "code"')
+                if not isinstance(code, str):
+                    raise BadRequest(400, '"code" must be a string')
+                options, buffer_lines = self.make_options(request)
+                messages = self.run(code, options, buffer_lines)
+                try:
+                    first = await anext(messages)  # so that a rejection can still be sent as a status
+                    write_head(writer, 200, 'application/x-ndjson')
+                    write_chunk(writer, first)
+                    async for message in messages:
+                        write_chunk(writer, message)
+                        await writer.drain()
+                    writer.write(b'0\r\n\r\n')
+                finally:
+                    await messages.aclose()
+            else:
+                raise BadRequest(404, f'No {method} {path}')
+        except BadRequest as e:
+            body = json.dumps({'error': str(e)}).encode()
+            write_head(writer, e.status, 'application/json', len(body))
+            writer.write(body)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        try:
+            await writer.drain()
+            writer.close()
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+# a request may only give a positive number, as 0 would mean no limit at all where the limit is a time
+def lower_limit(name: str, server: Optional[float], requested) -> Optional[float]:
+    if requested is None:
+        return server
+    if isinstance(requested, bool) or not isinstance(requested, (int, float)) or not requested > 0:
+        raise BadRequest(400, f'"{name}" must be a number above 0')
+    return requested if server is None else min(server, requested)
+
+
+STATUS_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 413: 'Payload Too Large',
+                  503: 'Service Unavailable'}
+
+
+async def read_request(reader: asyncio.StreamReader) -> tuple[str, str, bytes]:
+    request_line = (await reader.readline()).decode('latin-1').split()
+    if len(request_line) != 3:
+        raise BadRequest(400, 'Malformed request line')
+    method, path, _ = request_line
+    length = 0
+    while (line := await reader.readline()) not in (b'\r\n', b'\n', b''):
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    if length > MAX_REQUEST_BYTES:
+        raise BadRequest(413, f'Programs may be at most {MAX_REQUEST_BYTES} bytes')
+    return method, path, await reader.readexactly(length)
+
+
+def write_head(writer: asyncio.StreamWriter, status: int, content_type: str, length: Optional[int] = None) -> None:
+    head = [f'HTTP/1.1 {status} {STATUS_REASONS[status]}', f'Content-Type: {content_type}', 'Connection: close']
+    head.append('Transfer-Encoding: chunked' if length is None else f'Content-Length: {length}')
+    writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1'))
+
+
+def write_chunk(writer: asyncio.StreamWriter, message: tuple[str, object]) -> None:
+    kind, payload = message
+    data = (json.dumps({kind: payload}) + '\n').encode()
+    writer.write(f'{len(data):x}\r\n'.encode('latin-1') + data + b'\r\n')
+
+
+async def serve(server: Server, host: str, port: int, socket_path: Optional[str]) -> None:
+    server.start()
+    if socket_path is not None:
+        listener = await asyncio.start_unix_server(server.handle, socket_path)
+        where = socket_path
+    else:
+        listener = await asyncio.start_server(server.handle, host, port)
+        where = f'http://{host}:{port}'
+    print(f'Serving on {where}', file=sys.stderr)
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stopping.set)
+    try:
+        async with listener:
+            await stopping.wait()
+    finally:
+        server.stop()
+        if socket_path is not None and os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+def main(argv: Sequence[str]) -> int:
+    parser = argparse.ArgumentParser(prog='pseudocoder serve')
+
+    parser.add_argument('--host', default=DEFAULT_HOST, help='Address to listen on for HTTP')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='Port to listen on for HTTP')
+    parser.add_argument('--socket', default=None, help='Listen on this unix socket instead of a port')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes (default: one per CPU)')
+    parser.add_argument('--max-concurrent', type=int, default=None,
+                        help='Programs that may run at once (default: one per worker)')
+    parser.add_argument('--max-pending', type=int, default=DEFAULT_MAX_PENDING,
+                        help='Programs that may wait for a turn before more are turned away')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT,
+                        help='Seconds each program may take to parse, and then to run; 0 for no limit')
+    parser.add_argument('--max-steps', type=int, default=None, help='Steps each program may take')
+    parser.add_argument('--max-output', type=int, default=None, help='Bytes of output each program may write')
+    parser.add_argument('--max-memory', type=int, default=None, help='Kilobytes of memory each worker may reach')
+
+    args = parser.parse_args(argv)
+
+    server = Server(args.workers, args.max_concurrent, args.max_pending, args.timeout or None,
+                    Limits(args.max_steps, args.max_output, args.max_memory))
+    asyncio.run(serve(server, args.host, args.port, args.socket))
+    return 0
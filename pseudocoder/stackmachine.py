@@ -0,0 +1,342 @@
+# The stack backend. It runs the same tree as the tree walker, but instead of each node evaluating or executing its
+# children through python calls, everything still to be done is kept on a control stack, and the values of expressions
+# on a value stack, both ordinary python lists. Nesting expressions, blocks and calls to functions makes those lists
+# longer rather than the python call stack deeper, so how deeply a program can recurse is limited by memory and not by
+# python's recursion limit.
+#
+# Only calls to functions and procedures can make the python call stack deeper than the program is nested, so only the
+# parts of the program that contain a call are taken apart. Any expression or instruction with no call anywhere in it is
+# evaluated or executed by the tree walker in a single step, which is as fast as the tree walker itself, and goes no
+# deeper into python than the program is nested. A FOR loop with no calls in it therefore runs exactly as it would on
+# the tree walker, while a recursive function's calls never use the python stack at all. Each call still takes several
+# steps of the loop below, so a program that makes many calls runs somewhat slower than on the tree walker, which is
+# the better choice for any program that does not recurse deeper than python allows.
+#
+# Each entry on the control stack is a tuple of a kind, a node and anything else that step needs. Nodes that contain a
+# call are pushed with the kind of their class; once their children have been evaluated, the continuation kinds finish
+# them off. A RETURN pops entries until it reaches the CALL_END of the call it is in, putting back any loop invariants
+# on the way. Binary operations are quickened by the quickened file, as they are by the tree walker.
+from pseudocoder import interfaces
+from pseudocoder import data
+from pseudocoder.instructions import VariableDeclaration, ConstantDeclaration, VariableAssignment, FunctionReturn
+from pseudocoder.instructions import Output, ProcedureCall, ForLoop, WhileLoop, DoWhileLoop, IfElse, InvariantScope
+from pseudocoder.memo import Memoizer
+from pseudocoder.namespaces import NameSpace
+from pseudocoder.operations import BinaryOperation, Identifier, IntegerLiteral, RealLiteral, BooleanLiteral
+from pseudocoder.operations import StringLiteral, CharLiteral, LoopInvariant, FunctionEvaluate, Evaluated
+from pseudocoder.quickened import quicken
+
+(
+    # nodes whose children are simply pushed ahead of a continuation, which are expanded the same way every time
+    BINARY, ASSIGN, IF, OUTPUT, WHILE, DO_WHILE, RETURN, FOR, DECLARE,
+    # other nodes
+    LEAF, INVARIANT, FUNCTION, PROCEDURE, CONSTANT, SCOPE, EVALUABLE, INSTRUCTION,
+    # continuations
+    APPLY, APPLY_LEAVES, APPLY_LEAF, STORE, FOR_NEXT, BRANCH, WRITE, CALL, CALL_END, RETURN_VALUE, WHILE_TEST,
+    DO_WHILE_TEST, FOR_START, KEEP_INVARIANT, RESTORE, DECLARE_VARIABLE, DECLARE_CONSTANT,
+) = range(34)
+
+LAST_EXPANDED = DECLARE
+
+NODE_KINDS = {
+    Identifier: LEAF,
+    IntegerLiteral: LEAF,
+    RealLiteral: LEAF,
+    BooleanLiteral: LEAF,
+    StringLiteral: LEAF,
+    CharLiteral: LEAF,
+    Evaluated: LEAF,
+    BinaryOperation: BINARY,
+    LoopInvariant: INVARIANT,
+    FunctionEvaluate: FUNCTION,
+    interfaces.evaluable: EVALUABLE,
+    VariableDeclaration: DECLARE,
+    ConstantDeclaration: CONSTANT,
+    VariableAssignment: ASSIGN,
+    FunctionReturn: RETURN,
+    Output: OUTPUT,
+    ProcedureCall: PROCEDURE,
+    ForLoop: FOR,
+    DoWhileLoop: DO_WHILE,
+    WhileLoop: WHILE,
+    IfElse: IF,
+    InvariantScope: SCOPE,
+    interfaces.instruction: INSTRUCTION,
+}
+
+_kinds: dict[type, int] = {}
+
+
+# the kind of a node's class, or of its nearest base class that has one
+def kind_of(node) -> int:
+    kind = _kinds.get(node.__class__)
+    if kind is None:
+        kind = next((NODE_KINDS[cls] for cls in node.__class__.__mro__ if cls in NODE_KINDS), None)
+        if kind is None:
+            raise AssertionError(f'{type(node).__name__} cannot be run')
+        _kinds[node.__class__] = kind
+    return kind
+
+
+# the expressions and blocks inside a node
+def children(node, kind: int) -> tuple:
+    if kind == BINARY:
+        return node.get_operands()
+    elif kind == INVARIANT:
+        return node.get_expression(),
+    elif kind == ASSIGN or kind == OUTPUT or kind == RETURN or kind == CONSTANT:
+        return node.get_value(),
+    elif kind == DECLARE:
+        return node.get_type_expression(),
+    elif kind == FOR:
+        return node.get_range() + node.get_instructions()
+    elif kind == WHILE or kind == DO_WHILE:
+        return (node.get_condition(),) + node.get_instructions()
+    elif kind == IF:
+        true_code, false_code = node.get_branches()
+        return (node.get_condition(),) + tuple(true_code) + tuple(false_code)
+    elif kind == SCOPE:
+        return node.get_loop(),
+    return ()  # leaves, and the nodes this file does not know, which the tree walker runs whatever they contain
+
+
+def calls(node) -> bool:
+    kind = kind_of(node)
+    return kind == FUNCTION or kind == PROCEDURE or any(calls(child) for child in children(node, kind))
+
+
+# nodes with no calls in them are left whole to the tree walker
+def entry(node) -> tuple:
+    if calls(node):
+        return kind_of(node), node, None
+    return (INSTRUCTION if isinstance(node, interfaces.instruction) else LEAF), node, None
+
+
+# the entries to push for a block, so that its first instruction is on top
+def block_entries(instructions: tuple[interfaces.instruction, ...]) -> tuple[tuple, ...]:
+    return tuple(entry(instruction) for instruction in reversed(instructions))
+
+
+# the entries to push for a node of one of the expanded kinds: its continuation, and then its children
+def expand(kind: int, node) -> tuple[tuple, ...]:
+    if kind == BINARY:
+        # operands that are identifiers or literals are evaluated where they are used, rather than pushed
+        a, b = node.get_operands()
+        a_entry, b_entry = entry(a), entry(b)
+        if b_entry[0] == LEAF:
+            if a_entry[0] == LEAF:
+                return (APPLY_LEAVES, node, (a, b)),
+            return (APPLY_LEAF, node, b), a_entry
+        return (APPLY, node, None), b_entry, a_entry
+    elif kind == ASSIGN:
+        return (STORE, node, None), entry(node.get_value())
+    elif kind == IF:
+        return (BRANCH, node, None), entry(node.get_condition())
+    elif kind == OUTPUT:
+        return (WRITE, node, None), entry(node.get_value())
+    elif kind == WHILE:
+        return (WHILE_TEST, node, None), entry(node.get_condition())
+    elif kind == DO_WHILE:
+        return ((DO_WHILE_TEST, node, None), entry(node.get_condition())) + block_entries(node.get_instructions())
+    elif kind == RETURN:
+        return (RETURN_VALUE, node, None), entry(node.get_value())
+    elif kind == FOR:
+        return ((FOR_START, node, None),) + block_entries(node.get_range())
+    else:
+        return (DECLARE_VARIABLE, node, None), entry(node.get_type_expression())
+
+
+def run_program(program: list[interfaces.instruction], namespace: NameSpace) -> None:
+    control: list[tuple] = []
+    values: list[interfaces.data] = []
+    push, pop, extend = control.append, control.pop, control.extend
+    push_value, pop_value = values.append, values.pop
+    # worked out the first time each node or block is run; blocks are kept by id, as they are tuples that compare by
+    # value, and every one of them lives as long as the program
+    expansions: dict = {}
+    blocks: dict[int, tuple[tuple, ...]] = {}
+
+    def push_block(instructions: tuple[interfaces.instruction, ...]) -> None:
+        entries = blocks.get(id(instructions))
+        if entries is None:
+            entries = blocks[id(instructions)] = block_entries(instructions)
+        extend(entries)
+
+    program = tuple(program)
+    push_block(program)
+    while control:
+        step = pop()
+        kind, node, extra = step
+        if kind == LEAF:
+            push_value(node.evaluate(namespace))
+        elif kind == INSTRUCTION:
+            returned = node.execute(namespace, namespace)
+            if returned is not None:
+                push_value(returned)
+                push((RETURN_VALUE, node, None))
+        elif kind <= LAST_EXPANDED:
+            entries = expansions.get(node)
+            if entries is None:
+                entries = expansions[node] = expand(kind, node)
+            extend(entries)
+        elif kind == APPLY:
+            b = pop_value()
+            a = values[-1]
+            c = values[-1] = node.apply(a, b, namespace)
+            if node.quickening:
+                quicken(node, a, b, c, namespace)
+        elif kind == APPLY_LEAVES:
+            a = extra[0].evaluate(namespace)
+            b = extra[1].evaluate(namespace)
+            c = node.apply(a, b, namespace)
+            push_value(c)
+            if node.quickening:
+                quicken(node, a, b, c, namespace)
+        elif kind == APPLY_LEAF:
+            b = extra.evaluate(namespace)
+            a = values[-1]
+            c = values[-1] = node.apply(a, b, namespace)
+            if node.quickening:
+                quicken(node, a, b, c, namespace)
+        elif kind == STORE:
+            node.get_identifier().get_slot(namespace).set(pop_value())
+        elif kind == FOR_NEXT:
+            slot, iterator, integer = extra
+            x = next(iterator, None)
+            if x is not None:
+                slot.set(integer.from_python(x))
+                push(step)
+                push_block(node.get_instructions())
+        elif kind == BRANCH:
+            condition = pop_value()
+            assert isinstance(condition, data.Boolean)
+            true_code, false_code = node.get_branches()
+            push_block(true_code if condition.to_python() else false_code)
+        elif kind == WRITE:
+            namespace.get_output().write_line(str(pop_value().to_python()))
+        elif kind == FUNCTION or kind == PROCEDURE:
+            function = namespace.lookup(node.get_name())
+            if kind == FUNCTION:
+                assert isinstance(function, interfaces.Function)
+            else:
+                assert isinstance(function, interfaces.Procedure)
+            arguments = node.get_arguments()
+            memoizer = namespace.get_memoizer() if kind == FUNCTION else None
+            cache = memoizer.get_cache(node.get_name(), function) if memoizer is not None else None
+            if cache is not None:
+                evaluated = tuple(True for _ in arguments)  # a function is only cached if it takes nothing by reference
+            else:
+                # arguments passed by reference are bound by the frame, and only the rest are evaluated beforehand
+                evaluated = expansions.get(function)
+                if evaluated is None:
+                    plan = function.get_parameters().get_plan()
+                    evaluated = expansions[function] = tuple(not by_ref for _, _, by_ref, _ in plan)
+                if len(evaluated) != len(arguments):
+                    function.open_frame(namespace, *arguments)  # fails, saying how many arguments were expected
+            push((CALL, node, (function, cache, evaluated, kind == PROCEDURE)))
+            argument_entries = expansions.get(node)
+            if argument_entries is None:
+                argument_entries = expansions[node] = tuple(entry(argument) for argument in reversed(arguments))
+            for argument_entry, evaluate in zip(argument_entries, reversed(evaluated)):
+                if evaluate:
+                    push(argument_entry)
+        elif kind == CALL:
+            function, cache, evaluated, is_procedure = extra
+            arguments = list(node.get_arguments())
+            for index in reversed(range(len(arguments))):
+                if evaluated[index]:
+                    arguments[index] = Evaluated(pop_value())
+            key = None
+            if cache is not None:
+                key = Memoizer.make_key(tuple(argument.get_value() for argument in arguments))
+                if key is not None:
+                    result = cache.get(key)
+                    if result is not None:
+                        push_value(result)
+                        continue
+            frame = function.open_frame(namespace, *arguments)
+            push((CALL_END, function, (namespace, frame, cache, key, is_procedure)))
+            push_block(function.get_instructions())
+            namespace = frame
+        elif kind == CALL_END:
+            # the end of the function's instructions, reached without a RETURN
+            caller, frame, _, _, _ = extra
+            node.close_frame(frame)
+            namespace = caller
+            if isinstance(node, interfaces.Function):
+                raise Exception("Function failed to return")
+        elif kind == RETURN_VALUE:
+            returned = pop_value()
+            while control:
+                kind, node, extra = pop()
+                if kind == RESTORE:
+                    restore_invariants(node, extra)
+                elif kind == CALL_END:
+                    break
+            else:
+                raise interfaces.FunctionEnd(returned)
+            caller, frame, cache, key, is_procedure = extra
+            node.close_frame(frame)
+            namespace = caller
+            if isinstance(node, interfaces.Function):
+                assert node.get_return_type().is_type(returned)
+                if key is not None:
+                    cache.store(key, returned)
+            if not is_procedure:
+                push_value(returned)
+        elif kind == WHILE_TEST:
+            condition = pop_value()
+            assert isinstance(condition, data.Boolean)
+            if condition.to_python():
+                push((WHILE, node, None))
+                push_block(node.get_instructions())
+        elif kind == DO_WHILE_TEST:
+            condition = pop_value()
+            assert isinstance(condition, data.Boolean)
+            if condition.to_python():
+                push((DO_WHILE, node, None))
+        elif kind == FOR_START:
+            step = pop_value()
+            to = pop_value()
+            frm = pop_value()
+            integer = namespace.lookup('INTEGER')
+            assert isinstance(integer, interfaces.DataType)
+            assert all(integer.is_type(x) for x in (frm, to, step))
+            slot = node.get_identifier().get_slot(namespace)
+            iterator = iter(range(frm.to_python(), to.to_python() + 1, step.to_python()))
+            push((FOR_NEXT, node, (slot, iterator, integer)))
+        elif kind == INVARIANT:
+            value = node.get_value()
+            if value is not None:
+                push_value(value)
+            else:
+                push((KEEP_INVARIANT, node, None))
+                push(entry(node.get_expression()))
+        elif kind == KEEP_INVARIANT:
+            node.restore(values[-1])
+        elif kind == SCOPE:
+            invariants = node.get_invariants()
+            push((RESTORE, node, [invariant.reset() for invariant in invariants]))
+            push(entry(node.get_loop()))
+        elif kind == RESTORE:
+            restore_invariants(node, extra)
+        elif kind == DECLARE_VARIABLE:
+            data_type = pop_value()
+            assert isinstance(data_type, interfaces.DataType)
+            namespace.declare_variable(node.get_identifier().get_identifier(), data_type)
+        elif kind == CONSTANT:
+            data_type = namespace.lookup(node.get_type_name())
+            assert isinstance(data_type, interfaces.DataType)
+            push((DECLARE_CONSTANT, node, data_type))
+            push(entry(node.get_value()))
+        elif kind == DECLARE_CONSTANT:
+            data_value = pop_value()
+            assert extra.is_type(data_value)
+            namespace.declare_constant(node.get_identifier(), extra, data_value)
+        else:
+            raise AssertionError(f'Unknown kind {kind}')
+
+
+def restore_invariants(scope: InvariantScope, saved: list) -> None:
+    for invariant, value in zip(scope.get_invariants(), saved):
+        invariant.restore(value)
@@ -0,0 +1,27 @@
+# Times each step of starting up and running a program, for `python -m pseudocoder --startup-timings`, counted from when
+# __main__ starts running, after python itself has started. Only the modules every run needs are imported up front.
+# The rest, the largest being TatSu, which the generated parser needs and which imports its own code generator with it,
+# are imported only once they are used. A parse cache hit therefore never imports TatSu at all, and with --cache a short
+# program that has been run before starts in about as long as python does.
+import time
+
+
+class StartupTimings:
+    def __init__(self, started: float) -> None:
+        self.__started = started
+        self.__last = started
+        self.__phases: list[tuple[str, float]] = []
+
+    # ends a phase, which began where the last one ended
+    def mark(self, phase: str) -> None:
+        now = time.perf_counter()
+        self.__phases.append((phase, now - self.__last))
+        self.__last = now
+
+    def get_phases(self) -> list[tuple[str, float]]:
+        return self.__phases
+
+    def describe(self) -> str:
+        report = [f'{phase:>14} {seconds * 1000:>8.2f} ms' for phase, seconds in self.__phases]
+        report.append(f'{"total":>14} {(self.__last - self.__started) * 1000:>8.2f} ms')
+        return '\n'.join(report)
@@ -0,0 +1,130 @@
+# Runs a program as it is read, as `python -m pseudocoder --stream`, for generated programs too big to hold parsed all
+# at once. The source is split into chunks of whole top level statements. Each chunk is parsed, resolved in a global
+# scope kept for the whole run, and run in the one global namespace, then dropped before the next is read. Memory stays
+# flat however long the source is, apart from the variables the program declares.
+#
+# A chunk ends before a line at the top level that starts a statement: DECLARE, IF, FOR, OUTPUT, or a name followed by
+# an arrow. No statement can carry on past such a line, so no statement is ever cut in two. Checking types needs the
+# whole program, and so does optimizing it well, so neither is done here; nor is profiling, which reports on the source.
+# The python backend keeps the program's variables in python locals that would be gone by the next chunk, so it cannot
+# stream either.
+import re
+import time
+from typing import Iterable, Iterator, Optional, TYPE_CHECKING
+
+from pseudocoder import interfaces
+from pseudocoder.instructions import ForLoop, IfElse
+from pseudocoder.namespaces import GlobalNameSpace
+from pseudocoder.output import OutputSink, StreamSink, DEFAULT_BUFFER_LINES
+from pseudocoder.resolver import Scope, resolve_program
+from pseudocoder.runner import BACKENDS
+
+if TYPE_CHECKING:
+    from pseudocoder.events import Listener
+    from pseudocoder.limits import Limits
+    from pseudocoder.memo import Memoizer
+
+DEFAULT_CHUNK_STATEMENTS = 1000
+
+STATEMENT_START = re.compile(r'\s*(?:(?:DECLARE|IF|FOR|OUTPUT)\b|[A-Za-z_]\w*\s*(?:<-|←))')
+WORD = re.compile(r'[A-Za-z_]\w*')
+OPENERS = {'IF': 1, 'FOR': 1, 'ENDIF': -1, 'ENDFOR': -1}
+
+
+class ChunkParseError(Exception):
+    def __init__(self, first_line: int, error: Exception) -> None:
+        self.first_line = first_line
+        self.error = error
+        super(ChunkParseError, self).__init__(f'In the statements from line {first_line}: {error}')
+
+
+# the chunks of the source, each with the number of the line it starts on
+def split_statements(
+        lines: Iterable[str],
+        chunk_statements: int = DEFAULT_CHUNK_STATEMENTS
+) -> Iterator[tuple[int, str]]:
+    chunk: list[str] = []
+    first_line = 1
+    depth = statements = 0
+    for number, line in enumerate(lines, 1):
+        if depth == 0 and STATEMENT_START.match(line):
+            if statements >= chunk_statements:
+                yield first_line, ''.join(chunk)
+                chunk.clear()
+                first_line, statements = number, 0
+            statements += 1
+        chunk.append(line)
+        for word in WORD.findall(line):
+            depth += OPENERS.get(word, 0)
+    if chunk:
+        yield first_line, ''.join(chunk)
+
+
+# moves the positions the parser gave a chunk to where the chunk is in the whole source
+def shift_positions(block: Iterable[interfaces.instruction], lines: int) -> None:
+    for instruction in block:
+        if instruction.position is not None:
+            line, column = instruction.position
+            instruction.position = (line + lines, column)
+        if isinstance(instruction, ForLoop):
+            shift_positions(instruction.get_instructions(), lines)
+        elif isinstance(instruction, IfElse):
+            for branch in instruction.get_branches():
+                shift_positions(branch, lines)
+
+
+def run_stream(
+        lines: Iterable[str],
+        filename: Optional[str] = None,
+        backend: str = 'tree',
+        resolve: bool = True,
+        output: Optional[OutputSink] = None,
+        jit: bool = False,
+        memoizer: 'Optional[Memoizer]' = None,
+        limits: 'Optional[Limits]' = None,
+        listener: 'Optional[Listener]' = None,
+        chunk_statements: Optional[int] = None
+) -> None:
+    from pseudocoder.interpreter import parse_program
+    if chunk_statements is None:
+        chunk_statements = DEFAULT_CHUNK_STATEMENTS
+    if backend == 'python':
+        raise ValueError('The python backend cannot run a program a chunk at a time')
+    if output is None:
+        output = StreamSink(buffer_lines=DEFAULT_BUFFER_LINES)
+    if listener is not None:
+        from pseudocoder.events import ListenedSink, make_listened
+        output = ListenedSink(output, listener)
+    budget = None
+    if limits is not None and limits.is_set():
+        from pseudocoder.limits import Budget, LimitedSink, make_limited
+        if limits.max_output_bytes is not None:
+            output = LimitedSink(output, limits.max_output_bytes)
+        budget = Budget(limits)  # one budget for the whole run, rather than for each chunk
+    scope = Scope(GlobalNameSpace.BUILTINS)
+    gn = GlobalNameSpace(GlobalNameSpace.BUILTINS, output, memoizer)
+    try:
+        for first_line, code in split_statements(lines, chunk_statements):
+            start = time.perf_counter()
+            try:
+                chunk = parse_program(code, filename)
+            except Exception as e:
+                raise ChunkParseError(first_line, e) from e
+            shift_positions(chunk, first_line - 1)
+            if listener is not None:
+                listener.on_phase('parse', time.perf_counter() - start)
+            if resolve:
+                gn.extend_layout(resolve_program(chunk, scope))
+            if listener is not None and backend == 'tree':
+                chunk = make_listened(chunk, listener)
+            if budget is not None:
+                chunk = make_limited(chunk, budget)
+            if jit:
+                from pseudocoder.jit import make_tracing
+                chunk = make_tracing(chunk)
+            start = time.perf_counter()
+            BACKENDS[backend](chunk, gn)
+            if listener is not None:
+                listener.on_phase('execute', time.perf_counter() - start)
+    finally:
+        output.flush()
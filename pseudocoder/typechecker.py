@@ -0,0 +1,323 @@
+# Static type checking. The checker works out the type of every expression from the DECLARE statements, and reports
+# everything the run time checks in the operations and instructions files would otherwise only find when (and if) the
+# offending line runs. A program that passes, and that the checker understood completely, is then rewritten with the
+# nodes from the unchecked file, which skip those run time checks.
+#
+# Each branch of an IF is checked with the declarations from before it, as only one of them runs. After the IF, a name
+# is declared if both branches declare it as the same type. A name that only one branch declares, or that the branches
+# declare as different types, cannot be used after the IF, as whether or how it was declared is only known as it runs.
+# So the checker is conservative, and rejects such a program even if it would only take the branch that works. In the
+# same way, a name declared in the body of a FOR or WHILE loop, which may run no times, cannot be used after the loop.
+from typing import Optional, Sequence
+
+from pseudocoder import interfaces
+from pseudocoder import unchecked
+from pseudocoder.dump import TreeDumper
+from pseudocoder.instructions import VariableDeclaration, VariableAssignment, Output, ForLoop, WhileLoop, IfElse
+from pseudocoder.instructions import DoWhileLoop, InvariantScope
+from pseudocoder.namespaces import GlobalNameSpace, NameSpace
+from pseudocoder.operations import Identifier, IntegerLiteral, RealLiteral, BooleanLiteral, LoopInvariant
+from pseudocoder.operations import Addition, Subtraction, Multiplication, Division, And, Or
+from pseudocoder.operations import Equal, NotEqual, LessThan, GreaterThan, LessThanEqual, GreaterThanEqual
+from pseudocoder.visitor import NodeVisitor, NodeTransformer
+
+INTEGER, REAL, BOOLEAN = 'INTEGER', 'REAL', 'BOOLEAN'
+NUMBERS = (INTEGER, REAL)
+
+UNCHECKED_OPERATIONS = {
+    Addition: unchecked.UncheckedAddition,
+    Subtraction: unchecked.UncheckedSubtraction,
+    Multiplication: unchecked.UncheckedMultiplication,
+    Division: unchecked.UncheckedDivision,
+    GreaterThan: unchecked.UncheckedGreaterThan,
+    LessThan: unchecked.UncheckedLessThan,
+    GreaterThanEqual: unchecked.UncheckedGreaterThanEqual,
+    LessThanEqual: unchecked.UncheckedLessThanEqual,
+    Equal: unchecked.UncheckedEqual,
+    NotEqual: unchecked.UncheckedNotEqual,
+    And: unchecked.UncheckedAnd,
+    Or: unchecked.UncheckedOr,
+}
+
+
+class TypeCheckError(Exception):
+    def __init__(self, errors: Sequence[str]) -> None:
+        self.errors = tuple(errors)
+        super(TypeCheckError, self).__init__('\n'.join(self.errors))
+
+
+def describe(node: interfaces.evaluable) -> str:
+    return TreeDumper().expression(node)
+
+
+class TypeChecker(NodeVisitor):
+    def __init__(self) -> None:
+        super(TypeChecker, self).__init__()
+        self.__variables: dict[str, str] = {}
+        # names that may not have been declared, such as those declared in only one branch of an IF, and why
+        self.__undecided: dict[str, str] = {}
+        self.__types: dict[int, str] = {}
+        self.__complete = True
+        self.errors: list[str] = []
+
+    def is_complete(self) -> bool:
+        return self.__complete
+
+    def get_type(self, node: interfaces.evaluable) -> Optional[str]:
+        return self.__types.get(id(node))
+
+    def error(self, message: str) -> None:
+        self.errors.append(message)
+
+    def check_block(self, instructions: Sequence[interfaces.instruction]) -> None:
+        for instruction in instructions:
+            self.visit(instruction)
+
+    def generic_visit(self, node) -> None:
+        self.__complete = False  # checked as it runs, as the checker knows nothing about it
+
+    # operations: each returns the name of the type of the expression, or None if it has none because of an error
+
+    def visit(self, node):
+        result = super(TypeChecker, self).visit(node)
+        if isinstance(node, interfaces.evaluable) and result is not None:
+            self.__types[id(node)] = result
+        return result
+
+    def visit_Identifier(self, node: Identifier) -> Optional[str]:
+        name = node.get_identifier()
+        if name in self.__variables:
+            return self.__variables[name]
+        elif name in self.__undecided:
+            self.error(self.__undecided[name])
+        elif name in GlobalNameSpace.BUILTINS:
+            self.error(f'{name} is a type, and cannot be used as a value')
+        else:
+            self.error(f'{name} is used before it is declared')
+        return None
+
+    def visit_IntegerLiteral(self, node: IntegerLiteral) -> str:
+        return INTEGER
+
+    def visit_RealLiteral(self, node: RealLiteral) -> str:
+        return REAL
+
+    def visit_BooleanLiteral(self, node: BooleanLiteral) -> str:
+        return BOOLEAN
+
+    def visit_LoopInvariant(self, node: LoopInvariant) -> Optional[str]:
+        return self.visit(node.get_expression())
+
+    def check_operands(self, node, allowed: tuple[str, ...], description: str) -> Optional[tuple[str, str]]:
+        a_type, b_type = (self.visit(operand) for operand in node.get_operands())
+        if a_type is None or b_type is None:
+            return None  # already reported
+        if a_type not in allowed or b_type not in allowed:
+            self.error(f'{description} needs {" or ".join(allowed)} operands, not {a_type} and {b_type}, in '
+                       f'{describe(node)}')
+            return None
+        return a_type, b_type
+
+    def arithmetic(self, node) -> Optional[str]:
+        types = self.check_operands(node, NUMBERS, type(node).__name__)
+        if types is None:
+            return None
+        return INTEGER if types == (INTEGER, INTEGER) else REAL
+
+    def comparison(self, node) -> Optional[str]:
+        return None if self.check_operands(node, NUMBERS, type(node).__name__) is None else BOOLEAN
+
+    def logical(self, node) -> Optional[str]:
+        return None if self.check_operands(node, (BOOLEAN,), type(node).__name__) is None else BOOLEAN
+
+    def visit_Addition(self, node) -> Optional[str]:
+        return self.arithmetic(node)
+
+    def visit_Subtraction(self, node) -> Optional[str]:
+        return self.arithmetic(node)
+
+    def visit_Multiplication(self, node) -> Optional[str]:
+        return self.arithmetic(node)
+
+    def visit_Division(self, node) -> Optional[str]:
+        return None if self.check_operands(node, NUMBERS, 'Division') is None else REAL
+
+    def visit_GreaterThan(self, node) -> Optional[str]:
+        return self.comparison(node)
+
+    def visit_LessThan(self, node) -> Optional[str]:
+        return self.comparison(node)
+
+    def visit_GreaterThanEqual(self, node) -> Optional[str]:
+        return self.comparison(node)
+
+    def visit_LessThanEqual(self, node) -> Optional[str]:
+        return self.comparison(node)
+
+    def visit_Equal(self, node) -> Optional[str]:
+        return self.comparison(node)
+
+    def visit_NotEqual(self, node) -> Optional[str]:
+        # unlike =, <> compares values of any type
+        a_type, b_type = (self.visit(operand) for operand in node.get_operands())
+        return None if a_type is None or b_type is None else BOOLEAN
+
+    def visit_And(self, node) -> Optional[str]:
+        return self.logical(node)
+
+    def visit_Or(self, node) -> Optional[str]:
+        return self.logical(node)
+
+    def visit_evaluable(self, node) -> None:
+        self.__complete = False
+        return None
+
+    # instructions
+
+    def visit_VariableDeclaration(self, node: VariableDeclaration) -> None:
+        name = node.get_identifier().get_identifier()
+        type_expression = node.get_type_expression()
+        declared = type_expression.get_identifier() if isinstance(type_expression, Identifier) else None
+        if declared not in GlobalNameSpace.BUILTINS:
+            self.error(f'{name} is declared as {describe(type_expression)}, which is not a type')
+            return
+        if self.__variables.get(name, declared) != declared:
+            self.error(f'{name} is declared as both {self.__variables[name]} and {declared}')
+            return
+        self.__undecided.pop(name, None)
+        self.__variables[name] = declared
+
+    def visit_VariableAssignment(self, node: VariableAssignment) -> None:
+        value_type = self.visit(node.get_value())
+        target_type = self.visit(node.get_identifier())
+        if value_type is not None and target_type is not None and value_type != target_type:
+            name = node.get_identifier().get_identifier()
+            self.error(f'{name} is {target_type}, and cannot be assigned {describe(node.get_value())}, '
+                       f'which is {value_type}')
+
+    def visit_Output(self, node: Output) -> None:
+        self.visit(node.get_value())
+
+    def visit_ForLoop(self, node: ForLoop) -> None:
+        name = node.get_identifier().get_identifier()
+        loop_type = self.visit(node.get_identifier())
+        if loop_type is not None and loop_type != INTEGER:
+            self.error(f'the FOR loop variable {name} is {loop_type}, not INTEGER')
+        for expression in node.get_range():
+            bound_type = self.visit(expression)
+            if bound_type is not None and bound_type != INTEGER:
+                self.error(f'the FOR loop over {name} has a bound of {describe(expression)}, which is {bound_type}, '
+                           f'not INTEGER')
+        self.check_loop_body(node.get_instructions(), 'FOR')
+
+    # checks the body of a loop that may run no times, after which the names it declares may not have been declared
+    def check_loop_body(self, instructions: Sequence[interfaces.instruction], statement: str) -> None:
+        variables = self.__variables
+        self.__variables = dict(variables)
+        self.check_block(instructions)
+        for name in self.__variables.keys() - variables.keys():
+            self.__undecided[name] = f'{name} is declared inside a {statement} loop, which may run no times, so it ' \
+                                     f'may not be declared after it'
+        self.__variables = variables
+
+    def check_condition(self, condition: interfaces.evaluable, statement: str) -> None:
+        condition_type = self.visit(condition)
+        if condition_type is not None and condition_type != BOOLEAN:
+            self.error(f'the {statement} condition {describe(condition)} is {condition_type}, not BOOLEAN')
+
+    def visit_WhileLoop(self, node: WhileLoop) -> None:
+        self.check_condition(node.get_condition(), 'WHILE')
+        self.check_loop_body(node.get_instructions(), 'WHILE')
+
+    def visit_DoWhileLoop(self, node: DoWhileLoop) -> None:
+        # the body always runs once, before the condition
+        self.check_block(node.get_instructions())
+        self.check_condition(node.get_condition(), 'REPEAT')
+
+    def visit_IfElse(self, node: IfElse) -> None:
+        self.check_condition(node.get_condition(), 'IF')
+        variables, undecided = self.__variables, self.__undecided
+        outcomes = []
+        for branch in node.get_branches():
+            self.__variables, self.__undecided = dict(variables), dict(undecided)
+            self.check_block(branch)
+            outcomes.append((self.__variables, self.__undecided))
+        (true_variables, true_undecided), (false_variables, false_undecided) = outcomes
+        self.__variables, self.__undecided = {}, {**true_undecided, **false_undecided}
+        for name in true_variables.keys() | false_variables.keys():
+            true_type, false_type = true_variables.get(name), false_variables.get(name)
+            if true_type == false_type:
+                self.__variables[name] = true_type
+                self.__undecided.pop(name, None)
+            elif true_type is None or false_type is None:
+                self.__undecided[name] = f'{name} is declared in only one branch of an IF, so it may not be declared ' \
+                                         f'after it'
+            else:
+                self.__undecided[name] = f'{name} is declared as {true_type} in one branch of an IF and {false_type} ' \
+                                         f'in the other, so its type after the IF is not known'
+
+    def visit_InvariantScope(self, node: InvariantScope) -> None:
+        self.visit(node.get_loop())
+
+
+# swaps in the unchecked nodes, with the data types from the namespace the program will run in bound into them
+class Unchecker(NodeTransformer):
+    def __init__(self, checker: TypeChecker, namespace: NameSpace) -> None:
+        super(Unchecker, self).__init__()
+        self.__checker = checker
+        self.__namespace = namespace
+
+    def data_type(self, node: interfaces.evaluable) -> interfaces.DataType:
+        return interfaces.evaluable.get_type(self.__checker.get_type(node), self.__namespace)
+
+    def visit_evaluable(self, node: interfaces.evaluable) -> interfaces.evaluable:
+        operation = UNCHECKED_OPERATIONS.get(type(node))
+        if operation is None:
+            return super(Unchecker, self).visit_evaluable(node)
+        a, b = (self.visit(operand) for operand in node.get_operands())
+        return operation(a, b, self.data_type(node))
+
+    def visit_IntegerLiteral(self, node: IntegerLiteral) -> interfaces.evaluable:
+        return unchecked.UncheckedIntegerLiteral(node.get_value(), node.evaluate(self.__namespace))
+
+    def visit_RealLiteral(self, node: RealLiteral) -> interfaces.evaluable:
+        return unchecked.UncheckedRealLiteral(node.get_value(), node.evaluate(self.__namespace))
+
+    def visit_BooleanLiteral(self, node: BooleanLiteral) -> interfaces.evaluable:
+        return unchecked.UncheckedBooleanLiteral(node.get_value(), node.evaluate(self.__namespace))
+
+    def visit_VariableAssignment(self, node: VariableAssignment) -> interfaces.instruction:
+        return unchecked.UncheckedAssignment(node.get_identifier(), self.visit(node.get_value()))
+
+    def visit_ForLoop(self, node: ForLoop) -> interfaces.instruction:
+        frm, to, step = (self.visit(expression) for expression in node.get_range())
+        body = self.transform_block(node.get_instructions())
+        integer = interfaces.evaluable.get_type(INTEGER, self.__namespace)
+        return unchecked.UncheckedForLoop(node.get_identifier(), frm, to, step, body, integer)
+
+    def visit_IfElse(self, node: IfElse) -> interfaces.instruction:
+        true_code, false_code = node.get_branches()
+        return unchecked.UncheckedIfElse(
+            self.visit(node.get_condition()),
+            self.transform_block(true_code),
+            self.transform_block(false_code)
+        )
+
+
+def check_program(program: Sequence[interfaces.instruction]) -> TypeChecker:
+    checker = TypeChecker()
+    checker.check_block(program)
+    if checker.errors:
+        raise TypeCheckError(checker.errors)
+    return checker
+
+
+# programs the checker did not completely understand are returned as they are, to run with all their checks
+def make_unchecked(
+        program: list[interfaces.instruction],
+        checker: TypeChecker,
+        namespace: NameSpace
+) -> list[interfaces.instruction]:
+    if not checker.is_complete():
+        return program
+    return Unchecker(checker, namespace).transform_program(program)
@@ -0,0 +1,205 @@
+# Unchecked versions of the operations and instructions, put in place by the typechecker file once it has proven that
+# none of the run time type checks in the originals can fail. Each has the data types it produces bound in when it is
+# made, rather than looking them up by name on every evaluation. They subclass the nodes they replace, so the other
+# passes and backends still treat them as the original kind of node.
+from typing import Optional, TYPE_CHECKING
+
+from pseudocoder import interfaces
+from pseudocoder import instructions
+from pseudocoder import operations
+
+if TYPE_CHECKING:
+    from pseudocoder.namespaces import NameSpace
+
+
+class UncheckedIntegerLiteral(operations.IntegerLiteral):
+    def __init__(self, integer: int, value: interfaces.data) -> None:
+        super(UncheckedIntegerLiteral, self).__init__(integer)
+        self.__value = value
+
+    def evaluate(self, namespace: 'NameSpace') -> interfaces.data:
+        return self.__value
+
+
+class UncheckedRealLiteral(operations.RealLiteral):
+    def __init__(self, real: float, value: interfaces.data) -> None:
+        super(UncheckedRealLiteral, self).__init__(real)
+        self.__value = value
+
+    def evaluate(self, namespace: 'NameSpace') -> interfaces.data:
+        return self.__value
+
+
+class UncheckedBooleanLiteral(operations.BooleanLiteral):
+    def __init__(self, boolean: bool, value: interfaces.data) -> None:
+        super(UncheckedBooleanLiteral, self).__init__(boolean)
+        self.__value = value
+
+    def evaluate(self, namespace: 'NameSpace') -> interfaces.data:
+        return self.__value
+
+
+class UncheckedAddition(operations.Addition):
+    def __init__(self, _a: interfaces.evaluable, _b: interfaces.evaluable, result: interfaces.DataType) -> None:
+        super(UncheckedAddition, self).__init__(_a, _b)
+        self.__a, self.__b, self.__result = _a, _b, result
+
+    def evaluate(self, namespace: 'NameSpace') -> interfaces.number:
+        return self.__result.from_python(self.__a.evaluate(namespace).to_python() +
+                                         self.__b.evaluate(namespace).to_python())
+
+
+class UncheckedSubtraction(operations.Subtraction):
+    def __init__(self, _a: interfaces.evaluable, _b: interfaces.evaluable, result: interfaces.DataType) -> None:
+        super(UncheckedSubtraction, self).__init__(_a, _b)
+        self.__a, self.__b, self.__result = _a, _b, result
+
+    def evaluate(self, namespace: 'NameSpace') -> interfaces.number:
+        return self.__result.from_python(self.__a.evaluate(namespace).to_python() -
+                                         self.__b.evaluate(namespace).to_python())
+
+
+class UncheckedMultiplication(operations.Multiplication):
+    def __init__(self, _a: interfaces.evaluable, _b: interfaces.evaluable, result: interfaces.DataType) -> None:
+        super(UncheckedMultiplication, self).__init__(_a, _b)
+        self.__a, self.__b, self.__result = _a, _b, result
+
+    def evaluate(self, namespace: 'NameSpace') -> interfaces.number:
+        return self.__result.from_python(self.__a.evaluate(namespace).to_python() *
+                                         self.__b.evaluate(namespace).to_python())
+
+
+class UncheckedDivision(operations.Division):
+    def __init__(self, _a: interfaces.evaluable, _b: interfaces.evaluable, result: interfaces.DataType) -> None:
+        super(UncheckedDivision, self).__init__(_a, _b)
+        self.__a, self.__b, self.__result = _a, _b, result
+
+    def evaluate(self, namespace: 'NameSpace') -> interfaces.number:
+        return self.__result.from_python(self.__a.evaluate(namespace).to_python() /
+                                         self.__b.evaluate(namespace).to_python())
+
+
+class UncheckedGreaterThan(operations.GreaterThan):
+    def __init__(self, _a: interfaces.evaluable, _b: interfaces.evaluable, result: interfaces.DataType) -> None:
+        super(UncheckedGreaterThan, self).__init__(_a, _b)
+        self.__a, self.__b, self.__result = _a, _b, result
+
+    def evaluate(self, namespace: 'NameSpace') -> interfaces.data:
+        return self.__result.from_python(self.__a.evaluate(namespace).to_python() >
+                                         self.__b.evaluate(namespace).to_python())
+
+
+class UncheckedLessThan(operations.LessThan):
+    def __init__(self, _a: interfaces.evaluable, _b: interfaces.evaluable, result: interfaces.DataType) -> None:
+        super(UncheckedLessThan, self).__init__(_a, _b)
+        self.__a, self.__b, self.__result = _a, _b, result
+
+    def evaluate(self, namespace: 'NameSpace') -> interfaces.data:
+        return self.__result.from_python(self.__a.evaluate(namespace).to_python() <
+                                         self.__b.evaluate(namespace).to_python())
+
+
+class UncheckedGreaterThanEqual(operations.GreaterThanEqual):
+    def __init__(self, _a: interfaces.evaluable, _b: interfaces.evaluable, result: interfaces.DataType) -> None:
+        super(UncheckedGreaterThanEqual, self).__init__(_a, _b)
+        self.__a, self.__b, self.__result = _a, _b, result
+
+    def evaluate(self, namespace: 'NameSpace') -> interfaces.data:
+        return self.__result.from_python(self.__a.evaluate(namespace).to_python() >=
+                                         self.__b.evaluate(namespace).to_python())
+
+
+class UncheckedLessThanEqual(operations.LessThanEqual):
+    def __init__(self, _a: interfaces.evaluable, _b: interfaces.evaluable, result: interfaces.DataType) -> None:
+        super(UncheckedLessThanEqual, self).__init__(_a, _b)
+        self.__a, self.__b, self.__result = _a, _b, result
+
+    def evaluate(self, namespace: 'NameSpace') -> interfaces.data:
+        return self.__result.from_python(self.__a.evaluate(namespace).to_python() <=
+                                         self.__b.evaluate(namespace).to_python())
+
+
+class UncheckedEqual(operations.Equal):
+    def __init__(self, _a: interfaces.evaluable, _b: interfaces.evaluable, result: interfaces.DataType) -> None:
+        super(UncheckedEqual, self).__init__(_a, _b)
+        self.__a, self.__b, self.__result = _a, _b, result
+
+    def evaluate(self, namespace: 'NameSpace') -> interfaces.data:
+        return self.__result.from_python(self.__a.evaluate(namespace).to_python() ==
+                                         self.__b.evaluate(namespace).to_python())
+
+
+class UncheckedNotEqual(operations.NotEqual):
+    def __init__(self, _a: interfaces.evaluable, _b: interfaces.evaluable, result: interfaces.DataType) -> None:
+        super(UncheckedNotEqual, self).__init__(_a, _b)
+        self.__a, self.__b, self.__result = _a, _b, result
+
+    def evaluate(self, namespace: 'NameSpace') -> interfaces.data:
+        return self.__result.from_python(self.__a.evaluate(namespace).to_python() !=
+                                         self.__b.evaluate(namespace).to_python())
+
+
+class UncheckedAnd(operations.And):
+    def __init__(self, _a: interfaces.evaluable, _b: interfaces.evaluable, result: interfaces.DataType) -> None:
+        super(UncheckedAnd, self).__init__(_a, _b)
+        self.__a, self.__b, self.__result = _a, _b, result
+
+    def evaluate(self, namespace: 'NameSpace') -> interfaces.data:
+        a = self.__a.evaluate(namespace).to_python()
+        b = self.__b.evaluate(namespace).to_python()
+        return self.__result.from_python(a and b)
+
+
+class UncheckedOr(operations.Or):
+    def __init__(self, _a: interfaces.evaluable, _b: interfaces.evaluable, result: interfaces.DataType) -> None:
+        super(UncheckedOr, self).__init__(_a, _b)
+        self.__a, self.__b, self.__result = _a, _b, result
+
+    def evaluate(self, namespace: 'NameSpace') -> interfaces.data:
+        a = self.__a.evaluate(namespace).to_python()
+        b = self.__b.evaluate(namespace).to_python()
+        return self.__result.from_python(a or b)
+
+
+class UncheckedAssignment(instructions.VariableAssignment):
+    def execute(self, lookup_namespace: 'NameSpace', action_namespace: 'NameSpace') -> None:
+        data_value = self.get_value().evaluate(lookup_namespace)
+        self.get_identifier().get_slot(action_namespace).set_unchecked(data_value)
+
+
+class UncheckedForLoop(instructions.ForLoop):
+    def __init__(
+            self, identifier: operations.Identifier,
+            from_expression: interfaces.evaluable,
+            to_expression: interfaces.evaluable,
+            step_expression: interfaces.evaluable,
+            instructions: tuple[interfaces.instruction, ...],
+            integer: interfaces.DataType
+    ):
+        super(UncheckedForLoop, self).__init__(identifier, from_expression, to_expression, step_expression,
+                                               instructions)
+        self.__integer = integer
+
+    def execute(self, lookup_namespace: 'NameSpace', action_namespace: 'NameSpace') -> Optional[interfaces.data]:
+        frm, to, step = (expression.evaluate(lookup_namespace).to_python() for expression in self.get_range())
+        slot = self.get_identifier().get_slot(action_namespace)
+        box = self.__integer.from_python
+        body = self.get_instructions()
+        for x in range(frm, to + 1, step):
+            slot.set_unchecked(box(x))
+            for instruction in body:
+                returned = instruction.execute(lookup_namespace, action_namespace)
+                if returned is not None:
+                    return returned
+        return None
+
+
+class UncheckedIfElse(instructions.IfElse):
+    def execute(self, lookup_namespace: 'NameSpace', action_namespace: 'NameSpace') -> Optional[interfaces.data]:
+        true_code, false_code = self.get_branches()
+        code = true_code if self.get_condition().evaluate(lookup_namespace).to_python() else false_code
+        for instruction in code:
+            returned = instruction.execute(lookup_namespace, action_namespace)
+            if returned is not None:
+                return returned
+        return None
@@ -0,0 +1,140 @@
+# Base class for the passes that walk the ast produced by the interpreter file. Like the semantics class, a visitor has
+# one method per kind of node, named visit_<class name>. Nodes without a method of their own are handed to the method
+# for their nearest base class, and then to generic_visit.
+from typing import Any, Callable
+
+from pseudocoder import instructions
+
+
+class NodeVisitor:
+    def __init__(self) -> None:
+        self.__methods: dict[type, Callable[[Any], Any]] = {}
+
+    def visit(self, node) -> Any:
+        node_type = type(node)
+        method = self.__methods.get(node_type)
+        if method is None:
+            method = self.__find_method(node_type)
+            self.__methods[node_type] = method
+        return method(node)
+
+    def __find_method(self, node_type: type) -> Callable[[Any], Any]:
+        for cls in node_type.__mro__:
+            method = getattr(self, 'visit_' + cls.__name__, None)
+            if method is not None:
+                return method
+        return self.generic_visit
+
+    def generic_visit(self, node) -> Any:
+        raise NotImplementedError(f'{type(self).__name__} does not support {type(node).__name__}')
+
+
+# A visitor that rebuilds the tree. Each visit method returns the node that should take the place of the one it was
+# given, which is the same node when nothing beneath it has changed. A method visiting an instruction may also return a
+# tuple of instructions to splice into the enclosing block in its place, or an empty tuple to remove it.
+class NodeTransformer(NodeVisitor):
+    def visit(self, node) -> Any:
+        transformed = super(NodeTransformer, self).visit(node)
+        position = getattr(node, 'position', None)  # only instructions have one
+        if transformed is not node and position is not None:
+            for instruction in transformed if isinstance(transformed, tuple) else (transformed,):
+                if instruction.position is None:
+                    instruction.position = position
+        return transformed
+
+    def generic_visit(self, node) -> Any:
+        return node
+
+    def transform_block(self, block: tuple) -> tuple:
+        result = []
+        changed = False
+        for instruction in block:
+            transformed = self.visit(instruction)
+            if isinstance(transformed, tuple):
+                result.extend(transformed)
+                changed = True
+            else:
+                result.append(transformed)
+                changed = changed or transformed is not instruction
+        return tuple(result) if changed else block
+
+    def transform_program(self, program: list) -> list:
+        return list(self.transform_block(tuple(program)))
+
+    def visit_evaluable(self, node) -> Any:
+        if not hasattr(node, 'get_operands'):  # identifiers, literals and anything else without operands are leaves
+            return node
+        operands = node.get_operands()
+        transformed = tuple(self.visit(operand) for operand in operands)
+        if all(new is old for new, old in zip(transformed, operands)):
+            return node
+        return type(node)(*transformed)
+
+    def visit_LoopInvariant(self, node) -> Any:
+        return node  # the InvariantScope around the loop holds on to this very node, so it is never rebuilt
+
+    def visit_VariableDeclaration(self, node) -> Any:
+        type_expression = self.visit(node.get_type_expression())
+        if type_expression is node.get_type_expression():
+            return node
+        return instructions.VariableDeclaration(node.get_identifier(), type_expression)
+
+    def visit_ConstantDeclaration(self, node) -> Any:
+        value = self.visit(node.get_value())
+        if value is node.get_value():
+            return node
+        return instructions.ConstantDeclaration(node.get_identifier(), node.get_type_name(), value)
+
+    def visit_VariableAssignment(self, node) -> Any:
+        value = self.visit(node.get_value())
+        if value is node.get_value():
+            return node
+        return instructions.VariableAssignment(node.get_identifier(), value)
+
+    def visit_Output(self, node) -> Any:
+        value = self.visit(node.get_value())
+        if value is node.get_value():
+            return node
+        return instructions.Output(value)
+
+    def visit_FunctionReturn(self, node) -> Any:
+        value = self.visit(node.get_value())
+        if value is node.get_value():
+            return node
+        return instructions.FunctionReturn(value)
+
+    def visit_ForLoop(self, node) -> Any:
+        bounds = node.get_range()
+        frm, to, step = (self.visit(expression) for expression in bounds)
+        body = self.transform_block(node.get_instructions())
+        if (frm, to, step) == bounds and body is node.get_instructions():
+            return node
+        return instructions.ForLoop(node.get_identifier(), frm, to, step, body)
+
+    def visit_WhileLoop(self, node) -> Any:
+        condition = self.visit(node.get_condition())
+        body = self.transform_block(node.get_instructions())
+        if condition is node.get_condition() and body is node.get_instructions():
+            return node
+        return type(node)(condition, body)
+
+    def visit_IfElse(self, node) -> Any:
+        condition = self.visit(node.get_condition())
+        true_code, false_code = node.get_branches()
+        new_true_code = self.transform_block(true_code)
+        new_false_code = self.transform_block(false_code)
+        if condition is node.get_condition() and new_true_code is true_code and new_false_code is false_code:
+            return node
+        return instructions.IfElse(condition, new_true_code, new_false_code)
+
+    def visit_InstructionWrapper(self, node) -> Any:
+        instruction = self.visit(node.get_instruction())
+        if instruction is node.get_instruction() or isinstance(instruction, tuple):
+            return instruction if isinstance(instruction, tuple) else node
+        return node.wrap(instruction)
+
+    def visit_InvariantScope(self, node) -> Any:
+        loop = self.visit(node.get_loop())
+        if loop is node.get_loop() or isinstance(loop, tuple):
+            return node
+        return instructions.InvariantScope(loop, node.get_invariants())
@@ -0,0 +1,149 @@
+# The bytecode backend's virtual machine: a single loop that runs the code made by the bytecode file, dispatching on
+# each opcode in turn, with values kept on one python list as a stack. It makes the same checks on its values as the
+# tree walker, and fails with the same AssertionErrors.
+from pseudocoder import interfaces
+from pseudocoder.bytecode import Bytecode
+from pseudocoder.bytecode import LOAD_CONST, LOAD_NAME, STORE_NAME, DECLARE, ADD, SUBTRACT, MULTIPLY, DIVIDE
+from pseudocoder.bytecode import GREATER, LESS, GREATER_EQUAL, LESS_EQUAL, EQUAL, NOT_EQUAL, AND, OR
+from pseudocoder.bytecode import OUTPUT, JUMP, JUMP_IF_FALSE, JUMP_IF_TRUE, FOR_SETUP, FOR_ITER, EVALUATE, EXECUTE
+from pseudocoder.bytecode import RETURN
+from pseudocoder.data import Integer, Real, Boolean
+from pseudocoder.namespaces import NameSpace, Slot
+
+NUMBERS = (Integer, Real)
+
+
+def run_bytecode(bytecode: Bytecode, namespace: NameSpace) -> None:
+    # the array is copied to a list, which is quicker to index
+    code = bytecode.get_code().tolist()
+    constants = bytecode.get_constants()
+    names = bytecode.get_names()
+    nodes = bytecode.get_nodes()
+    integer = interfaces.evaluable.get_type('INTEGER', namespace)
+    real = interfaces.evaluable.get_type('REAL', namespace)
+    boolean = interfaces.evaluable.get_type('BOOLEAN', namespace)
+    box_integer, box_real, box_boolean = integer.from_python, real.from_python, boolean.from_python
+    write_line = namespace.get_output().write_line
+
+    # slots only exist once their DECLARE has run, so they are looked up on first use and then kept
+    slots: list = [None] * len(names)
+
+    def get_slot(index: int) -> Slot:
+        slot = slots[index]
+        if slot is None:
+            slot = slots[index] = namespace.lookup_variable(names[index])
+        return slot
+
+    stack: list = []
+    push, pop = stack.append, stack.pop
+    pc = 0
+    while True:
+        opcode = code[pc]
+        argument = code[pc + 1]
+        pc += 2
+        if opcode == LOAD_NAME:
+            slot = slots[argument]
+            if slot is not None:
+                push(slot.get())
+                continue
+            try:
+                slot = get_slot(argument)
+            except AssertionError:  # not a variable, so a constant such as a type name
+                push(namespace.lookup(names[argument]))
+            else:
+                push(slot.get())
+        elif opcode == LOAD_CONST:
+            push(constants[argument])
+        elif opcode == STORE_NAME:
+            slot = slots[argument]
+            if slot is None:
+                slot = get_slot(argument)
+            slot.set(pop())
+        elif opcode == FOR_ITER:
+            x = next(stack[-1], None)
+            if x is None:
+                del stack[-2:]
+            else:
+                stack[-2].set(box_integer(x))
+                pc = argument * 2
+        elif opcode <= DIVIDE and opcode >= ADD:
+            b = pop()
+            a = stack[-1]
+            assert a.__class__ in NUMBERS
+            assert b.__class__ in NUMBERS
+            x = a.to_python()
+            y = b.to_python()
+            if opcode == ADD:
+                c = x + y
+            elif opcode == SUBTRACT:
+                c = x - y
+            elif opcode == MULTIPLY:
+                c = x * y
+            else:
+                stack[-1] = box_real(x / y)
+                continue
+            stack[-1] = box_real(c) if c.__class__ is float else box_integer(c)
+        elif opcode <= EQUAL and opcode >= GREATER:
+            b = pop()
+            a = stack[-1]
+            assert a.__class__ in NUMBERS
+            assert b.__class__ in NUMBERS
+            x = a.to_python()
+            y = b.to_python()
+            if opcode == GREATER:
+                stack[-1] = box_boolean(x > y)
+            elif opcode == LESS:
+                stack[-1] = box_boolean(x < y)
+            elif opcode == GREATER_EQUAL:
+                stack[-1] = box_boolean(x >= y)
+            elif opcode == LESS_EQUAL:
+                stack[-1] = box_boolean(x <= y)
+            else:
+                stack[-1] = box_boolean(x == y)
+        elif opcode == JUMP_IF_FALSE:
+            condition = pop()
+            assert condition.__class__ is Boolean
+            if not condition.to_python():
+                pc = argument * 2
+        elif opcode == JUMP:
+            pc = argument * 2
+        elif opcode == OUTPUT:
+            write_line(str(pop().to_python()))
+        elif opcode == NOT_EQUAL:
+            b = pop()
+            stack[-1] = box_boolean(stack[-1].to_python() != b.to_python())
+        elif opcode == AND or opcode == OR:
+            b = pop()
+            a = stack[-1]
+            assert boolean.is_type(a)
+            assert boolean.is_type(b)
+            if opcode == AND:
+                stack[-1] = box_boolean(a.to_python() and b.to_python())
+            else:
+                stack[-1] = box_boolean(a.to_python() or b.to_python())
+        elif opcode == JUMP_IF_TRUE:
+            condition = pop()
+            assert condition.__class__ is Boolean
+            if condition.to_python():
+                pc = argument * 2
+        elif opcode == FOR_SETUP:
+            step = pop()
+            to = pop()
+            frm = pop()
+            assert all(integer.is_type(x) for x in (frm, to, step))
+            push(get_slot(argument))
+            push(iter(range(frm.to_python(), to.to_python() + 1, step.to_python())))
+        elif opcode == DECLARE:
+            data_type = pop()
+            assert isinstance(data_type, interfaces.DataType)
+            namespace.declare_variable(names[argument], data_type)
+        elif opcode == EVALUATE:
+            push(nodes[argument].evaluate(namespace))
+        elif opcode == EXECUTE:
+            returned = nodes[argument].execute(namespace, namespace)
+            if returned is not None:  # a RETURN outside of a function
+                raise interfaces.FunctionEnd(returned)
+        elif opcode == RETURN:
+            return
+        else:
+            raise AssertionError(f'Unknown opcode {opcode}')
@@ -17,6 +17,6 @@ setuptools.setup(
         "Operating System :: OS Independent",
     ],
     packages=setuptools.find_packages(),
-    python_requires=">=3.9",
-    install_requires='tatsu'
+    python_requires=">=3.10",
+    install_requires='tatsu>=5.15'
 )
@@ -0,0 +1,145 @@
+import os
+from typing import Optional
+
+import pytest
+
+from pseudocoder.interpreter import parse_program
+from pseudocoder.optimizer import Optimizer
+from pseudocoder.output import MemorySink
+from pseudocoder.runner import BACKENDS, run_program
+
+with open(os.path.join(os.path.dirname(__file__), '..', 'code.pseudo'), 'r') as fh:
+    CODE = fh.read()
+
+PROGRAMS = {
+    'code.pseudo': CODE,
+    'arithmetic': '''DECLARE a : INTEGER
+DECLARE r : REAL
+DECLARE b : BOOLEAN
+a <- 10 - 2 - 3
+OUTPUT a
+OUTPUT 2 + 3 * 4
+OUTPUT (2 + 3) * 4
+OUTPUT 7 / 2
+r <- 3.5
+OUTPUT r * 2
+b <- 1 < 2 AND 3 > 4 OR 2 = 2
+OUTPUT b
+OUTPUT 5 <> 4
+''',
+    'loops': '''DECLARE i : INTEGER
+DECLARE j : INTEGER
+DECLARE t : INTEGER
+t <- 0
+FOR i <- 1 TO 30
+  FOR j <- 1 TO i STEP 2
+    t <- t + j
+  ENDFOR
+ENDFOR
+OUTPUT t
+OUTPUT i
+OUTPUT j
+FOR i <- 5 TO 1
+  OUTPUT i
+ENDFOR
+OUTPUT i
+''',
+    'branches': '''DECLARE i : INTEGER
+DECLARE r : REAL
+DECLARE b : BOOLEAN
+r <- 0.5
+FOR i <- 1 TO 4
+  b <- i < 3
+  IF b THEN
+    OUTPUT i
+  ELSE
+    IF i = 4 OR r > 1 THEN
+      OUTPUT r
+    ENDIF
+  ENDIF
+  OUTPUT b <> (i > 1)
+  r <- r + 0.5
+ENDFOR
+''',
+    'invariants': '''DECLARE i : INTEGER
+DECLARE j : INTEGER
+DECLARE k : INTEGER
+DECLARE total : REAL
+DECLARE scale : INTEGER
+total <- 0.0
+scale <- 3
+FOR i <- 1 TO 20
+    FOR j <- 1 TO 20
+        total <- total + (2 + 5) * 8 - 3 / 4 + scale * i + scale * scale
+        IF 1 < 2 THEN
+            k <- j * scale
+        ELSE
+            k <- 0
+        ENDIF
+    ENDFOR
+    scale <- scale + 1
+ENDFOR
+OUTPUT total
+OUTPUT k
+''',
+    'undeclared': '''OUTPUT 1
+OUTPUT x
+''',
+    'unassigned': '''DECLARE i : INTEGER
+OUTPUT 1
+OUTPUT i
+''',
+    'wrong type': '''DECLARE x : INTEGER
+OUTPUT 1
+x <- 1.5
+OUTPUT x
+''',
+    'condition not boolean': '''DECLARE x : INTEGER
+x <- 1
+IF x THEN
+  OUTPUT 2
+ENDIF
+''',
+    'division by zero': '''DECLARE i : INTEGER
+DECLARE x : REAL
+FOR i <- 1 TO 5
+  x <- 1 / (i - 3)
+  OUTPUT x
+ENDFOR
+''',
+    'declared twice in a loop': '''DECLARE i : INTEGER
+FOR i <- 1 TO 2
+  OUTPUT i
+  DECLARE k : INTEGER
+ENDFOR
+''',
+}
+
+# --jit only changes how the tree walker runs, so it is only combined with that backend
+CONFIGURATIONS = [
+    (backend, optimize, typecheck, jit)
+    for backend in BACKENDS
+    for optimize in (False, True)
+    for typecheck in (False, True)
+    for jit in ((False, True) if backend == 'tree' else (False,))
+]
+
+
+def run(code: str, backend: str, optimize: bool, typecheck: bool, jit: bool) -> tuple[list[str], Optional[str]]:
+    output = MemorySink()
+    error = None
+    try:
+        run_program(parse_program(code), backend, optimizer=Optimizer() if optimize else None, typecheck=typecheck,
+                    output=output, jit=jit)
+    except Exception as e:
+        error = type(e).__name__
+    return output.get_lines(), error
+
+
+@pytest.mark.parametrize('backend, optimize, typecheck, jit', CONFIGURATIONS)
+@pytest.mark.parametrize('name', list(PROGRAMS))
+def test_backends_agree(name: str, backend: str, optimize: bool, typecheck: bool, jit: bool):
+    # the type checker rejects some programs before they run, so each is compared with the tree walker checking the
+    # same way
+    expected = run(PROGRAMS[name], 'tree', False, typecheck, False)
+    assert run(PROGRAMS[name], backend, optimize, typecheck, jit) == expected
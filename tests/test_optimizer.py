@@ -0,0 +1,42 @@
+import pytest
+
+from pseudocoder.instructions import VariableDeclaration, VariableAssignment, FunctionReturn, ForLoop, Output
+from pseudocoder.interfaces import Function
+from pseudocoder.namespaces import GlobalNameSpace, Parameters
+from pseudocoder.operations import Identifier, IntegerLiteral, FunctionEvaluate, Addition, Multiplication
+from pseudocoder.optimizer import Optimizer
+from pseudocoder.output import MemorySink
+from pseudocoder.runner import BACKENDS
+
+
+# the grammar cannot declare functions yet, so, as in benchmarks/calls.py, the program is built from the ast classes
+def run_bump_loop(backend: str, optimize: bool) -> list[str]:
+    g, x, i = Identifier('g'), Identifier('x'), Identifier('i')
+    integer = Identifier('INTEGER')
+    program = [
+        VariableDeclaration(g, integer),
+        VariableDeclaration(x, integer),
+        VariableDeclaration(i, integer),
+        VariableAssignment(g, IntegerLiteral(1)),
+        ForLoop(i, IntegerLiteral(1), IntegerLiteral(3), IntegerLiteral(1), (
+            VariableAssignment(x, FunctionEvaluate('bump')),
+            Output(Multiplication(g, IntegerLiteral(10))),
+        )),
+    ]
+    if optimize:
+        program = Optimizer().optimize(program)
+    output = MemorySink()
+    namespace = GlobalNameSpace(output=output)
+    # bump assigns to g, which is outside it, through its parent namespace
+    namespace._constants['bump'] = Function(Parameters(), namespace.lookup('INTEGER'), (
+        VariableAssignment(Identifier('g'), Addition(Identifier('g'), IntegerLiteral(1))),
+        FunctionReturn(Identifier('g')),
+    ), namespace)
+    BACKENDS[backend](program, namespace)
+    return output.get_lines()
+
+
+@pytest.mark.parametrize('backend', list(BACKENDS))
+def test_loop_calling_a_function_is_not_hoisted(backend: str):
+    assert run_bump_loop(backend, optimize=False) == ['20', '30', '40']
+    assert run_bump_loop(backend, optimize=True) == ['20', '30', '40']
@@ -0,0 +1,51 @@
+import pytest
+
+from pseudocoder.interpreter import parse_program
+from pseudocoder.typechecker import TypeCheckError, check_program
+
+
+def check(code: str) -> None:
+    check_program(parse_program(code))
+
+
+def test_declared_inside_for_loop_is_usable_inside_it():
+    check('''
+DECLARE i : INTEGER
+FOR i <- 1 TO 3
+    DECLARE y : INTEGER
+    y <- i
+    OUTPUT y
+ENDFOR
+''')
+
+
+def test_declared_inside_for_loop_is_not_declared_after_it():
+    with pytest.raises(TypeCheckError, match='y is declared inside a FOR loop'):
+        check('''
+DECLARE i : INTEGER
+FOR i <- 1 TO 0
+    DECLARE y : INTEGER
+ENDFOR
+y <- 3
+''')
+
+
+def test_declared_in_one_branch_of_if_is_not_declared_after_it():
+    with pytest.raises(TypeCheckError, match='y is declared in only one branch of an IF'):
+        check('''
+IF 1 < 2 THEN
+    DECLARE y : INTEGER
+ENDIF
+y <- 3
+''')
+
+
+def test_declared_in_both_branches_of_if_is_declared_after_it():
+    check('''
+IF 1 < 2 THEN
+    DECLARE y : INTEGER
+ELSE
+    DECLARE y : INTEGER
+ENDIF
+y <- 3
+''')